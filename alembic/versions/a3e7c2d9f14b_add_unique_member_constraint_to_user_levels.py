@@ -0,0 +1,34 @@
+"""Add unique member constraint to UserLevels
+
+Revision ID: a3e7c2d9f14b
+Revises: d6f1a4f3d06e
+Create Date: 2026-10-18 10:12:41.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3e7c2d9f14b'
+down_revision = 'd6f1a4f3d06e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Remove duplicate member entries, keeping the one with the most XP
+    op.execute(sa.text(
+        """
+        DELETE FROM "UserLevels" a
+        USING "UserLevels" b
+        WHERE a.guild_id = b.guild_id
+          AND a.user_id = b.user_id
+          AND (a.total_xp < b.total_xp OR (a.total_xp = b.total_xp AND a.id < b.id))
+        """
+    ))
+    op.create_unique_constraint('UserLevels_guild_id_user_id_key', 'UserLevels', ['guild_id', 'user_id'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('UserLevels_guild_id_user_id_key', 'UserLevels', type_='unique')
@@ -0,0 +1,24 @@
+"""Drop trigram index for tag name search
+
+Revision ID: a6d3f0c8e217
+Revises: e9b4c6f18a25
+Create Date: 2026-10-18 23:12:46.581203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6d3f0c8e217'
+down_revision = 'e9b4c6f18a25'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.drop_index('ix_Tags_name_trgm', table_name='Tags')
+
+
+def downgrade() -> None:
+    op.create_index('ix_Tags_name_trgm', 'Tags', ['name'], unique=False, postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
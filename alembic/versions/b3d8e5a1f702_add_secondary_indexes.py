@@ -0,0 +1,42 @@
+"""Add secondary indexes for frequent queries
+
+Revision ID: b3d8e5a1f702
+Revises: f4c1d7e9b362
+Create Date: 2026-10-18 19:12:44.503918
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3d8e5a1f702'
+down_revision = 'f4c1d7e9b362'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(sa.text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+
+    op.create_index('ix_Punishments_guild_id_user_id_issue_date', 'Punishments', ['guild_id', 'user_id', sa.text('issue_date DESC')], unique=False)
+    op.create_index('ix_Punishments_guild_id_case_id', 'Punishments', ['guild_id', 'case_id'], unique=False)
+    op.create_index('ix_Punishments_guild_id_moderator_id', 'Punishments', ['guild_id', 'moderator_id'], unique=False)
+    op.create_index('ix_Punishments_user_id', 'Punishments', ['user_id'], unique=False)
+    op.create_index('ix_Punishments_user_name_trgm', 'Punishments', ['user_name'], unique=False, postgresql_using='gin', postgresql_ops={'user_name': 'gin_trgm_ops'})
+    op.create_index('ix_Reminders_user_id', 'Reminders', ['user_id'], unique=False)
+    op.create_index('ix_Tags_guild_id_lower_name', 'Tags', ['guild_id', sa.text('lower(name)')], unique=False)
+    op.create_index('ix_Translations_original_content', 'Translations', ['original_content'], unique=False, postgresql_using='hash')
+    op.create_index('ix_LevelRewards_guild_id', 'LevelRewards', ['guild_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_LevelRewards_guild_id', table_name='LevelRewards')
+    op.drop_index('ix_Translations_original_content', table_name='Translations')
+    op.drop_index('ix_Tags_guild_id_lower_name', table_name='Tags')
+    op.drop_index('ix_Reminders_user_id', table_name='Reminders')
+    op.drop_index('ix_Punishments_user_name_trgm', table_name='Punishments')
+    op.drop_index('ix_Punishments_user_id', table_name='Punishments')
+    op.drop_index('ix_Punishments_guild_id_moderator_id', table_name='Punishments')
+    op.drop_index('ix_Punishments_guild_id_case_id', table_name='Punishments')
+    op.drop_index('ix_Punishments_guild_id_user_id_issue_date', table_name='Punishments')
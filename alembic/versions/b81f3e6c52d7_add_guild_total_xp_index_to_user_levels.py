@@ -0,0 +1,24 @@
+"""Add guild total XP index to UserLevels
+
+Revision ID: b81f3e6c52d7
+Revises: a3e7c2d9f14b
+Create Date: 2026-10-18 11:02:17.540923
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b81f3e6c52d7'
+down_revision = 'a3e7c2d9f14b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_UserLevels_guild_id_total_xp', 'UserLevels', ['guild_id', sa.text('total_xp DESC')], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_UserLevels_guild_id_total_xp', table_name='UserLevels')
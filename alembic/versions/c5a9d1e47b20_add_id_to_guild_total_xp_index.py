@@ -0,0 +1,26 @@
+"""Add id to guild total XP index of UserLevels
+
+Revision ID: c5a9d1e47b20
+Revises: b81f3e6c52d7
+Create Date: 2026-10-18 13:41:05.118342
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5a9d1e47b20'
+down_revision = 'b81f3e6c52d7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.drop_index('ix_UserLevels_guild_id_total_xp', table_name='UserLevels')
+    op.create_index('ix_UserLevels_guild_id_total_xp_id', 'UserLevels', ['guild_id', sa.text('total_xp DESC'), sa.text('id DESC')], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_UserLevels_guild_id_total_xp_id', table_name='UserLevels')
+    op.create_index('ix_UserLevels_guild_id_total_xp', 'UserLevels', ['guild_id', sa.text('total_xp DESC')], unique=False)
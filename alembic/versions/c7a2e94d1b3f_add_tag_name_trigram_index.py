@@ -0,0 +1,25 @@
+"""Add trigram index for tag name search
+
+Revision ID: c7a2e94d1b3f
+Revises: b3d8e5a1f702
+Create Date: 2026-10-18 20:41:09.217364
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7a2e94d1b3f'
+down_revision = 'b3d8e5a1f702'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(sa.text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    op.create_index('ix_Tags_name_trgm', 'Tags', ['name'], unique=False, postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    op.drop_index('ix_Tags_name_trgm', table_name='Tags')
@@ -0,0 +1,24 @@
+"""Add member index to role change queue
+
+Revision ID: d3b7e1a94c60
+Revises: a6d3f0c8e217
+Create Date: 2026-10-19 10:14:32.905126
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd3b7e1a94c60'
+down_revision = 'a6d3f0c8e217'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_RoleChangeQueue_guild_id_member_id', 'RoleChangeQueue', ['guild_id', 'member_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_RoleChangeQueue_guild_id_member_id', table_name='RoleChangeQueue')
@@ -0,0 +1,34 @@
+"""Add retry columns to RoleChangeQueue
+
+Revision ID: e2f7b8c3a915
+Revises: c5a9d1e47b20
+Create Date: 2026-10-18 14:27:52.604117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2f7b8c3a915'
+down_revision = 'c5a9d1e47b20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('RoleChangeQueue', sa.Column('attempts', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('RoleChangeQueue', sa.Column('date_available', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False))
+    op.add_column('RoleChangeQueue', sa.Column('date_claimed', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('RoleChangeQueue', sa.Column('last_error', sa.Text(), nullable=True))
+    # Nothing used the status column before, make sure existing changes are picked up
+    op.execute(sa.text('UPDATE "RoleChangeQueue" SET status = 0'))
+    op.create_index('ix_RoleChangeQueue_status_date_available', 'RoleChangeQueue', ['status', 'date_available'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_RoleChangeQueue_status_date_available', table_name='RoleChangeQueue')
+    op.drop_column('RoleChangeQueue', 'last_error')
+    op.drop_column('RoleChangeQueue', 'date_claimed')
+    op.drop_column('RoleChangeQueue', 'date_available')
+    op.drop_column('RoleChangeQueue', 'attempts')
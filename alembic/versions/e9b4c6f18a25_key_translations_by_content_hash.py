@@ -0,0 +1,40 @@
+"""Key translations by content hash
+
+Revision ID: e9b4c6f18a25
+Revises: c7a2e94d1b3f
+Create Date: 2026-10-18 21:27:53.640112
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e9b4c6f18a25'
+down_revision = 'c7a2e94d1b3f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('Translations', sa.Column('content_hash', sa.LargeBinary(), nullable=True))
+    # Same normalization as normalize_translation_content, lowercased with whitespace collapsed
+    op.execute(sa.text("""
+        UPDATE "Translations"
+        SET content_hash = sha256(convert_to(lower(btrim(regexp_replace(original_content, '\\s+', ' ', 'g'))), 'UTF8'))
+    """))
+    # Only keep the oldest translation of the same content
+    op.execute(sa.text("""
+        DELETE FROM "Translations" t
+        USING "Translations" older
+        WHERE t.content_hash = older.content_hash AND t.id > older.id
+    """))
+    op.alter_column('Translations', 'content_hash', nullable=False)
+    op.create_index('ix_Translations_content_hash', 'Translations', ['content_hash'], unique=True)
+    op.drop_index('ix_Translations_original_content', table_name='Translations')
+
+
+def downgrade() -> None:
+    op.create_index('ix_Translations_original_content', 'Translations', ['original_content'], unique=False, postgresql_using='hash')
+    op.drop_index('ix_Translations_content_hash', table_name='Translations')
+    op.drop_column('Translations', 'content_hash')
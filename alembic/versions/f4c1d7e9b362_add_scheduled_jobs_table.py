@@ -0,0 +1,49 @@
+"""Add ScheduledJobs table
+
+Revision ID: f4c1d7e9b362
+Revises: e2f7b8c3a915
+Create Date: 2026-10-18 16:05:31.772410
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4c1d7e9b362'
+down_revision = 'e2f7b8c3a915'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('ScheduledJobs',
+    sa.Column('id', sa.BigInteger(), nullable=False),
+    sa.Column('job_type', sa.Text(), nullable=False),
+    sa.Column('ref_id', sa.BigInteger(), nullable=False),
+    sa.Column('date_due', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('date_created', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('job_type', 'ref_id', name='ScheduledJobs_job_type_ref_id_key')
+    )
+    op.create_index('ix_ScheduledJobs_date_due', 'ScheduledJobs', ['date_due'], unique=False)
+
+    # Schedule everything that the polling loops used to pick up
+    op.execute(sa.text(
+        """
+        INSERT INTO "ScheduledJobs" (job_type, ref_id, date_due, date_created)
+        SELECT 'reminder', id, date_remind, now() FROM "Reminders"
+        UNION ALL
+        SELECT 'expiring_thread', id, expiration_date, now() FROM "ExpiringThreads"
+        UNION ALL
+        SELECT 'punishment_expiry', id, expire_date, now() FROM "Punishments"
+        WHERE expire_date IS NOT NULL AND handled = false AND visible = true
+          AND type IN ('ban', 'jail', 'timeout')
+        """
+    ))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_ScheduledJobs_date_due', table_name='ScheduledJobs')
+    op.drop_table('ScheduledJobs')
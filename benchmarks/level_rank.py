@@ -0,0 +1,103 @@
+"""
+Compares latency of the previous window function based rank lookup with the
+index backed count lookup used by UserLevels.calculate_rank.
+
+The benchmark creates a temporary table in the database pointed to by the
+POSTGRES_DSN environment variable (or DB_USER, DB_PASSWORD and DB_HOST),
+so it does not touch any existing data.
+
+Usage:
+    python benchmarks/level_rank.py [--sizes 10000 100000 1000000] [--samples 50]
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+
+from pathlib import Path
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
+
+sys.path.append(str(Path(__file__).parents[1]))
+
+from pidroid.main import get_postgres_dsn # noqa: E402
+
+GUILD_ID = 1
+
+WINDOW_RANK_QUERY = text("""
+    SELECT rank FROM (
+        SELECT user_id, rank() OVER (ORDER BY total_xp DESC) AS rank
+        FROM bench_user_levels
+        WHERE guild_id = :guild_id
+    ) ranked
+    WHERE user_id = :user_id
+""")
+
+COUNT_RANK_QUERY = text("""
+    SELECT count(*) + 1
+    FROM bench_user_levels
+    WHERE guild_id = :guild_id AND total_xp > :total_xp
+""")
+
+async def seed(conn: AsyncConnection, size: int) -> None:
+    """Creates and fills the temporary benchmark table."""
+    _ = await conn.execute(text("DROP TABLE IF EXISTS bench_user_levels"))
+    _ = await conn.execute(text("""
+        CREATE TEMPORARY TABLE bench_user_levels (
+            id BIGSERIAL PRIMARY KEY,
+            guild_id BIGINT NOT NULL,
+            user_id BIGINT NOT NULL,
+            total_xp BIGINT NOT NULL
+        )
+    """))
+    # Rows of a second guild make sure that the guild filter is exercised
+    _ = await conn.execute(
+        text("""
+            INSERT INTO bench_user_levels (guild_id, user_id, total_xp)
+            SELECT CASE WHEN i % 10 = 0 THEN 2 ELSE :guild_id END, i, floor(random() * 5000000)::bigint
+            FROM generate_series(1, :size) AS i
+        """),
+        {"guild_id": GUILD_ID, "size": size}
+    )
+    _ = await conn.execute(text(
+        "CREATE INDEX ON bench_user_levels (guild_id, total_xp DESC)"
+    ))
+    _ = await conn.execute(text("ANALYZE bench_user_levels"))
+
+async def measure(conn: AsyncConnection, query, params: list[dict[str, int]]) -> tuple[float, float]:
+    """Returns median and 95th percentile latency of the query in milliseconds."""
+    timings: list[float] = []
+    for param in params:
+        start = time.perf_counter()
+        _ = await conn.execute(query, param)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.95) - 1]
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmarks level rank lookups.")
+    _ = parser.add_argument("--sizes", nargs="+", type=int, default=[10_000, 100_000, 1_000_000])
+    _ = parser.add_argument("--samples", type=int, default=50)
+    args = parser.parse_args()
+
+    engine = create_async_engine(get_postgres_dsn())
+    async with engine.connect() as conn:
+        print(f"{'rows':>10} | {'window p50':>10} | {'window p95':>10} | {'count p50':>10} | {'count p95':>10}")
+        for size in args.sizes:
+            await seed(conn, size)
+            result = await conn.execute(
+                text("SELECT user_id, total_xp FROM bench_user_levels WHERE guild_id = :guild_id"),
+                {"guild_id": GUILD_ID}
+            )
+            members = random.sample(result.fetchall(), args.samples)
+            window = await measure(conn, WINDOW_RANK_QUERY, [{"guild_id": GUILD_ID, "user_id": m[0]} for m in members])
+            count = await measure(conn, COUNT_RANK_QUERY, [{"guild_id": GUILD_ID, "total_xp": m[1]} for m in members])
+            print(f"{size:>10,} | {window[0]:>8.2f}ms | {window[1]:>8.2f}ms | {count[0]:>8.2f}ms | {count[1]:>8.2f}ms")
+            await conn.rollback()
+    await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,78 @@
+"""
+Compares memory usage and lookup speed of the previous UserBucket based XP
+cooldown storage with MemberCooldowns.
+
+Both are filled with the specified amount of distinct users on a cooldown.
+Unlike UserBucket storage, MemberCooldowns is also swept every minute, so in
+practice it only holds members who earned XP within the last minute.
+
+Usage:
+    python benchmarks/xp_cooldowns.py [--users 1000000] [--guilds 10]
+"""
+
+import argparse
+import datetime
+import gc
+import sys
+import time
+import tracemalloc
+
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parents[1]))
+
+from pidroid.utils.cooldowns import MemberCooldowns # noqa: E402
+
+class UserBucket:
+    """The cooldown bucket previously used by the leveling service."""
+
+    def __init__(self, user_id: int) -> None:
+        super().__init__()
+        self.__id = user_id
+        self.__last_earned = datetime.datetime.fromtimestamp(0, tz=datetime.UTC)
+
+    @property
+    def can_earn(self) -> bool:
+        return (datetime.datetime.now(tz=datetime.UTC).timestamp() - self.__last_earned.timestamp()) >= 60
+
+    def cooldown(self) -> None:
+        self.__last_earned = datetime.datetime.now(tz=datetime.UTC)
+
+def fill_buckets(users: int, guilds: int) -> dict[int, dict[int, UserBucket]]:
+    storage: dict[int, dict[int, UserBucket]] = {}
+    for user_id in range(users):
+        guild = storage.setdefault(user_id % guilds, {})
+        bucket = guild.setdefault(user_id, UserBucket(user_id))
+        if bucket.can_earn:
+            bucket.cooldown()
+    return storage
+
+def fill_cooldowns(users: int, guilds: int) -> MemberCooldowns:
+    store = MemberCooldowns(60)
+    for user_id in range(users):
+        _ = store.try_acquire(user_id % guilds, user_id)
+    return store
+
+def measure(name: str, fill, users: int, guilds: int) -> None:
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    storage = fill(users, guilds)
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:>16} | {current / 1024 ** 2:>9.1f} MiB | {current / users:>7.1f} B/user | {elapsed:>6.2f}s")
+    del storage
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmarks XP cooldown storage.")
+    _ = parser.add_argument("--users", type=int, default=1_000_000)
+    _ = parser.add_argument("--guilds", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'storage':>16} | {'memory':>13} | {'per user':>12} | {'fill':>7}")
+    measure("UserBucket", fill_buckets, args.users, args.guilds)
+    measure("MemberCooldowns", fill_cooldowns, args.users, args.guilds)
+
+if __name__ == "__main__":
+    main()
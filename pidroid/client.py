@@ -14,7 +14,7 @@ from discord.guild import Guild
 from discord.mentions import AllowedMentions
 from discord.message import Message
 from discord.utils import MISSING
-from typing import TYPE_CHECKING, Any, NamedTuple
+from typing import TYPE_CHECKING, Any, Awaitable, Iterable, NamedTuple, TypeVar
 from typing_extensions import override
 
 from pidroid.models.categories import Category, register_categories
@@ -23,14 +23,20 @@ from pidroid.models.guild_configuration import GuildConfiguration
 from pidroid.models.persistent_views import PersistentSuggestionManagementView
 from pidroid.models.punishments import Case, PunishmentType
 from pidroid.models.queue import AbstractMessageQueue, EmbedMessageQueue, MessageQueue
+from pidroid.models.scheduler import JobScheduler
+from pidroid.models.xp_ledger import XPLedger
 from pidroid.utils.api import API
+from pidroid.utils.cache import CacheStatistics, TTLCache
 from pidroid.utils.checks import is_client_pidroid
 
 if TYPE_CHECKING:
+    from discord.abc import GuildChannel, PrivateChannel
     from discord.types.threads import ThreadArchiveDuration
 
 logger = logging.getLogger("Pidroid")
 
+T = TypeVar('T')
+
 class VersionInfo(NamedTuple):
     major: int
     minor: int
@@ -40,6 +46,20 @@ class VersionInfo(NamedTuple):
 def _is_theotown_service(service: str):
     return service.startswith("services.theotown")
 
+async def _none_if_not_found(request: Awaitable[T]) -> T | None:
+    """Returns the result of the API request, or None if the requested object does not exist."""
+    try:
+        return await request
+    except discord.NotFound:
+        return None
+
+
+# How many objects fetched over the API are kept by each cache
+FETCH_CACHE_SIZE = 10_000
+# How long objects fetched over the API are kept, in seconds
+FETCH_CACHE_TTL = 15 * 60
+# How long objects which were not found over the API are remembered as missing, in seconds
+FETCH_CACHE_NEGATIVE_TTL = 60 * 60
 
 __VERSION__ = VersionInfo(major=5, minor=19, micro=0, commit_id=os.environ.get('GIT_COMMIT', ''))
 
@@ -116,8 +136,8 @@ class Pidroid(commands.Bot):
         ]
 
         # This holds cached guild configurations
-        self._guild_prefix_cache_ready = asyncio.Event()
-        self.__cached_guild_prefixes: dict[int, list[str]] = {}
+        self._guild_configuration_cache_ready = asyncio.Event()
+        self.__cached_guild_configurations: dict[int, GuildConfiguration] = {}
 
         self.client_version = __VERSION__
 
@@ -129,7 +149,18 @@ class Pidroid(commands.Bot):
 
         self.api = API(self, self.config["postgres_dsn"])
 
+        # This holds XP awards which are yet to be written to the database
+        self.xp_ledger = XPLedger(self.api)
+
+        # This runs reminders, thread archival and other jobs at their due dates
+        self.scheduler = JobScheduler(self)
+
         self.__queues: dict[int, AbstractMessageQueue] = {}
+        # Objects that are not in the gateway cache, but were looked up over the API
+        self.__fetched_users: TTLCache[int, discord.User] = self.__create_fetch_cache()
+        self.__fetched_members: TTLCache[tuple[int, int], discord.Member] = self.__create_fetch_cache()
+        self.__fetched_guild_channels: TTLCache[tuple[int, int], GuildChannel | discord.Thread] = self.__create_fetch_cache()
+        self.__fetched_channels: TTLCache[int, GuildChannel | PrivateChannel | discord.Thread] = self.__create_fetch_cache()
         self.__tasks: list[tasks.Loop] = []
 
     @override
@@ -137,6 +168,7 @@ class Pidroid(commands.Bot):
         await self.api.connect()
         await self.load_cogs()
         self.add_persistent_views()
+        self.scheduler.start()
 
     def add_persistent_views(self):
         """Adds persistent views that do not timeout."""
@@ -171,19 +203,24 @@ class Pidroid(commands.Bot):
         It also waits for internal bot cache to be ready, therefore calling client.wait_until_ready()
         is no longer needed.
         """
-        _ = await self._guild_prefix_cache_ready.wait()
+        _ = await self._guild_configuration_cache_ready.wait()
 
     @override
     async def wait_until_ready(self) -> None:
         await super().wait_until_ready()
 
     async def fetch_guild_configuration(self, guild_id: int) -> GuildConfiguration:
-        """Returns the latest available guild configuration from the database.
+        """Returns the guild configuration for the specified guild.
 
-        If there was no guild configuration found, new configuration will be created and returned.
+        The configuration is served from the internal cache if available, otherwise
+        it is fetched from the database and cached.
 
-        The internal guild configuration is also updated.
+        If there was no guild configuration found, new configuration will be created and returned.
         """
+        config = self.__cached_guild_configurations.get(guild_id)
+        if config is not None:
+            return config
+
         config = await self.api.fetch_guild_configuration(guild_id)
         if config is None:
             logger.warning(
@@ -191,22 +228,28 @@ class Pidroid(commands.Bot):
                 guild_id
             )
             config = await self.api.insert_guild_configuration(guild_id)
-        self.update_guild_prefixes_from_config(guild_id, config)
+        return self.cache_guild_configuration(config)
+
+    def get_guild_configuration(self, guild_id: int) -> GuildConfiguration | None:
+        """Returns guild configuration from internal cache."""
+        return self.__cached_guild_configurations.get(guild_id)
+
+    def cache_guild_configuration(self, config: GuildConfiguration) -> GuildConfiguration:
+        """Stores the guild configuration in the internal cache and returns it."""
+        self.__cached_guild_configurations[config.guild_id] = config
         return config
-    
+
+    def remove_guild_configuration(self, guild_id: int) -> None:
+        """Removes guild configuration from internal cache."""
+        _ = self.__cached_guild_configurations.pop(guild_id, None)
+
     def get_guild_prefixes(self, guild_id: int) -> list[str] | None:
         """Returns guild prefixes from internal cache."""
-        return self.__cached_guild_prefixes.get(guild_id)
-
-    def update_guild_prefixes_from_config(self, guild_id: int, config: GuildConfiguration) -> list[str]:
-        """Updates guild prefixes in the internal cache and returns the prefix list."""
-        self.__cached_guild_prefixes[guild_id] = config.prefixes
+        config = self.__cached_guild_configurations.get(guild_id)
+        if config is None:
+            return None
         return config.prefixes
 
-    def remove_guild_prefixes(self, guild_id: int) -> None:
-        """Removes guild prefixes from internal cache."""
-        _ = self.__cached_guild_prefixes.pop(guild_id)
-
     async def create_expiring_thread(self, message: Message, name: str, expire_timestamp: datetime.datetime, auto_archive_duration: ThreadArchiveDuration = 60):
         """Creates a new expiring thread"""
         thread = await message.create_thread(name=name, auto_archive_duration=auto_archive_duration)
@@ -226,22 +269,34 @@ class Pidroid(commands.Bot):
 
     async def fetch_warnings(self, guild_id: int, user_id: int) -> list[Case]:
         """Returns a list of warning cases for specified guild and user."""
-        return [c for c in await self.fetch_cases(guild_id, user_id) if c.type == PunishmentType.warning]
+        return await self.api._fetch_cases(guild_id, user_id, type=PunishmentType.warning)
 
     async def fetch_active_warnings(self, guild_id: int, user_id: int) -> list[Case]:
         """Returns a list of active warning cases for specified guild and user."""
-        return [
-            c
-            for c in await self.fetch_cases(guild_id, user_id)
-            if c.type == PunishmentType.warning and not c.has_expired
-        ]
+        return await self.api._fetch_cases(guild_id, user_id, type=PunishmentType.warning, active_only=True)
+
+    @staticmethod
+    def __create_fetch_cache() -> TTLCache[Any, Any]:
+        return TTLCache(max_size=FETCH_CACHE_SIZE, ttl=FETCH_CACHE_TTL, negative_ttl=FETCH_CACHE_NEGATIVE_TTL)
+
+    @property
+    def fetch_cache_statistics(self) -> dict[str, CacheStatistics]:
+        """Returns the statistics of the caches behind the get_or_fetch methods."""
+        return {
+            "users": self.__fetched_users.statistics,
+            "members": self.__fetched_members.statistics,
+            "guild channels": self.__fetched_guild_channels.statistics,
+            "channels": self.__fetched_channels.statistics
+        }
 
     async def get_or_fetch_member(self, guild: Guild, member_id: int) -> discord.Member | None:
         """Attempts to resolve member from member_id by any means. Returns None if everything failed."""
         member = guild.get_member(member_id)
         if member is None:
             with suppress(discord.HTTPException):
-                return await guild.fetch_member(member_id)
+                return await self.__fetched_members.get_or_load(
+                    (guild.id, member_id), lambda: _none_if_not_found(guild.fetch_member(member_id))
+                )
         return member
 
     async def get_or_fetch_user(self, user_id: int) -> discord.User | None:
@@ -249,15 +304,27 @@ class Pidroid(commands.Bot):
         user = self.get_user(user_id)
         if user is None:
             with suppress(discord.HTTPException):
-                return await self.fetch_user(user_id)
+                return await self.__fetched_users.get_or_load(
+                    user_id, lambda: _none_if_not_found(self.fetch_user(user_id))
+                )
         return user
 
+    async def get_or_fetch_users(self, user_ids: Iterable[int]) -> dict[int, discord.User]:
+        """Resolves the users from user_ids concurrently.
+
+        Returns a mapping of user IDs to users, users that could not be resolved are left out."""
+        ids = list(set(user_ids))
+        users = await asyncio.gather(*(self.get_or_fetch_user(user_id) for user_id in ids))
+        return {user_id: user for user_id, user in zip(ids, users) if user is not None}
+
     async def get_or_fetch_guild_channel(self, guild: Guild, channel_id: int):
         """Attempts to resolve guild channel from channel_id by any means. Returns None if everything failed."""
         channel = guild.get_channel(channel_id)
         if channel is None:
             with suppress(discord.HTTPException):
-                return await guild.fetch_channel(channel_id)
+                return await self.__fetched_guild_channels.get_or_load(
+                    (guild.id, channel_id), lambda: _none_if_not_found(guild.fetch_channel(channel_id))
+                )
         return channel
 
     async def get_or_fetch_channel(self, channel_id: int):
@@ -265,7 +332,9 @@ class Pidroid(commands.Bot):
         channel = self.get_channel(channel_id)
         if channel is None:
             with suppress(discord.HTTPException):
-                return await self.fetch_channel(channel_id)
+                return await self.__fetched_channels.get_or_load(
+                    channel_id, lambda: _none_if_not_found(self.fetch_channel(channel_id))
+                )
         return channel
 
 
@@ -327,6 +396,11 @@ class Pidroid(commands.Bot):
     @override
     async def close(self) -> None:
         """Called when Pidroid is being shut down."""
+        self.scheduler.stop()
+        try:
+            await self.xp_ledger.flush()
+        except Exception:
+            logger.exception("Failed to flush XP ledger on shutdown")
         await super().close()
         for task in self.__tasks:
             task.stop()
@@ -12,15 +12,40 @@ from pidroid.models.categories import LevelCategory
 from pidroid.models.view import PaginatingView
 from pidroid.services.error_handler import notify
 from pidroid.utils.aliases import DiscordUser
+from pidroid.utils.api import API
 from pidroid.utils.db.levels import UserLevels, COLOUR_BINDINGS
 from pidroid.utils.embeds import PidroidEmbed, SuccessEmbed
-from pidroid.utils.paginators import ListPageSource
+from pidroid.utils.levels import parse_xp_import
+from pidroid.utils.paginators import KeysetPageSource
 
-class LeaderboardPaginator(ListPageSource):
-    def __init__(self, data: list[UserLevels]):
-        super().__init__(data, per_page=10)
+class LeaderboardPaginator(KeysetPageSource[UserLevels, tuple[int, int]]):
+    def __init__(self, api: API, guild_id: int):
+        super().__init__(per_page=10)
+        self.__api = api
+        self.__guild_id = guild_id
         self.embed = PidroidEmbed(title='Leaderboard rankings')
 
+    @override
+    async def count_entries(self) -> int:
+        return await self.__api.count_guild_level_rankings(self.__guild_id)
+
+    @override
+    async def fetch_entries(
+        self,
+        *,
+        after: tuple[int, int] | None,
+        before: tuple[int, int] | None,
+        offset: int,
+        limit: int
+    ) -> list[UserLevels]:
+        return await self.__api.fetch_guild_level_rankings_page(
+            self.__guild_id, after=after, before=before, offset=offset, limit=limit
+        )
+
+    @override
+    def get_key(self, entry: UserLevels) -> tuple[int, int]:
+        return entry.total_xp, entry.id
+
     @override
     async def format_page(self, menu: PaginatingView, page: list[UserLevels]):
         assert isinstance(menu.ctx.bot, Pidroid)
@@ -28,11 +53,11 @@ class LeaderboardPaginator(ListPageSource):
         for i, info in enumerate(page):
             user = menu.ctx.bot.get_user(info.user_id)
             _ = self.embed.add_field(
-                name=f"{(i + 1) + self.per_page * menu.current_page}. {user if user else info.user_id} (lvl. {info.level})",
+                name=f"{(i + 1) + self.per_page * menu.current_page}. {user if user else info.user_id} (lvl. {info.progress.level})",
                 value=f'{info.total_xp:,} XP',
                 inline=False
             )
-        return self.embed
+        return self.embed.set_footer(text=f'{self.entry_count:,} ranked members')
 
 class LevelCommandCog(commands.Cog):
     """This class implements a cog for special bot owner only commands."""
@@ -73,14 +98,15 @@ class LevelCommandCog(commands.Cog):
         embed = PidroidEmbed(title=f'{escape_markdown(str(member))} rank')
         avatar = member.avatar or member.default_avatar
         _ = embed.set_thumbnail(url=avatar.url)
-        _ = embed.add_field(name='Level', value=info.level)
+        progress = info.progress
+        _ = embed.add_field(name='Level', value=progress.level)
         async with self.client.api.session() as session:
             _ = embed.add_field(name='Rank', value=f'#{await info.calculate_rank(session):,}')       
 
         # Create a progress bar
         # https://github.com/KumosLab/Discord-Levels-Bot/blob/b01e22a9213b004eed5f88d68b500f4f4cd04891/KumosLab/Database/Create/RankCard/text.py
         dashes = 10
-        current_dashes = int(info.current_xp / int(info.xp_to_next_level / dashes))
+        current_dashes = min(int(progress.current_xp / int(progress.xp_to_next_level / dashes)), dashes)
 
         # Select progress character to use
         character = info.default_progress_character
@@ -96,7 +122,7 @@ class LevelCommandCog(commands.Cog):
         remaining_prog = '⬛' * (dashes - current_dashes)
 
         _ = embed.add_field(
-            name=f'Level progress ({info.current_xp:,} / {info.xp_to_next_level:,} XP)',
+            name=f'Level progress ({progress.current_xp:,} / {progress.xp_to_next_level:,} XP)',
             value=f"{current_prog}{remaining_prog}", inline=False
         )
 
@@ -121,8 +147,7 @@ class LevelCommandCog(commands.Cog):
     async def leaderboard_command(self, ctx: Context[Pidroid]):
         assert ctx.guild is not None
         await self.assert_system_enabled(ctx.guild)
-        levels = await self.client.api.fetch_guild_level_rankings(ctx.guild.id, limit=100)
-        pages = PaginatingView(self.client, ctx, source=LeaderboardPaginator(levels))
+        pages = PaginatingView(self.client, ctx, source=LeaderboardPaginator(self.client.api, ctx.guild.id))
         await pages.send()
 
     @commands.hybrid_group(
@@ -254,5 +279,71 @@ class LevelCommandCog(commands.Cog):
                 return await notify(ctx, "Please specify the theme you want to set.")
         setattr(error, 'unhandled', True)
 
+    async def _after_bulk_level_change(self, guild: Guild) -> None:
+        """Invalidates cached member levels and requests a single level reward sync for the guild."""
+        self.client.xp_ledger.invalidate(guild.id)
+        self.client.dispatch("pidroid_guild_levels_change", guild)
+
+    @commands.command(
+        name="level-import",
+        brief="Imports member total XP from an attached CSV or JSON file.",
+        usage="<attachment>",
+        category=LevelCategory,
+        hidden=True
+    )
+    @commands.guild_only()
+    @commands.has_permissions(administrator=True)
+    @commands.bot_has_permissions(send_messages=True)
+    async def level_import_command(self, ctx: Context[Pidroid]):
+        assert ctx.guild is not None
+        await self.assert_system_enabled(ctx.guild)
+
+        if not ctx.message.attachments:
+            raise BadArgument("Please attach a CSV or JSON file containing user IDs and their total XP.")
+
+        attachment = ctx.message.attachments[0]
+        file_format = attachment.filename.rsplit(".", 1)[-1].lower()
+        if file_format not in ("csv", "json"):
+            raise BadArgument("Only CSV and JSON files can be imported.")
+
+        data = await attachment.read()
+        try:
+            user_ids, total_xp = parse_xp_import(
+                data.decode("utf-8-sig").splitlines(), file_format=file_format
+            )
+        except (UnicodeDecodeError, ValueError) as e:
+            raise BadArgument(f"Could not read the import file: {e}")
+
+        # Make sure that no buffered XP awards are written on top of older values
+        await self.client.xp_ledger.flush()
+        count = await self.client.api.import_member_levels(ctx.guild.id, user_ids, total_xp)
+        await self._after_bulk_level_change(ctx.guild)
+        return await ctx.reply(embed=SuccessEmbed(
+            f'Imported levels for {count:,} members! Please note that it will take some time for level rewards to update.'
+        ))
+
+    @commands.command(
+        name="level-recompute",
+        brief="Recomputes levels of every member, optionally scaling their total XP.",
+        usage="[XP scale]",
+        category=LevelCategory,
+        hidden=True
+    )
+    @commands.guild_only()
+    @commands.has_permissions(administrator=True)
+    @commands.bot_has_permissions(send_messages=True)
+    async def level_recompute_command(self, ctx: Context[Pidroid], xp_scale: float = 1.0):
+        assert ctx.guild is not None
+        await self.assert_system_enabled(ctx.guild)
+        if xp_scale <= 0:
+            raise BadArgument("XP scale must be greater than 0.")
+
+        await self.client.xp_ledger.flush()
+        count = await self.client.api.recompute_guild_levels(ctx.guild.id, xp_scale)
+        await self._after_bulk_level_change(ctx.guild)
+        return await ctx.reply(embed=SuccessEmbed(
+            f'Recomputed levels for {count:,} members! Please note that it will take some time for level rewards to update.'
+        ))
+
 async def setup(client: Pidroid) -> None:
     await client.add_cog(LevelCommandCog(client))
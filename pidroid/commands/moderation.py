@@ -4,7 +4,9 @@ import asyncio
 import datetime
 import discord
 import logging
+import time
 
+from contextlib import suppress
 from datetime import timedelta
 from dateutil.relativedelta import relativedelta
 from discord import ui, ButtonStyle, Interaction, app_commands, Member, Message, RawMessageDeleteEvent
@@ -19,12 +21,12 @@ from discord.partial_emoji import PartialEmoji
 from discord.role import Role
 from discord.user import User
 from discord.utils import escape_markdown, get
-from typing import TYPE_CHECKING, Any, Self, TypedDict, override
+from typing import TYPE_CHECKING, Annotated, Any, Self, Sequence, TypedDict, override
 
 from pidroid.client import Pidroid
 from pidroid.models.categories import ModerationCategory
 from pidroid.models.exceptions import InvalidDuration, MissingUserPermissions
-from pidroid.models.punishments import Ban, BasePunishment, Kick, Timeout, Jail, Warning
+from pidroid.models.punishments import MAX_REASON_LENGTH, Ban, BasePunishment, Kick, MassBan, Timeout, Jail, Warning
 from pidroid.services.error_handler import notify
 from pidroid.models.view import BaseView, PidroidModal
 from pidroid.utils import user_mention
@@ -34,6 +36,7 @@ from pidroid.utils.checks import (
     assert_junior_moderator_permissions, assert_normal_moderator_permissions, assert_senior_moderator_permissions,
     is_guild_moderator, is_guild_theotown
 )
+from pidroid.utils.converters import DurationDelta
 from pidroid.utils.decorators import command_checks
 from pidroid.utils.file import Resource
 from pidroid.utils.time import delta_to_datetime, try_convert_duration_to_relativedelta, utcnow
@@ -42,6 +45,11 @@ logger = logging.getLogger("Pidroid")
 
 BUNNY_ID = 793465265237000212
 
+# How many users can be banned with a single mass ban
+MAX_MASS_BAN_USERS = 1000
+# Minimum amount of seconds between mass ban progress message updates
+MASS_BAN_PROGRESS_INTERVAL = 2.0
+
 class ReasonModal(PidroidModal, title='Custom reason modal'):
     reason_input: ui.TextInput[ModerationMenu] = ui.TextInput(label="Reason", placeholder="Please provide the reason")
 
@@ -957,6 +965,129 @@ class ModerationCommandCog(commands.Cog):
         await t.issue()
         await ctx.reply(embed=t.public_message_issue_embed)
 
+    async def _mass_ban(self, ctx: Context[Pidroid], targets: Sequence[Member | discord.Object], reason: str | None) -> None:
+        """Bans the targets that can be punished and reports the progress in a single message."""
+        assert ctx.guild
+        assert isinstance(ctx.message.author, Member)
+        author = ctx.message.author
+
+        if reason and len(reason) > MAX_REASON_LENGTH:
+            raise BadArgument(f"Your reason is too long. Please make sure it's below or equal to {MAX_REASON_LENGTH} characters!")
+
+        conf = await self.client.fetch_guild_configuration(ctx.guild.id)
+
+        users: dict[int, str | None] = {}
+        skipped = 0
+        for target in targets:
+            if target.id in users:
+                continue
+
+            if target.id in (author.id, ctx.guild.me.id) or self.is_semaphore_locked(ctx.guild.id, target.id):
+                skipped += 1
+                continue
+
+            member = target if isinstance(target, Member) else ctx.guild.get_member(target.id)
+            if member is None:
+                user = self.client.get_user(target.id)
+                users[target.id] = None if user is None else str(user)
+                continue
+
+            if (
+                member.bot
+                or (is_guild_moderator(member) and not conf.allow_to_punish_moderators)
+                or member.top_role >= ctx.guild.me.top_role
+                or member.top_role >= author.top_role
+            ):
+                skipped += 1
+                continue
+            users[member.id] = str(member)
+
+        if not users:
+            raise BadArgument("None of the specified users can be banned!")
+
+        if len(users) > MAX_MASS_BAN_USERS:
+            raise BadArgument(f"I can only ban up to {MAX_MASS_BAN_USERS:,} users at once!")
+
+        mass_ban = MassBan(
+            self.client.api, ctx.guild,
+            moderator=author, users=list(users.items()), reason=reason
+        )
+
+        def progress_message(mass_ban: MassBan) -> str:
+            message = f"Banned {mass_ban.banned_count:,} out of {mass_ban.total:,} users"
+            if mass_ban.failed_count:
+                message += f", {mass_ban.failed_count:,} could not be banned"
+            if skipped:
+                message += f", {skipped:,} were skipped as they cannot be punished"
+            return message
+
+        message = await ctx.reply(progress_message(mass_ban))
+        last_update = time.monotonic()
+
+        async def on_progress(mass_ban: MassBan) -> None:
+            nonlocal last_update
+            now = time.monotonic()
+            if now - last_update < MASS_BAN_PROGRESS_INTERVAL:
+                return
+            last_update = now
+            with suppress(discord.HTTPException):
+                _ = await message.edit(content=progress_message(mass_ban) + "...")
+
+        cases = await mass_ban.issue(on_progress=on_progress)
+        content = progress_message(mass_ban) + "."
+        if cases:
+            content += f"\nCreated cases #{cases[0].case_id} to #{cases[-1].case_id}."
+        with suppress(discord.HTTPException):
+            _ = await message.edit(content=content)
+
+    @commands.group(
+        name="mass-ban",
+        brief="Bans multiple users at once, meant for dealing with raids. Users are not notified about the ban.",
+        usage="<users...> [reason]",
+        category=ModerationCategory,
+        invoke_without_command=True
+    )
+    @commands.bot_has_permissions(ban_members=True, send_messages=True)
+    @command_checks.is_senior_moderator(ban_members=True)
+    @commands.guild_only()
+    async def mass_ban_command(
+        self,
+        ctx: Context[Pidroid],
+        users: commands.Greedy[discord.Object],
+        *,
+        reason: str | None = None
+    ):
+        if ctx.invoked_subcommand is None:
+            if not users:
+                raise BadArgument("Please specify the users you are trying to ban!")
+            await self._mass_ban(ctx, users, reason)
+
+    @mass_ban_command.command(
+        name="joined",
+        brief="Bans every member who joined within the specified duration, meant for dealing with raids.",
+        usage="<duration> [reason]",
+        category=ModerationCategory
+    )
+    @commands.bot_has_permissions(ban_members=True, send_messages=True)
+    @command_checks.is_senior_moderator(ban_members=True)
+    @commands.guild_only()
+    async def mass_ban_joined_command(
+        self,
+        ctx: Context[Pidroid],
+        duration: Annotated[relativedelta, DurationDelta],
+        *,
+        reason: str | None = None
+    ):
+        assert ctx.guild
+        joined_after = utcnow() - duration
+        members: list[Member | discord.Object] = [
+            m for m in ctx.guild.members
+            if m.joined_at is not None and m.joined_at >= joined_after
+        ]
+        if not members:
+            raise BadArgument("No members joined within the specified duration!")
+        await self._mass_ban(ctx, members, reason)
+
     @commands.command(
         name="punish-bunny",
         brief='Bans (times out) bunny for 4 weeks.',
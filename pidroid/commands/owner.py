@@ -105,6 +105,21 @@ class OwnerCommandCog(commands.Cog):
             f"Displaying values stored in persistent data store:\n\n{string.strip()}"
         )
 
+    @commands.command(
+        name="show-fetch-cache-statistics",
+        category=OwnerCategory,
+        hidden=True
+    )
+    @commands.is_owner()
+    @commands.bot_has_permissions(send_messages=True)
+    async def show_fetch_cache_statistics_command(self, ctx: Context[Pidroid]):
+        string = ""
+        for name, stats in self.client.fetch_cache_statistics.items():
+            string += f"{name}: {stats.hits:,} hits, {stats.misses:,} misses ({stats.hit_ratio:.1%}), {stats.size:,} cached\n"
+        return await ctx.reply(
+            f"Displaying statistics of the API fetch caches:\n\n{string.strip()}"
+        )
+
     @commands.command(
         name="set-data-store",
         category=OwnerCategory,
@@ -18,12 +18,14 @@ from pidroid.utils.embeds import PidroidEmbed, SuccessEmbed
 from pidroid.utils.paginators import ListPageSource
 
 ALLOWED_MENTIONS = AllowedMentions(everyone=False, users=False, roles=False, replied_user=False)
+# How much better the best matching tag has to score than the next one to be shown right away
+CONFIDENT_MATCH_MARGIN = 0.15
 
 if TYPE_CHECKING:
     from pidroid.client import Pidroid
 
 class TagListPaginator(ListPageSource):
-    def __init__(self, title: str, data: list[Tag]):
+    def __init__(self, title: str, data: list[str]):
         super().__init__(data, per_page=20)
         self.embed = PidroidEmbed(title=title)
 
@@ -34,11 +36,11 @@ class TagListPaginator(ListPageSource):
             _ = self.embed.set_footer(text=f"{amount} tags")
 
     @override
-    async def format_page(self, menu: PaginatingView, page: list[Tag]):
+    async def format_page(self, menu: PaginatingView, page: list[str]):
         offset = menu._current_page * self.per_page + 1
         values = ""
-        for i, item in enumerate(page):
-            values += f"{i + offset}. {item.name}\n"
+        for i, name in enumerate(page):
+            values += f"{i + offset}. {name}\n"
         self.embed.description = values.strip()
         return self.embed
 
@@ -57,17 +59,6 @@ class TagCommandCog(commands.Cog):
             raise BadArgument("I couldn't find any tags matching that name!")
         return tag
 
-    async def find_tags(self, ctx: Context[Pidroid], tag_name: str) -> list[Tag]:
-        """Returns a list of tags matching the specified tag name using the context."""
-        if len(tag_name) < 3:
-            raise BadArgument("Query term is too short! Please keep it above 2 characters!")
-
-        assert ctx.guild is not None
-        tag_list = await self.client.api.search_guild_tags(ctx.guild.id, tag_name)
-        if len(tag_list) == 0:
-            raise BadArgument("I couldn't find any tags matching that name!")
-        return tag_list
-
     async def resolve_attachments(self, message: Message) -> str | None:
         """Returns attachment URL from the message. None if there are no attachments.
         
@@ -97,25 +88,29 @@ class TagCommandCog(commands.Cog):
     @commands.guild_only()
     async def tag_command(self, ctx: Context[Pidroid], *, tag_name: str):
         if ctx.invoked_subcommand is None:
-            tag_list = await self.find_tags(ctx, tag_name)
-            assert tag_name is not None
-
-            if len(tag_list) == 1:
-                message_content = tag_list[0].content
-
-            else:            
-                found = False
-                for tag in tag_list:
-                    if tag.name.lower() == tag_name.lower():
-                        message_content = tag.content
-                        found = True
-                        break
-
-                if not found:
-                    source = TagListPaginator(f"Tags matching your query", tag_list)
+            assert ctx.guild is not None
+            # Tags are looked up in the in-memory name index, without a database round-trip
+            index = await self.client.api.fetch_guild_tag_index(ctx.guild.id)
+            row_id = index.get(tag_name)
+            if row_id is None:
+                matches = index.search(tag_name)
+                if len(matches) == 0:
+                    raise BadArgument("I couldn't find any tags matching that name!")
+
+                # Show the best match only if it clearly stands out from the rest
+                if len(matches) == 1 or matches[0].score - matches[1].score >= CONFIDENT_MATCH_MARGIN:
+                    row_id = matches[0].row_id
+                else:
+                    names = [name for name in (index.get_name(match.row_id) for match in matches) if name is not None]
+                    source = TagListPaginator(f"Tags matching your query", names)
                     view = PaginatingView(self.client, ctx, source=source)
                     return await view.send()
 
+            tag = await self.client.api.fetch_tag(row_id)
+            if tag is None:
+                raise BadArgument("I couldn't find any tags matching that name!")
+            message_content = tag.content
+
             if ctx.message.reference and ctx.message.reference.message_id:
                 message = await ctx.channel.fetch_message(ctx.message.reference.message_id)
                 return await message.reply(
@@ -134,7 +129,8 @@ class TagCommandCog(commands.Cog):
     @commands.guild_only()
     async def tag_list_command(self, ctx: Context[Pidroid]):
         assert ctx.guild is not None
-        guild_tags = await self.client.api.fetch_guild_tags(ctx.guild.id)
+        index = await self.client.api.fetch_guild_tag_index(ctx.guild.id)
+        guild_tags = index.names
         if len(guild_tags) == 0:
             raise BadArgument("This server has no defined tags!")
 
@@ -69,7 +69,7 @@ def get_postgres_dsn() -> str:
         postgres_dsn = "postgresql+asyncpg://{}:{}@{}".format(user, password, host)
     return postgres_dsn
 
-def config_from_env() -> dict[str, list[str] | str | bool | None]:
+def config_from_env() -> dict[str, list[str] | str | int | bool | None]:
 
     if os.environ.get("TOKEN", None) is None:
         exit("No bot token was specified. Please specify it using the TOKEN environment variable.")
@@ -95,6 +95,7 @@ def config_from_env() -> dict[str, list[str] | str | bool | None]:
 
         "tt_api_key": os.environ.get("TT_API_KEY"),
         "deepl_api_key": os.environ.get("DEEPL_API_KEY"),
+        "deepl_max_concurrent_requests": int(os.environ.get("DEEPL_MAX_CONCURRENT_REQUESTS") or 2),
         "tenor_api_key": os.environ.get("TENOR_API_KEY"),
         "unbelievaboat_api_key": os.environ.get("UNBELIEVABOAT_API_KEY")
     }
@@ -90,6 +90,18 @@ class GuildConfiguration:
         )
 
     async def _update(self) -> None:
+        """Writes the current state to the database and the client guild configuration cache.
+
+        If the database write fails, the cached configuration is invalidated so that
+        the next fetch reloads it from the database."""
+        try:
+            await self._write()
+        except Exception:
+            self.api.client.remove_guild_configuration(self.__guild_id)
+            raise
+        _ = self.api.client.cache_guild_configuration(self)
+
+    async def _write(self) -> None:
         await self.api._update_guild_configuration(
             self.__id,
 
@@ -190,13 +202,10 @@ class GuildConfiguration:
         if stack_level_rewards is not MISSING:
             self.api.client.dispatch("pidroid_level_stacking_change", self.guild)
 
-        # Update guild prefixes
-        if prefixes is not MISSING:
-            self.api.client.update_guild_prefixes_from_config(self.guild_id, self)
-
     async def delete(self) -> None:
         """Deletes the current guild configuration from the database."""
         await self.api.delete_guild_configuration(self.__id)
+        self.api.client.remove_guild_configuration(self.__guild_id)
     
     @property
     def prefixes(self) -> list[str]:
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import datetime
 import discord
 
@@ -9,7 +10,7 @@ from discord import Embed, File, Guild, Member, Role, User
 from discord.ext.commands import BadArgument
 from discord.utils import format_dt
 from enum import Enum
-from typing import TYPE_CHECKING, Optional, Union
+from typing import TYPE_CHECKING, Awaitable, Callable, Optional, Union
 
 from pidroid.utils import try_message_user
 from pidroid.utils.aliases import MessageableGuildChannel
@@ -24,6 +25,8 @@ if TYPE_CHECKING:
     Length = Union[timedelta, relativedelta]
 
 MAX_REASON_LENGTH = 512
+# How many bans are issued at the same time during a mass ban
+MASS_BAN_CONCURRENCY = 5
 
 class PunishmentType(Enum):
     ban = "ban"
@@ -34,6 +37,9 @@ class PunishmentType(Enum):
     mute = "mute" # Backwards compatibility
     unknown = "unknown"
 
+# Values of punishment types which are handled by Pidroid once they expire
+EXPIRING_PUNISHMENT_TYPES = (PunishmentType.ban.value, PunishmentType.jail.value, PunishmentType.timeout.value)
+
 class Case:
 
     if TYPE_CHECKING:
@@ -61,7 +67,7 @@ class Case:
     def __init__(self, api: API) -> None:
         self.__api = api
 
-    async def _from_table(self, data: PunishmentTable):
+    def _from_table(self, data: PunishmentTable):
         self.__id = data.id
         self.__case_id = data.case_id
         self.__type = PunishmentType[data.type]
@@ -73,8 +79,9 @@ class Case:
         self.__user_name = data.user_name
         self.__moderator_name = data.moderator_name
 
-        self.__user = await self.__api.client.get_or_fetch_user(self.__user_id)
-        self.__moderator = await self.__api.client.get_or_fetch_user(self.__moderator_id)
+        # Users are only resolved if their names were not saved, see API._build_cases
+        self.__user = None
+        self.__moderator = None
 
         self.__reason = data.reason
         self.__date_issued = data.issue_date
@@ -83,14 +90,39 @@ class Case:
         self.__visible = data.visible
         self.__handled = data.handled
 
+    @property
+    def _unresolved_user_ids(self) -> set[int]:
+        """Returns the IDs of users whose names were not saved with the case."""
+        ids: set[int] = set()
+        if self.__user_name is None:
+            ids.add(self.__user_id)
+        if self.__moderator_name is None:
+            ids.add(self.__moderator_id)
+        return ids
+
+    def _set_resolved_users(self, users: dict[int, User]) -> None:
+        """Sets the user objects from the specified user ID to user mapping."""
+        self.__user = users.get(self.__user_id)
+        self.__moderator = users.get(self.__moderator_id)
+
     async def _update(self) -> None:
         await self.__api.update_case_by_internal_id(self.__id, self.__reason, self.__date_expires, self.__visible, self.__handled)
 
+    @property
+    def internal_id(self) -> int:
+        """Returns the database row ID of the case."""
+        return self.__id
+
     @property
     def case_id(self) -> int:
         """Returns the ID of the case."""
         return self.__case_id
 
+    @property
+    def guild_id(self) -> int:
+        """Returns the ID of the guild the case belongs to."""
+        return self.__guild_id
+
     @property
     def type(self) -> PunishmentType:
         """Returns the type of the punishment."""
@@ -112,7 +144,8 @@ class Case:
 
     @property
     def user(self) -> Optional[User]:
-        return self.__user
+        """Returns the punished user, if they were resolved or are cached by the client."""
+        return self.__user or self.__api.client.get_user(self.__user_id)
 
     @property
     def user_id(self) -> int:
@@ -444,6 +477,109 @@ class Ban(BasePunishment):
         await self._expire_cases_by_type(PunishmentType.ban)
         self._api.client.dispatch("pidroid_ban_revoke", self)
 
+class MassBan:
+    """This class bans multiple users at once, for example, during raids.
+
+    Users are banned concurrently, Discord rate limits are respected by discord.py.
+    Cases for every banned user are created in bulk once all bans are done,
+    or once banning is interrupted.
+
+    Unlike Ban, the users are not messaged about the punishment."""
+
+    def __init__(
+        self,
+        api: API,
+        guild: Guild,
+        *,
+        moderator: Moderator,
+        users: list[tuple[int, Optional[str]]],
+        reason: Optional[str] = None
+    ) -> None:
+        super().__init__()
+        self.__api = api
+        self.__guild = guild
+        self.__moderator = moderator
+        self.__users = users
+        self.__reason = reason
+        self.__banned: list[tuple[int, Optional[str]]] = []
+        self.__failed: list[int] = []
+
+    @property
+    def total(self) -> int:
+        """Returns the amount of users to be banned."""
+        return len(self.__users)
+
+    @property
+    def banned_count(self) -> int:
+        """Returns the amount of users that were banned so far."""
+        return len(self.__banned)
+
+    @property
+    def failed_count(self) -> int:
+        """Returns the amount of users that could not be banned so far."""
+        return len(self.__failed)
+
+    @property
+    def audit_log_issue_reason(self) -> str:
+        reason = f"Mass banned on behalf of {self.__moderator}"
+        if self.__reason:
+            reason += f" for the following reason: {self.__reason}"
+        else:
+            reason += ", reason was not specified"
+        return reason
+
+    async def __ban(self, semaphore: asyncio.Semaphore, user_id: int, user_name: Optional[str]) -> None:
+        async with semaphore:
+            try:
+                await self.__guild.ban(
+                    discord.Object(user_id), reason=self.audit_log_issue_reason, delete_message_days=1
+                )
+            except discord.HTTPException:
+                self.__failed.append(user_id)
+            else:
+                self.__banned.append((user_id, user_name))
+
+    async def __record_cases(self) -> list[Case]:
+        """Creates the cases for the banned users with a single case counter update and insert."""
+        if not self.__banned:
+            return []
+
+        banned_ids = [user_id for user_id, _ in self.__banned]
+        await self.__api.expire_cases_of_users_by_types(
+            [PunishmentType.jail, PunishmentType.mute], self.__guild.id, banned_ids
+        )
+        return await self.__api.insert_punishment_entries(
+            PunishmentType.ban.value,
+            self.__guild.id,
+            self.__banned,
+            self.__moderator.id, str(self.__moderator),
+            self.__reason, None
+        )
+
+    async def issue(
+        self,
+        *,
+        concurrency: int = MASS_BAN_CONCURRENCY,
+        on_progress: Optional[Callable[[MassBan], Awaitable[None]]] = None
+    ) -> list[Case]:
+        """Bans the users and creates database entries for the ones that were banned.
+
+        The progress callback is called after every ban attempt. If banning is interrupted,
+        the cases of the users banned until then are still created."""
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def ban(user_id: int, user_name: Optional[str]) -> None:
+            await self.__ban(semaphore, user_id, user_name)
+            if on_progress is not None:
+                await on_progress(self)
+
+        try:
+            _ = await asyncio.gather(*(ban(user_id, user_name) for user_id, user_name in self.__users))
+        finally:
+            # Recording is shielded, so that a cancelled command still records the bans it made
+            cases = await asyncio.shield(self.__record_cases())
+        return cases
+
 class Kick(BasePunishment):
 
     __type__ = PunishmentType.kick
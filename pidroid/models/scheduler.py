@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import asyncio
+import datetime
+import logging
+
+from typing import TYPE_CHECKING, Awaitable, Callable
+
+from pidroid.utils.db.scheduled_job import JobType, ScheduledJob
+from pidroid.utils.scheduler import DeadlineScheduler, spread_overdue
+from pidroid.utils.time import utcnow
+
+if TYPE_CHECKING:
+    from pidroid.client import Pidroid
+
+logger = logging.getLogger('Pidroid')
+
+JobHandler = Callable[[ScheduledJob], Awaitable[None]]
+
+# How many times a job is attempted before it is dropped
+MAX_JOB_ATTEMPTS = 5
+# Retry delay after the first failed attempt, doubled on every following attempt
+JOB_RETRY_DELAY = datetime.timedelta(minutes=1)
+# How many jobs may run at the same time
+MAX_CONCURRENT_JOBS = 8
+# Delay between overdue jobs when catching up on a backlog, such as after downtime
+CATCH_UP_INTERVAL = datetime.timedelta(milliseconds=250)
+# How many completed jobs are deleted from the database at once
+COMPLETED_JOB_BATCH_SIZE = 100
+
+class DeferJob(Exception):
+    """Raised by a job handler when the job cannot be run yet, for example while a guild is unavailable.
+
+    The job is run again after the delay, without counting a failed attempt."""
+
+    def __init__(self, delay: datetime.timedelta, reason: str) -> None:
+        super().__init__(reason)
+        self.delay = delay
+
+class JobScheduler:
+    """This class runs jobs, such as reminder deliveries, at their due dates.
+
+    Jobs are stored in the database, so they survive restarts. Only the jobs with the
+    nearest due dates are kept in memory, the rest are loaded once the loaded ones are handled.
+
+    Features register a handler for their job type and schedule jobs through the API
+    in the same transaction as the rows that the jobs refer to. A handler is expected to
+    look up the referenced row, act upon it and clean it up. The job itself is removed
+    once the handler returns successfully, otherwise it is retried later. A handler which
+    has to wait for something outside of its control raises DeferJob instead.
+
+    Due jobs run concurrently, up to the specified limit. Overdue jobs found on load,
+    for example after downtime, are spread out so that they do not all hit Discord at once."""
+
+    def __init__(
+        self,
+        client: Pidroid,
+        *,
+        max_loaded_jobs: int = 1000,
+        max_concurrent_jobs: int = MAX_CONCURRENT_JOBS
+    ) -> None:
+        super().__init__()
+        self.__client = client
+        self.__max_loaded_jobs = max_loaded_jobs
+        self.__max_concurrent_jobs = max_concurrent_jobs
+        self.__handlers: dict[JobType, JobHandler] = {}
+        self.__deadlines: DeadlineScheduler[ScheduledJob] = DeadlineScheduler(self.__dispatch_job, name="job scheduler")
+        self.__slots = asyncio.Semaphore(max_concurrent_jobs)
+        # Jobs which are currently running, by job ID
+        self.__running: dict[int, asyncio.Task[None]] = {}
+        # IDs of the jobs which completed, but are yet to be deleted from the database
+        self.__completed: list[int] = []
+        # Every job due on or before the horizon is loaded, None means every job is loaded
+        self.__horizon: datetime.datetime | None = None
+        self.__load_task: asyncio.Task[None] | None = None
+
+    @property
+    def loaded_count(self) -> int:
+        """Returns the amount of jobs that are kept in memory."""
+        return len(self.__deadlines)
+
+    @property
+    def running_count(self) -> int:
+        """Returns the amount of jobs that are currently running."""
+        return len(self.__running)
+
+    def register(self, job_type: JobType, handler: JobHandler) -> None:
+        """Registers the handler for the specified job type."""
+        self.__handlers[job_type] = handler
+
+    def unregister(self, job_type: JobType) -> None:
+        """Removes the handler for the specified job type.
+
+        Jobs of the type are retried until a handler is registered again."""
+        _ = self.__handlers.pop(job_type, None)
+
+    def notify(self, job: ScheduledJob) -> None:
+        """Called after the job was scheduled in the database."""
+        if self.__horizon is None and len(self.__deadlines) >= self.__max_loaded_jobs:
+            # Stop accepting jobs which are further away than the ones already loaded
+            self.__horizon = self.__deadlines.last_deadline
+
+        if self.__horizon is not None and job.date_due > self.__horizon:
+            # The job will be loaded once the nearer ones are handled
+            _ = self.__deadlines.cancel(job.id)
+            return
+        self.__deadlines.schedule(job.id, job.date_due, job)
+
+    async def __load(self) -> None:
+        """Loads the jobs with the nearest due dates from the database."""
+        jobs = await self.__client.api.fetch_next_scheduled_jobs(self.__max_loaded_jobs)
+        self.__horizon = jobs[-1].date_due if len(jobs) == self.__max_loaded_jobs else None
+        jobs = [job for job in jobs if job.id not in self.__running]
+        deadlines = spread_overdue(
+            [job.date_due for job in jobs], utcnow(), CATCH_UP_INTERVAL, burst=self.__max_concurrent_jobs
+        )
+        for job, deadline in zip(jobs, deadlines):
+            self.__deadlines.schedule(job.id, deadline, job)
+        logger.debug(f"Loaded {len(jobs)} scheduled jobs")
+
+    async def __load_and_start(self) -> None:
+        await self.__client.wait_until_guild_configurations_loaded()
+        await self.__load()
+        self.__deadlines.start()
+
+    def start(self) -> None:
+        """Loads the jobs and starts running them once the client is ready."""
+        if self.__load_task is None or self.__load_task.done():
+            self.__load_task = asyncio.create_task(self.__load_and_start())
+
+    def stop(self) -> None:
+        """Stops running the jobs.
+
+        Running jobs are cancelled and their rows are kept, so they will be run again after the restart.
+        A handler which removes the referenced row before acting upon it will find nothing to do then."""
+        if self.__load_task is not None:
+            _ = self.__load_task.cancel()
+            self.__load_task = None
+        self.__deadlines.stop()
+        for task in self.__running.values():
+            _ = task.cancel()
+
+    async def __retry(self, job: ScheduledJob) -> None:
+        """Reschedules the failed job with an exponential backoff or drops it if it failed too many times."""
+        if job.attempts + 1 >= MAX_JOB_ATTEMPTS:
+            logger.error(f"Dropping {job.job_type} job for {job.ref_id} after {job.attempts + 1} failed attempts")
+            await self.__client.api.delete_scheduled_job(job.id)
+            return
+
+        date_due = utcnow() + JOB_RETRY_DELAY * 2 ** job.attempts
+        rescheduled = await self.__client.api.reschedule_failed_job(job.id, date_due)
+        if rescheduled is not None:
+            self.notify(rescheduled)
+
+    async def __defer(self, job: ScheduledJob, delay: datetime.timedelta) -> None:
+        """Postpones the job without counting an attempt."""
+        postponed = await self.__client.api.postpone_scheduled_job(job.id, utcnow() + delay)
+        if postponed is not None:
+            self.notify(postponed)
+
+    async def __dispatch_job(self, job: ScheduledJob) -> None:
+        """Starts running the due job once there is a free slot for it."""
+        # Waiting here holds back the deadline scheduler while every slot is taken
+        await self.__slots.acquire()
+        self.__running[job.id] = asyncio.create_task(self.__run_job(job), name=f"{job.job_type} job {job.id}")
+
+    async def __flush_completed(self) -> None:
+        """Deletes the completed jobs from the database."""
+        ids, self.__completed = self.__completed, []
+        if ids:
+            await self.__client.api.delete_scheduled_jobs(ids)
+
+    async def __run_job(self, job: ScheduledJob) -> None:
+        """Runs the handler of the due job."""
+        try:
+            handler = self.__handlers.get(JobType(job.job_type))
+            if handler is None:
+                logger.warning(f"There is no handler registered for {job.job_type} jobs")
+                await self.__retry(job)
+                return
+
+            try:
+                await handler(job)
+            except DeferJob as e:
+                logger.info(f"Deferring {job.job_type} job for {job.ref_id} by {e.delay}: {e}")
+                await self.__defer(job, e.delay)
+            except Exception:
+                logger.exception(f"An exception was encountered while running {job.job_type} job for {job.ref_id}")
+                await self.__retry(job)
+            else:
+                self.__completed.append(job.id)
+        except Exception:
+            logger.exception(f"An exception was encountered while rescheduling {job.job_type} job for {job.ref_id}")
+        finally:
+            _ = self.__running.pop(job.id, None)
+            self.__slots.release()
+
+        try:
+            # Delete completed jobs in batches, or once everything that was due is done
+            if len(self.__completed) >= COMPLETED_JOB_BATCH_SIZE or not self.__running:
+                await self.__flush_completed()
+
+            # Once every loaded job is handled, load the following ones
+            if not self.__running and len(self.__deadlines) == 0 and self.__horizon is not None:
+                await self.__load()
+        except Exception:
+            logger.exception("An exception was encountered while updating scheduled jobs")
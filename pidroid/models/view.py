@@ -205,6 +205,9 @@ class PaginatingView(BaseView):
         
         before sending it to the user."""
         await self.source._prepare_once()
+        # Lazily loaded sources only know whether they paginate after being prepared
+        if self.source.is_paginating() and self.go_to_current_page not in self.children:
+            self.add_pagination_buttons()
         page = await self.source.get_page(0)
         self._embed = await self._get_embed_from_page(page)
         self._update_labels(0)
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+
+from collections import OrderedDict
+from discord import Member, Message
+from typing import TYPE_CHECKING, NamedTuple
+
+from pidroid.utils.db.levels import UserLevels
+from pidroid.utils.levels import get_level_progress
+
+if TYPE_CHECKING:
+    from pidroid.utils.api import API
+
+logger = logging.getLogger('Pidroid')
+
+class LevelState(NamedTuple):
+    level: int
+    current_xp: int
+    xp_to_next_level: int
+    total_xp: int
+
+    def to_user_levels(self, guild_id: int, user_id: int) -> UserLevels:
+        """Returns a detached UserLevels object representing this state."""
+        return UserLevels(
+            guild_id=guild_id,
+            user_id=user_id,
+            total_xp=self.total_xp,
+            current_xp=self.current_xp,
+            xp_to_next_level=self.xp_to_next_level,
+            level=self.level
+        )
+
+class PendingXP(NamedTuple):
+    guild_id: int
+    user_id: int
+    amount: int
+    state: LevelState
+
+EMPTY_LEVEL_STATE = LevelState(level=0, current_xp=0, xp_to_next_level=100, total_xp=0)
+
+def add_xp(state: LevelState, amount: int) -> LevelState:
+    """Returns a new level state after awarding the specified amount of XP."""
+    total_xp = state.total_xp + amount
+    progress = get_level_progress(total_xp)
+    return LevelState(
+        level=progress.level,
+        current_xp=progress.current_xp,
+        xp_to_next_level=progress.xp_to_next_level,
+        total_xp=total_xp
+    )
+
+class XPLedger:
+    """This class accumulates XP awards in memory and periodically writes them to the database.
+
+    Level state of recently active members is kept in a bounded cache so that
+    awarding XP and detecting level ups does not require a database round-trip.
+    """
+
+    def __init__(self, api: API, *, max_cached_states: int = 50_000) -> None:
+        super().__init__()
+        self.__api = api
+        self.__max_cached_states = max_cached_states
+        self.__states: OrderedDict[tuple[int, int], LevelState] = OrderedDict()
+        self.__pending: dict[tuple[int, int], PendingXP] = {}
+        self.__flush_lock = asyncio.Lock()
+
+    @property
+    def pending_count(self) -> int:
+        """Returns the amount of members with XP awards that are not yet written to the database."""
+        return len(self.__pending)
+
+    def __cache_state(self, key: tuple[int, int], state: LevelState) -> None:
+        self.__states[key] = state
+        self.__states.move_to_end(key)
+        while len(self.__states) > self.__max_cached_states:
+            _ = self.__states.popitem(last=False)
+
+    async def __get_state(self, guild_id: int, user_id: int) -> LevelState:
+        """Returns the latest known level state for the member."""
+        key = (guild_id, user_id)
+        state = self.__states.get(key)
+        if state is not None:
+            return state
+
+        pending = self.__pending.get(key)
+        if pending is not None:
+            return pending.state
+
+        info = await self.__api.fetch_user_level_info(guild_id, user_id)
+
+        # The state might have been populated while we were waiting for the database
+        state = self.__states.get(key)
+        if state is not None:
+            return state
+
+        if info is None:
+            return EMPTY_LEVEL_STATE
+        return LevelState(
+            level=info.level,
+            current_xp=info.current_xp,
+            xp_to_next_level=info.xp_to_next_level,
+            total_xp=info.total_xp
+        )
+
+    async def award(self, message: Message, amount: int) -> None:
+        """Awards the specified amount of XP to the author of the message.
+
+        Dispatches ``pidroid_level_up`` event if member levelled up."""
+        assert message.guild is not None
+        assert isinstance(message.author, Member)
+        guild_id = message.guild.id
+        user_id = message.author.id
+        key = (guild_id, user_id)
+
+        before = await self.__get_state(guild_id, user_id)
+        after = add_xp(before, amount)
+        self.__cache_state(key, after)
+
+        pending = self.__pending.get(key)
+        pending_amount = amount if pending is None else pending.amount + amount
+        self.__pending[key] = PendingXP(guild_id, user_id, pending_amount, after)
+
+        if before.total_xp == 0 or after.level != before.level:
+            self.__api.client.dispatch(
+                'pidroid_level_up',
+                message.author,
+                message,
+                before.to_user_levels(guild_id, user_id),
+                after.to_user_levels(guild_id, user_id)
+            )
+
+    def invalidate(self, guild_id: int) -> None:
+        """Removes cached level states for the specified guild.
+
+        Should be called whenever member levels are modified outside of the ledger."""
+        for key in [k for k in self.__states if k[0] == guild_id]:
+            del self.__states[key]
+
+    async def flush(self) -> None:
+        """Writes all pending XP awards to the database."""
+        async with self.__flush_lock:
+            if not self.__pending:
+                return
+
+            pending = list(self.__pending.values())
+            self.__pending = {}
+            try:
+                await self.__api.upsert_member_levels(pending)
+            except Exception:
+                # Put the awards back so that they are written on the next flush
+                for entry in pending:
+                    key = (entry.guild_id, entry.user_id)
+                    newer = self.__pending.get(key)
+                    if newer is None:
+                        self.__pending[key] = entry
+                    else:
+                        self.__pending[key] = newer._replace(amount=newer.amount + entry.amount)
+                raise
+            logger.debug(f"Flushed XP awards for {len(pending)} members")
@@ -19,30 +19,28 @@ class GuildConfigurationService(commands.Cog):
     @commands.Cog.listener()
     async def on_ready(self) -> None:
         """This notifies the host of the bot that the client is ready to use."""
-        await self.__fill_guild_prefix_cache()
+        await self.__fill_guild_configuration_cache()
         #assert self.client.user is not None
         #logger.info(f'{self.client.user.name} bot (build {self.client.full_version}) has started with the ID of {self.client.user.id}')
 
-    async def __fill_guild_prefix_cache(self):
-        """Fills the internal cache with guild prefixes."""
-        logger.debug("Filling guild prefix cache")
+    async def __fill_guild_configuration_cache(self):
+        """Fills the internal cache with guild configurations."""
+        logger.debug("Filling guild configuration cache")
         raw_configs = await self.client.api.fetch_guild_configurations()
         for config in raw_configs:
-            self.client.update_guild_prefixes_from_config(config.guild_id, config)
-        logger.debug("Guild prefix cache filled")
+            _ = self.client.cache_guild_configuration(config)
+        logger.debug("Guild configuration cache filled")
 
         # Generate configurations for guilds that do not already have it
         logger.debug("Generating missing guild configurations")
         for guild in self.client.guilds:
-            prefixes = self.client.get_guild_prefixes(guild.id)
-            # If there's no prefix entry, there's no guild configuration either
-            if prefixes is None:
+            if self.client.get_guild_configuration(guild.id) is None:
                 config = await self.client.api.insert_guild_configuration(guild.id)
-                self.client.update_guild_prefixes_from_config(guild.id, config)
+                _ = self.client.cache_guild_configuration(config)
                 logger.warn(f"Guild \"{guild.name}\" ({guild.id}) did not have a guild configuration. Generated one automatically")
 
-        self.client._guild_prefix_cache_ready.set()
-        logger.debug("Guild prefix cache ready")
+        self.client._guild_configuration_cache_ready.set()
+        logger.debug("Guild configuration cache ready")
 
     @commands.Cog.listener()
     async def on_guild_join(self, guild: Guild):
@@ -57,10 +55,12 @@ class GuildConfigurationService(commands.Cog):
     async def on_guild_remove(self, guild: Guild):
         await self.client.wait_until_guild_configurations_loaded()
 
-        config = await self.client.api.fetch_guild_configuration(guild.id)
+        config = self.client.get_guild_configuration(guild.id)
+        if config is None:
+            config = await self.client.api.fetch_guild_configuration(guild.id)
         if config:
+            # Deleting the configuration also removes it from the cache
             await config.delete()
-            self.client.remove_guild_prefixes(guild.id)
 
     @commands.Cog.listener()
     async def on_guild_role_delete(self, role: Role) -> None:
@@ -6,41 +6,59 @@ import logging
 import math
 import random
 
-from discord import Guild, Member, Message, MessageType, Role, User, Object
+from discord import Forbidden, Guild, Member, Message, MessageType, NotFound, Role, User, Object
 from discord.abc import Snowflake
 from discord.ext import commands, tasks
 from typing import TYPE_CHECKING, override
 
 from pidroid.models.guild_configuration import GuildConfiguration
+from pidroid.utils.cooldowns import MemberCooldowns
 from pidroid.utils.db.levels import LevelRewards, UserLevels
-from pidroid.utils.db.role_change_queue import RoleAction
-from pidroid.utils.time import utcnow
+from pidroid.utils.db.role_change_queue import ROLE_CHANGE_CLAIM_RENEW_INTERVAL, MemberRoleChanges, RoleAction
 
 logger = logging.getLogger('Pidroid')
 
+# How long, in seconds, a member has to wait before earning XP again
+XP_COOLDOWN = 60.0
+# How many guilds have their level reward state synced at once on start-up
+STARTUP_SYNC_CONCURRENCY = 8
+# Member edits of a guild share a rate limit bucket, there is no use in sending many at once
+ROLE_QUEUE_GUILD_CONCURRENCY = 5
+# How many members have their queued role changes claimed at once
+ROLE_QUEUE_BATCH_SIZE = 1000
+# How long to wait before checking again if a member, who is not in the guild, has rejoined
+ROLE_QUEUE_MISSING_MEMBER_DELAY = datetime.timedelta(hours=1)
+
 if TYPE_CHECKING:
     from pidroid.client import Pidroid
+    from pidroid.utils.api import API
 
-class UserBucket:
+class RoleQueueOutcome:
+    """Collects the results of a role queue run so that they can be written in a few statements."""
 
-    def __init__(self, user_id: int) -> None:
+    def __init__(self) -> None:
         super().__init__()
-        self.__id = user_id
-        self.__last_earned = datetime.datetime.fromtimestamp(0, tz=datetime.UTC)
-
-    @property
-    def user_id(self) -> int:
-        """Returns the user ID associated with the bucket."""
-        return self.__id
+        self.finished: list[int] = []
+        self.released: list[int] = []
+        self.retried: dict[str, list[int]] = {}
+        self.failed: dict[str, list[int]] = {}
+
+    async def write(self, api: API) -> None:
+        """Writes the results to the role change queue."""
+        await api.delete_role_changes(self.finished)
+        await api.release_role_changes(self.released, ROLE_QUEUE_MISSING_MEMBER_DELAY)
+        for error, ids in self.retried.items():
+            await api.retry_role_changes(ids, error)
+        for error, ids in self.failed.items():
+            await api.dead_letter_role_changes(ids, error)
 
-    @property
-    def can_earn(self) -> bool:
-        """Returns true if user can earn XP again."""
-        return (utcnow().timestamp() - self.__last_earned.timestamp()) >= 60
-
-    def cooldown(self) -> None:
-        """Sets the bucket on a cooldown."""
-        self.__last_earned = utcnow()
+    @override
+    def __str__(self) -> str:
+        return (
+            f"{len(self.finished)} finished, {len(self.released)} released, "
+            f"{sum(len(ids) for ids in self.retried.values())} retried, "
+            f"{sum(len(ids) for ids in self.failed.values())} failed"
+        )
 
 def get_random_xp_amount(config: GuildConfiguration) -> int:
     """Returns a random amount of XP as derived from the config."""
@@ -71,26 +89,26 @@ class LevelingService(commands.Cog):
     def __init__(self, client: Pidroid):
         super().__init__()
         self.client = client
-        self.__cooldown_storage: dict[int, dict[int, UserBucket]] = {}
+        self.__cooldowns = MemberCooldowns(XP_COOLDOWN)
         self.__startup_sync_finished = asyncio.Event()
         _ = self.process_role_queue.start()
+        _ = self.reset_stale_role_changes.start()
+        _ = self.flush_xp_ledger.start()
+        _ = self.sweep_xp_cooldowns.start()
 
     @override
     async def cog_unload(self):
         """Ensure that all the tasks are stopped and cancelled on cog unload."""
         self.process_role_queue.cancel()
+        self.reset_stale_role_changes.cancel()
+        self.flush_xp_ledger.cancel()
+        self.sweep_xp_cooldowns.cancel()
+        # Do not lose any XP that was awarded since the last flush
+        try:
+            await self.client.xp_ledger.flush()
+        except Exception:
+            logger.exception("Failed to flush XP ledger on cog unload")
 
-    def get_bucket(self, guild_id: int, user_id: int) -> UserBucket:
-        """Returns the user cooldown bucket."""
-        guild = self.__cooldown_storage.get(guild_id, None)
-        if guild is None:
-            self.__cooldown_storage[guild_id] = {}
-            guild = self.__cooldown_storage[guild_id]
-
-        if guild.get(user_id, None) is None:
-            self.__cooldown_storage[guild_id][user_id] = UserBucket(user_id)
-        return guild[user_id]
-    
     async def queue_add(self, member: Member, role_id: int, reason: str):
         # If member already has the role, don't queue it up
         if any(r.id == role_id for r in member.roles):
@@ -105,46 +123,139 @@ class LevelingService(commands.Cog):
         logger.debug(f"Adding role ({role_id}) removal to queue for {member} in {member.guild}: {reason}")
         await self.client.api.insert_role_change(RoleAction.remove, member.guild.id, member.id, role_id)
 
-    @tasks.loop(seconds=60)
+    @tasks.loop(seconds=15)
     async def process_role_queue(self) -> None:
-        """This task runs periodically to apply role changes to members from a queue."""
-        #logger.debug("Processing role queue")
+        """This task runs periodically to apply role changes to members from a queue.
+
+        Role changes are claimed in batches so that multiple Pidroid processes can share the queue."""
+        guilds: dict[int, Guild] = {}
         for guild in self.client.guilds:
-            # Acquire guild information
             conf = await self.client.fetch_guild_configuration(guild.id)
-            if not conf.xp_system_active:
-                continue
-            
-            role_changes = await self.client.api.fetch_role_changes(guild.id)
-            if role_changes:
-                logger.debug(f"Managing role changes for {guild}")
+            if conf.xp_system_active:
+                guilds[guild.id] = guild
+
+        while True:
+            role_changes = await self.client.api.claim_role_changes(list(guilds), limit=ROLE_QUEUE_BATCH_SIZE)
+            if not role_changes:
+                return
+
+            changes_by_guild: dict[int, list[MemberRoleChanges]] = {}
             for role_change in role_changes:
-                member = guild.get_member(role_change.member_id)
-                # If we have the member object
-                if member:
-                    logger.debug(f"Managing role changes for {member} in {guild}")
-                    updated_roles: list[Snowflake] = []
-
-                    # Manage mostly removed roles
-                    for role in member.roles:
-                        # If the current role in loop is due for removal
-                        # Do not add it to the list and continue the loop
-                        if any(role.id == removed_role_id for removed_role_id in role_change.roles_removed):
-                            continue
-                        updated_roles.append(role)
-
-                    # Manage added roles
-                    for role_id in role_change.roles_added:
-                        # If the current loop role is already in the member roles, ignore
-                        if any(role_id == r.id for r in updated_roles):
-                            continue
-                        updated_roles.append(Object(id=role_id))
-
-                    # If roles actually changed
-                    if set(r.id for r in updated_roles) != set(r.id for r in member.roles):
-                        _ = await member.edit(roles=updated_roles, reason="Pidroid level rewards")
-
-                    await role_change.pop()
+                changes_by_guild.setdefault(role_change.guild_id, []).append(role_change)
+
+            # Guilds have separate rate limit buckets for member edits, so they are handled concurrently
+            outcome = RoleQueueOutcome()
+            # Applying a batch under rate limits can outlast the claim timeout, so keep the claims fresh
+            renewal = asyncio.create_task(
+                self._renew_role_change_claims([row_id for c in role_changes for row_id in c.row_ids])
+            )
+            try:
+                _ = await asyncio.gather(*[
+                    self._apply_guild_role_changes(guilds[guild_id], changes, outcome)
+                    for guild_id, changes in changes_by_guild.items()
+                ])
+            finally:
+                _ = renewal.cancel()
+            await outcome.write(self.client.api)
+            logger.debug(f"Processed queued role changes across {len(changes_by_guild)} guilds: {outcome}")
+
+            # A partial batch means the queue has been drained
+            if len(role_changes) < ROLE_QUEUE_BATCH_SIZE:
+                return
+
+    async def _renew_role_change_claims(self, ids: list[int]) -> None:
+        """Periodically renews the claims of the role changes until cancelled."""
+        while True:
+            await asyncio.sleep(ROLE_CHANGE_CLAIM_RENEW_INTERVAL.total_seconds())
+            try:
+                await self.client.api.renew_role_change_claims(ids)
+            except Exception:
+                logger.exception("An exception was encountered while trying to renew role change claims")
+
+    @tasks.loop(minutes=5)
+    async def reset_stale_role_changes(self) -> None:
+        """This task periodically returns role changes abandoned by stopped workers to the queue."""
+        try:
+            reset_count = await self.client.api.reset_stale_role_changes()
+        except Exception:
+            logger.exception("An exception was encountered while trying to reset stale role changes")
+            return
+        if reset_count:
+            logger.warning(f"Reset {reset_count} stale role changes")
+
+    async def _apply_guild_role_changes(
+        self,
+        guild: Guild,
+        role_changes: list[MemberRoleChanges],
+        outcome: RoleQueueOutcome
+    ) -> None:
+        """Applies the role changes to the guild members, editing at most
+        ``ROLE_QUEUE_GUILD_CONCURRENCY`` members at once.
+
+        The result of every role change is recorded in the outcome."""
+        logger.debug(f"Managing role changes for {guild}")
+        semaphore = asyncio.Semaphore(ROLE_QUEUE_GUILD_CONCURRENCY)
+
+        async def apply(role_change: MemberRoleChanges) -> None:
+            member = guild.get_member(role_change.member_id)
+            # If we don't have the member object, keep the changes for when they rejoin
+            if member is None:
+                outcome.released.extend(role_change.row_ids)
+                return
+
+            async with semaphore:
+                try:
+                    await self._apply_member_role_changes(member, role_change)
+                except (Forbidden, NotFound) as e:
+                    # These changes are not going to succeed on retry
+                    logger.warning(f"Dead-lettering role changes for {member} in {guild}: {e}")
+                    outcome.failed.setdefault(str(e), []).extend(role_change.row_ids)
+                except Exception as e:
+                    logger.exception(f"Failed to apply role changes for {member} in {guild}")
+                    outcome.retried.setdefault(str(e) or type(e).__name__, []).extend(role_change.row_ids)
+                else:
+                    outcome.finished.extend(role_change.row_ids)
+
+        _ = await asyncio.gather(*[apply(role_change) for role_change in role_changes])
+
+    async def _apply_member_role_changes(self, member: Member, role_change: MemberRoleChanges) -> None:
+        """Edits the member roles according to the queued role changes."""
+        logger.debug(f"Managing role changes for {member} in {member.guild}")
+        updated_roles: list[Snowflake] = []
+
+        # Manage mostly removed roles
+        for role in member.roles:
+            # If the current role in loop is due for removal
+            # Do not add it to the list and continue the loop
+            if any(role.id == removed_role_id for removed_role_id in role_change.roles_removed):
+                continue
+            updated_roles.append(role)
+
+        # Manage added roles
+        for role_id in role_change.roles_added:
+            # If the current loop role is already in the member roles, ignore
+            if any(role_id == r.id for r in updated_roles):
+                continue
+            updated_roles.append(Object(id=role_id))
+
+        # If roles actually changed
+        if set(r.id for r in updated_roles) != set(r.id for r in member.roles):
+            _ = await member.edit(roles=updated_roles, reason="Pidroid level rewards")
+
+    @tasks.loop(seconds=15)
+    async def flush_xp_ledger(self) -> None:
+        """This task periodically writes accumulated XP awards to the database."""
+        try:
+            await self.client.xp_ledger.flush()
+        except Exception:
+            logger.exception("An exception was encountered while trying to flush XP ledger")
+
+    @tasks.loop(seconds=60)
+    async def sweep_xp_cooldowns(self) -> None:
+        """This task periodically removes expired XP cooldowns from memory."""
+        removed = self.__cooldowns.sweep()
+        if removed and self.client.debugging:
+            logger.debug(f"Removed {removed} expired XP cooldowns")
 
     @process_role_queue.before_loop
     async def before_process_role_queue(self) -> None:
@@ -152,8 +263,16 @@ class LevelingService(commands.Cog):
         await self.client.wait_until_guild_configurations_loaded()
         _ = await self.__startup_sync_finished.wait()
 
+    @reset_stale_role_changes.before_loop
+    async def before_reset_stale_role_changes(self) -> None:
+        """Runs before reset_stale_role_changes task to ensure that the task is ready to run."""
+        await self.client.wait_until_guild_configurations_loaded()
+
     async def _sync_guild_state(self, guild: Guild, reason: str) -> None:
-        """An expensive method that syncs guild level reward state."""
+        """An expensive method that syncs guild level reward state.
+
+        Desired reward roles of every member are compared to their cached roles
+        and only the differences are queued, using a single insert."""
         logger.debug(f"Syncing {guild} level rewards")
         # Acquire guild information
         conf = await self.client.fetch_guild_configuration(guild.id)
@@ -161,7 +280,7 @@ class LevelingService(commands.Cog):
         all_level_rewards = await conf.fetch_all_level_rewards()
 
         # Remove rewards for roles that no longer exist
-        guild_role_ids = [role.id for role in guild.roles]
+        guild_role_ids = set(role.id for role in guild.roles)
         for reward in all_level_rewards:
             if reward.role_id not in guild_role_ids:
                 logger.debug(f'Removing {reward.role_id} as a level reward for {guild} since role no longer exists')
@@ -172,42 +291,41 @@ class LevelingService(commands.Cog):
         if not conf.xp_system_active:
             return
 
-        # Update every eligible user
-        logger.debug(f"Syncing {guild} member levels")
-        for member_information in await conf.fetch_all_member_levels():
-            # Obtain member object, if we can't do that
-            # then move onto the next member
-
-            if self.client.debugging:
-                logger.debug(f"Fetching member information for {member_information.user_id}")
+        # Rewards are resolved in memory for every member
+        reward_table = await self.client.api.fetch_guild_level_reward_table(guild.id)
+        if len(reward_table) == 0:
+            return
 
-            member = guild.get_member(member_information.user_id)
+        logger.debug(f"Syncing {guild} member levels")
+        changes: list[tuple[RoleAction, int, int]] = []
+        for user_id, level in await self.client.api.fetch_guild_member_levels(guild.id):
+            member = guild.get_member(user_id)
             if member is None:
                 continue
-                
-            # Acquire all rewards that the user is eligible for
-            rewards = await self.client.api.fetch_eligible_level_rewards_for_level(
-                member_information.guild_id, member_information.level
-            )
 
-            # If member has no eligible rewards, move onto the next member
+            # Acquire all rewards that the user is eligible for
+            rewards = reward_table.get_eligible(level)
             if len(rewards) == 0:
                 continue
-                
-            # If to stack rewards, add all of them
+
+            # If to stack rewards, member should have all of them
             if conf.level_rewards_stacked:
-                for reward in rewards:
-                    await self.queue_add(member, reward.role_id, reason)
-                
-            # If only a single role should be given
+                desired = set(r.role_id for r in rewards)
+                undesired: set[int] = set()
+            # Otherwise, only the topmost role, the rest are removed
             else:
-                # the first item in the list is always the topmost role
-                await self.queue_add(member, rewards[0].role_id, reason)
-                # remove all other roles
-                amount_to_remove = len(rewards) - 1
-                if amount_to_remove > 0:
-                    for reward in rewards[1:]:
-                        await self.queue_remove(member, reward.role_id, reason, bypass_cache=False)
+                desired = {rewards[0].role_id}
+                undesired = set(r.role_id for r in rewards[1:]) - desired
+
+            member_role_ids = set(r.id for r in member.roles)
+            for role_id in desired - member_role_ids:
+                changes.append((RoleAction.add, member.id, role_id))
+            for role_id in undesired & member_role_ids:
+                changes.append((RoleAction.remove, member.id, role_id))
+
+        if changes:
+            logger.debug(f"Queueing {len(changes)} role changes for {guild}: {reason}")
+            await self.client.api.insert_role_changes(guild.id, changes)
 
     @commands.Cog.listener()
     async def on_ready(self) -> None:
@@ -220,8 +338,16 @@ class LevelingService(commands.Cog):
         """
         await self.client.wait_until_guild_configurations_loaded()
         logger.debug("Syncing level reward state")
-        for guild in self.client.guilds:
-            await self._sync_guild_state(guild, "Start-up role reward state sync")
+        semaphore = asyncio.Semaphore(STARTUP_SYNC_CONCURRENCY)
+
+        async def sync(guild: Guild) -> None:
+            async with semaphore:
+                try:
+                    await self._sync_guild_state(guild, "Start-up role reward state sync")
+                except Exception:
+                    logger.exception(f"Failed to sync level reward state for {guild}")
+
+        _ = await asyncio.gather(*[sync(guild) for guild in self.client.guilds])
         logger.debug("Level reward state synced")
         self.__startup_sync_finished.set()
 
@@ -240,7 +366,7 @@ class LevelingService(commands.Cog):
         if isinstance(message.author, User):
             return
 
-        # Might want to cache this
+        # Served from the client guild configuration cache
         config = await self.client.fetch_guild_configuration(message.guild.id)
         if not config.xp_system_active:
             return
@@ -253,16 +379,13 @@ class LevelingService(commands.Cog):
         if not set([r.id for r in message.author.roles]).isdisjoint(config.xp_exempt_roles):
             return
 
-        bucket = self.get_bucket(message.guild.id, message.author.id)
-        if not bucket.can_earn:
+        # Immediately put member on cooldown, if they are not on one already
+        if not self.__cooldowns.try_acquire(message.guild.id, message.author.id):
             return
 
-        # Immediately put it on cooldown
-        bucket.cooldown()
-
-        # Save it by a call to the database
-        # Award the XP to the specified message
-        await self.client.api.award_xp(message, get_random_xp_amount(config))
+        # Award the XP to the specified message, it will be
+        # written to the database on the next ledger flush
+        await self.client.xp_ledger.award(message, get_random_xp_amount(config))
 
     @commands.Cog.listener()
     async def on_member_join(self, member: Member) -> None:
@@ -362,10 +485,10 @@ class LevelingService(commands.Cog):
                 level_infos = await self.client.api.fetch_user_level_info_between(reward.guild_id, reward.level, None)
 
             # go over each level information and change roles
+            previous = await self.client.api.fetch_previous_level_reward(reward.guild_id, reward.level)
             for level_info in level_infos:
                 member = await self.client.get_or_fetch_member(guild, level_info.user_id)
                 if member:
-                    previous = await self.client.api.fetch_previous_level_reward(reward.guild_id, reward.level)
                     await self.queue_add(member, reward.role_id, "Role reward created")
                     if previous:
                         await self.queue_remove(member, previous.role_id, "Role reward created")
@@ -434,6 +557,12 @@ class LevelingService(commands.Cog):
                     # We add member to the role
                     await self.queue_add(member, le.role_id, "Next role due to role reward removal")
 
+    @commands.Cog.listener()
+    async def on_pidroid_guild_levels_change(self, guild: Guild):
+        """Called when levels of many members in the guild were changed at once."""
+        logger.debug(f"Member levels were changed in bulk for {guild}")
+        await self._sync_guild_state(guild, "Bulk member level change")
+
     async def on_pidroid_level_stacking_change(self, guild: Guild):
         """Called when there's a level stacking setting changed."""
         logger.debug(f"Level stacking setting was changed for {guild}")
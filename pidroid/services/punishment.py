@@ -1,53 +1,80 @@
+import datetime
 import discord
 import logging
 
 from contextlib import suppress
-from discord.ext import tasks, commands
+from discord.ext import commands
 from typing import override
 
 from pidroid.client import Pidroid
+from pidroid.models.scheduler import DeferJob
 from pidroid.models.punishments import PunishmentType, Ban, Warning, Jail, Kick, Timeout
 from pidroid.utils import try_message_user
 from pidroid.utils.aliases import DiscordUser
+from pidroid.utils.db.scheduled_job import JobType, ScheduledJob
+from pidroid.utils.time import utcnow
 
 logger = logging.getLogger("Pidroid")
 
+# How long to wait before trying to revoke a punishment in a guild which is in an outage
+UNAVAILABLE_GUILD_RETRY_DELAY = datetime.timedelta(minutes=5)
+# How long to wait before trying to revoke a punishment in a guild which Pidroid is not in
+MISSING_GUILD_RETRY_DELAY = datetime.timedelta(hours=1)
+# How long after its expiration a punishment in a guild which Pidroid is not in is no longer waited for
+MISSING_GUILD_GIVE_UP_AFTER = datetime.timedelta(days=7)
+
 class PunishmentService(commands.Cog):
     """This class implements a cog for automatic punishment revocation and reassignment."""
 
     def __init__(self, client: Pidroid) -> None:
         super().__init__()
         self.client = client
-        _ = self.remove_expired_bans.start()
+        self.client.scheduler.register(JobType.punishment_expiry, self.handle_punishment_expiry_job)
 
     @override
     async def cog_unload(self):
-        """Ensure that tasks are cancelled on cog unload."""
-        self.remove_expired_bans.stop()
-
-    @tasks.loop(seconds=5)
-    async def remove_expired_bans(self) -> None:
-        """Periodically checks for expired punishments to remove."""
-        try:
-            for guild in self.client.guilds:
-                bans = await self.client.api.fetch_active_guild_bans(guild.id)
-                for ban in bans:
-                    assert ban.type == PunishmentType.ban
-                    # Immediately expire the punishment as far as DB is concerned
-                    await ban.expire()
-                    # If user is not able to be resolved, just skip everything
-                    if ban.user is None:
-                        continue
-                    # Remove ban entry from Discord
-                    with suppress(Exception):
-                        await guild.unban(ban.user, reason=f"Ban expired | Case #{ban.case_id}")
-        except Exception:
-            logger.exception("An exception was encountered while trying remove expired bans")
-
-    @remove_expired_bans.before_loop
-    async def before_remove_expired_bans(self) -> None:
-        """Runs before remove_expired_bans task to ensure that the task is allowed to run."""
-        await self.client.wait_until_guild_configurations_loaded()
+        """Ensure that the job handler is removed on cog unload."""
+        self.client.scheduler.unregister(JobType.punishment_expiry)
+
+    async def handle_punishment_expiry_job(self, job: ScheduledJob) -> None:
+        """Revokes the punishment when it expires."""
+        expiry = await self.client.api.fetch_punishment_expiry(job.ref_id)
+        if expiry is None:
+            return
+        guild_id, expire_date = expiry
+
+        guild = self.client.get_guild(guild_id)
+        # Wait for the guild instead of failing, so that the punishment is revoked once it is back
+        if guild is None:
+            if utcnow() - (expire_date or job.date_due) < MISSING_GUILD_GIVE_UP_AFTER:
+                raise DeferJob(MISSING_GUILD_RETRY_DELAY, f"Pidroid is not in guild {guild_id}")
+            # Pidroid most likely left the guild for good, there is no way to revoke the punishment
+            logger.warning(f"Giving up on revoking punishment {job.ref_id} as Pidroid is not in guild {guild_id}")
+            _ = await self.client.api.claim_expired_punishment(job.ref_id)
+            return
+        if guild.unavailable:
+            raise DeferJob(UNAVAILABLE_GUILD_RETRY_DELAY, f"Guild {guild_id} is unavailable")
+
+        # Immediately expire the punishment as far as DB is concerned,
+        # if it was revoked in the meantime, there is nothing to do
+        punishment = await self.client.api.claim_expired_punishment(job.ref_id)
+        if punishment is None:
+            return
+
+        if punishment.type == PunishmentType.ban.value:
+            # Remove ban entry from Discord
+            with suppress(Exception):
+                await guild.unban(discord.Object(punishment.user_id), reason=f"Ban expired | Case #{punishment.case_id}")
+
+        elif punishment.type == PunishmentType.jail.value:
+            c = await self.client.fetch_guild_configuration(guild.id)
+            member = guild.get_member(punishment.user_id)
+            jail_role = None if c.jail_role_id is None else guild.get_role(c.jail_role_id)
+            if member is not None and jail_role is not None:
+                with suppress(Exception):
+                    await member.remove_roles(jail_role, reason=f"Jail expired | Case #{punishment.case_id}")
+
+        # Timeouts are lifted by Discord itself
 
     @commands.Cog.listener()
     async def on_member_join(self, member: discord.Member) -> None:
@@ -1,17 +1,16 @@
+import discord
 import logging
 
 from discord import Permissions
-from discord.ext import tasks, commands
+from discord.ext import commands
 from typing import override
 
-from sqlalchemy import delete, select
-
 from pidroid.client import Pidroid
 from pidroid.utils.aliases import MessageableGuildChannel, MessageableGuildChannelTuple
 from pidroid.utils.checks import member_has_channel_permission
 from pidroid.utils.db.reminder import Reminder
+from pidroid.utils.db.scheduled_job import JobType, ScheduledJob
 from pidroid.utils.embeds import PidroidEmbed
-from pidroid.utils.time import utcnow
 
 logger = logging.getLogger("Pidroid")
 
@@ -21,12 +20,12 @@ class ReminderService(commands.Cog):
     def __init__(self, client: Pidroid) -> None:
         super().__init__()
         self.client = client
-        _ = self.deliver_due_reminders.start()
+        self.client.scheduler.register(JobType.reminder, self.handle_reminder_job)
 
     @override
     async def cog_unload(self):
-        """Ensure that tasks are cancelled on cog unload."""
-        self.deliver_due_reminders.stop()
+        """Ensure that the job handler is removed on cog unload."""
+        self.client.scheduler.unregister(JobType.reminder)
 
     async def send_reminder(self, reminder: Reminder):
         """Sends a reminder."""
@@ -71,40 +70,22 @@ class ReminderService(commands.Cog):
             await user.send(embed=embed)
 
 
-    @tasks.loop(seconds=15)
-    async def deliver_due_reminders(self) -> None:
-        """Periodically fetches and delivers due reminders."""
-        try:
-            async_session = self.client.api.session
-            async with async_session() as session: 
-                async with session.begin():
-                    # Acquire every due reminder
-                    result = await session.execute(
-                        select(Reminder).
-                        filter(Reminder.date_remind <= utcnow())
-                    )
+    async def handle_reminder_job(self, job: ScheduledJob) -> None:
+        """Delivers the reminder when it is due.
 
-                    # Go over each reminder, send it
-                    # and delete it from database
-                    for row in result.fetchall():
-                        reminder = row[0]
-                        try:
-                            await self.send_reminder(reminder)
-                        except Exception:
-                            logger.exception("An exception was encountered while trying to send a due reminder")
-                        await session.execute(
-                            delete(Reminder).
-                            filter(Reminder.id == reminder.id)
-                        )
-                # Commit it
-                await session.commit()
-        except Exception:
-            logger.exception("An exception was encountered while trying to deliver due reminders")
-
-    @deliver_due_reminders.before_loop
-    async def before_deliver_due_reminders(self) -> None:
-        """Runs before deliver_due_reminders task to ensure that the task is allowed to run."""
-        await self.client.wait_until_ready()
+        The reminder is only removed once it is sent, so that it is retried if sending fails
+        or the job is interrupted. This means a reminder can be delivered more than once."""
+        reminder = await self.client.api.fetch_reminder(row=job.ref_id)
+        # Reminder was removed by the user
+        if reminder is None:
+            return
+
+        try:
+            await self.send_reminder(reminder)
+        except (discord.Forbidden, discord.NotFound):
+            # Retrying would not help, the user or channel cannot be messaged
+            logger.warning(f"Unable to deliver reminder {reminder.id} to user {reminder.user_id}, removing it")
+        await self.client.api.delete_reminder(row=reminder.id)
 
 async def setup(client: Pidroid) -> None:
     await client.add_cog(ReminderService(client))
@@ -2,14 +2,17 @@ import asyncio
 import emoji # I am not updating the emoji regex myself every time there's a new one
 import re
 import logging
+import urllib.parse
 
 from contextlib import suppress
 from discord.ext import commands
 from discord.channel import TextChannel
 from discord.utils import remove_markdown
 from discord.message import Message
+from typing import override
 
 from pidroid.client import Pidroid
+from pidroid.utils.batching import BatchDispatcher
 from pidroid.utils.embeds import PidroidEmbed
 from pidroid.utils.http import post
 from pidroid.utils.time import utcnow
@@ -47,6 +50,15 @@ LANGUAGE_MAPPING = {
     "ZH": "Chinese"
 }
 
+# How long messages are gathered before they are sent for translation, in seconds
+TRANSLATION_BATCH_WINDOW = 0.25
+# DeepL accepts up to 50 texts and 128 KiB per request
+MAX_TRANSLATION_BATCH_SIZE = 50
+# Texts are weighed by their size in the form encoded request body, leaving room for the other fields
+MAX_TRANSLATION_BATCH_BYTES = 100 * 1024
+# How many translation requests are sent at the same time if not configured
+DEFAULT_MAX_CONCURRENT_REQUESTS = 2
+
 FEED_CHANNEL_ID = 943920969637040140
 SOURCE_CHANNEL_ID = 692830641728782336
 
@@ -56,6 +68,11 @@ BASE64_PATTERN = re.compile(r'^([A-Za-z0-9+/]{4})*([A-Za-z0-9+/]{3}=|[A-Za-z0-9+
 
 logger = logging.getLogger("Pidroid")
 
+def form_encoded_size(text: str) -> int:
+    """Returns how many bytes the text takes up as a field of a form encoded request body."""
+    # Characters outside of ASCII take up to three times their UTF-8 size once percent-encoded
+    return len("&text=") + len(urllib.parse.quote_plus(text))
+
 def remove_emojis(string: str) -> str:
     """Removes all emojis from a string."""
     stripped = re.sub(CUSTOM_EMOJI_PATTERN, "", string)
@@ -118,29 +135,47 @@ class ChatTranslationService(commands.Cog):
         self.endpoint = "https://api.deepl.com/v2"
         self.auth_key = self.client.config.get("deepl_api_key", None)
 
-        self._translating = asyncio.Event()
-        self._translating.set()
+        # Messages are gathered for a moment and translated together in a single request
+        self.dispatcher: BatchDispatcher[str, dict] = BatchDispatcher(
+            self.translate_batch,
+            window=TRANSLATION_BATCH_WINDOW,
+            max_batch_size=MAX_TRANSLATION_BATCH_SIZE,
+            max_batch_weight=MAX_TRANSLATION_BATCH_BYTES,
+            weigh=form_encoded_size,
+            max_concurrent_batches=int(
+                self.client.config.get("deepl_max_concurrent_requests", DEFAULT_MAX_CONCURRENT_REQUESTS)
+            )
+        )
+        # Completed once the last handled message is posted to the feed.
+        # Batches may finish out of order, the feed still has to follow the chat order.
+        self.__last_post: asyncio.Future[None] | None = None
 
         self.daily_char_limit = 50000
         self.used_chars = 0
         self.last_reset = utcnow()
 
+    @override
+    async def cog_unload(self):
+        """Ensure that pending translations are cancelled on cog unload."""
+        self.dispatcher.close()
+
+    async def translate_batch(self, texts: list[str]) -> list[dict]:
+        """Translates the texts to English in a single request, returning the translations in the same order."""
+        assert self.auth_key is not None
+        form = [("auth_key", self.auth_key), ("target_lang", "EN")] + [("text", text) for text in texts]
+        async with await post(self.client, self.endpoint + "/translate", form) as r:
+            r.raise_for_status()
+            data = await r.json()
+        return data["translations"]
+
     async def translate(self, text: str) -> list[dict]:
-        self._translating.clear()
+        """Translates the text to English, together with other texts submitted at the same time."""
         try:
-            async with await post(self.client, self.endpoint + "/translate", {
-                "auth_key": self.auth_key,
-                "text": text,
-                "target_lang": "EN"
-            }) as r:
-                data = await r.json()
+            return [await self.dispatcher.submit(text)]
         except Exception as e:
             logger.critical(f"Failure while translating: {text}")
             logger.exception(e)
-            self._translating.set()
             return []
-        self._translating.set()
-        return data["translations"]
 
     async def get_usage(self) -> dict:
         async with await post(self.client, self.endpoint + "/usage", {
@@ -158,22 +193,18 @@ class ChatTranslationService(commands.Cog):
         )
 
     async def translate_message(self, message: Message, clean_text: str) -> list[dict]:
-        # Await previous translation jobs to finish
-        await self._translating.wait()
-
-        # Check if daily limit is not reached, if it is, stop translating
-        if len(clean_text) + self.used_chars > self.daily_char_limit:
-            logger.warning("Failure translating encountered, the daily character limit was exceeded")
-            return []
-        self.used_chars += len(clean_text)
-
-        # Check if text was already translated
-        c_key = clean_text.lower()
-        translations = await self.client.api.fetch_translations(c_key)
+        # Check if text was already translated, the lookup normalizes the text by itself
+        translations = await self.client.api.fetch_translations(clean_text)
         if len(translations) == 0:
+            # Check if daily limit is not reached, if it is, stop translating
+            if len(clean_text) + self.used_chars > self.daily_char_limit:
+                logger.warning("Failure translating encountered, the daily character limit was exceeded")
+                return []
+            self.used_chars += len(clean_text)
+
             translations = await self.translate(clean_text)
             for t in translations:
-                await self.client.api.insert_translation_entry(c_key, t["detected_source_language"], t["text"])
+                await self.client.api.insert_translation_entry(clean_text, t["detected_source_language"], t["text"])
 
         # If message could not be translated, log it as a warning
         if len(translations) == 0:
@@ -194,19 +225,30 @@ class ChatTranslationService(commands.Cog):
         await self.handle(message)
 
     async def handle(self, message: Message):
-        parser = TextParser(message.clean_content)
-        translations = []
-        flag = ParserFlags.BYPASSED
-        if parser.should_translate:
-            flag, text = parser.get_parsed_text()
-            translations = await self.translate_message(message, text or parser.text)
-
-        assert message.guild is not None
-        channel = await self.client.get_or_fetch_guild_channel(message.guild, FEED_CHANNEL_ID)
-        if channel is None:
-            return logger.warning("Translation output channel is None!")
-        assert isinstance(channel, TextChannel)
-        await self.dispatch_translation(channel, message, translations, flag)
+        # Messages are translated concurrently, but posted in the order they were received
+        previous_post = self.__last_post
+        posted: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self.__last_post = posted
+        try:
+            parser = TextParser(message.clean_content)
+            translations = []
+            flag = ParserFlags.BYPASSED
+            if parser.should_translate:
+                flag, text = parser.get_parsed_text()
+                translations = await self.translate_message(message, text or parser.text)
+
+            # Waiting does not cancel the previous message if this one is cancelled
+            if previous_post is not None:
+                _ = await asyncio.wait([previous_post])
+
+            assert message.guild is not None
+            channel = await self.client.get_or_fetch_guild_channel(message.guild, FEED_CHANNEL_ID)
+            if channel is None:
+                return logger.warning("Translation output channel is None!")
+            assert isinstance(channel, TextChannel)
+            await self.dispatch_translation(channel, message, translations, flag)
+        finally:
+            posted.set_result(None)
 
     async def dispatch_translation(self, channel: TextChannel, message: Message, translations: list[dict], flag: int) -> None: # noqa C901
         # If message contains a reply, track down the reference author
@@ -1,36 +1,56 @@
 from __future__ import annotations
 
 import datetime
+import numpy as np
+import numpy.typing as npt
 
 from discord import Message, Member, Guild
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Sequence
 
 from pidroid.models.tags import Tag
 from pidroid.models.guild_configuration import GuildConfiguration
 from pidroid.models.plugins import NewPlugin, Plugin
-from pidroid.models.punishments import Case, PunishmentType
+from pidroid.models.punishments import EXPIRING_PUNISHMENT_TYPES, Case, PunishmentType
 from pidroid.models.accounts import TheoTownAccount
 from pidroid.utils.db.expiring_thread import ExpiringThread
 from pidroid.utils.db.guild_configuration import GuildConfigurationTable
-from pidroid.utils.db.levels import LevelRewards, UserLevels
+from pidroid.utils.db.levels import LevelRewards, UserLevels, level_progress_columns
 from pidroid.utils.db.linked_account import LinkedAccount
 from pidroid.utils.db.punishment import PunishmentCounterTable, PunishmentTable
 from pidroid.utils.db.reminder import Reminder
-from pidroid.utils.db.role_change_queue import MemberRoleChanges, RoleAction, RoleChangeQueue, RoleQueueState
+from pidroid.utils.db.scheduled_job import JobType, ScheduledJob
+from pidroid.utils.db.role_change_queue import (
+    MAX_ROLE_CHANGE_ATTEMPTS, ROLE_CHANGE_CLAIM_TIMEOUT, ROLE_CHANGE_MAX_RETRY_DELAY, ROLE_CHANGE_RETRY_DELAY,
+    MemberRoleChanges, RoleAction, RoleChangeQueue, RoleQueueState
+)
 from pidroid.utils.db.tag import TagTable
-from pidroid.utils.db.translation import Translation
+from pidroid.utils.db.translation import Translation, hash_translation_content
+from pidroid.utils.cache import TTLCache
 from pidroid.utils.http import HTTP, Route
+from pidroid.utils.levels import LevelRewardTable, get_level_progress_array
+from pidroid.utils.tags import TagNameIndex
 from pidroid.utils.time import utcnow
 
 
-from sqlalchemy import func, delete, select, update
+from sqlalchemy import ARRAY, BigInteger, Interval, and_, case, exists, func, delete, insert, literal, or_, select, tuple_, update
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession, AsyncEngine
+from sqlalchemy.orm import aliased
 from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy.ext.asyncio import async_sessionmaker
 
 if TYPE_CHECKING:
     from pidroid.client import Pidroid
+    from pidroid.models.xp_ledger import PendingXP
+
+# How many recently used tags are kept in memory
+TAG_CACHE_SIZE = 1000
+# How long a tag is kept in memory, in seconds, in case it is modified outside of Pidroid
+TAG_CACHE_TTL = 60 * 60
+# How many recently used translations are kept in memory
+TRANSLATION_CACHE_SIZE = 5000
+# How long a translation is kept in memory, in seconds
+TRANSLATION_CACHE_TTL = 24 * 60 * 60
 
 class API:
     """This class handles operations related to Pidroid's Postgres database and remote TheoTown API."""
@@ -41,6 +61,15 @@ class API:
         self.__dsn = dsn
         self.__http = HTTP(client)
         self.__engine: AsyncEngine | None = None
+        self.__level_rewards: dict[int, LevelRewardTable[LevelRewards]] = {}
+        self.__level_reward_generation = 0
+        self.__tag_indexes: dict[int, TagNameIndex] = {}
+        self.__tag_index_generation = 0
+        self.__tag_rows: TTLCache[int, TagTable] = TTLCache(max_size=TAG_CACHE_SIZE, ttl=TAG_CACHE_TTL)
+        # Missing translations are not remembered, they are inserted right after the lookup
+        self.__translations: TTLCache[bytes, tuple[str, str]] = TTLCache(
+            max_size=TRANSLATION_CACHE_SIZE, ttl=TRANSLATION_CACHE_TTL, negative_ttl=0
+        )
 
     async def connect(self) -> None:
         """Creates a postgresql database connection."""
@@ -68,58 +97,63 @@ class API:
                 )
                 session.add(entry)
             await session.commit()
+
+        self.__tag_index_generation += 1
+        index = self.__tag_indexes.get(guild_id)
+        if index is not None:
+            index.add(entry.id, name, [])
         return entry.id 
 
-    async def fetch_tag(self, id: int) -> Tag | None:
-        """Returns a tag with at the specified row."""
+    async def __fetch_tag_row(self, id: int) -> TagTable | None:
         async with self.session() as session: 
             result = await session.execute(
                 select(TagTable).
                 filter(TagTable.id == id)
             )
-        row = result.scalar()
-        if row:
-            return Tag.from_table(self.client, row)
-        return None
+        return result.scalar()
 
-    async def fetch_guild_tag(self, guild_id: int, tag_name: str) -> Tag | None:
-        """Returns a guild tag for the appropriate name."""
-        async with self.session() as session: 
-            result = await session.execute(
-                select(TagTable).
-                filter(TagTable.guild_id == guild_id, TagTable.name.ilike(tag_name)).
-                order_by(TagTable.name.asc())
-            )
-        row = result.scalar()
+    async def fetch_tag(self, id: int) -> Tag | None:
+        """Returns a tag with at the specified row.
+
+        Recently used tags are kept in memory."""
+        row = await self.__tag_rows.get_or_load(id, lambda: self.__fetch_tag_row(id))
         if row:
             return Tag.from_table(self.client, row)
         return None
 
-    async def search_guild_tags(self, guild_id: int, tag_name: str) -> list[Tag]:
-        """Returns all guild tags matching the appropriate name."""
-        async with self.session() as session: 
-            result = await session.execute(
-                select(TagTable).
-                filter(TagTable.guild_id == guild_id, TagTable.name.ilike(f'%{tag_name}%')).
-                order_by(TagTable.name.asc())
-            )
-        return [Tag.from_table(self.client, r[0]) for r in result.fetchall()]
+    async def fetch_guild_tag_index(self, guild_id: int) -> TagNameIndex:
+        """Returns the index of tag names and aliases of the specified guild.
+
+        The index is loaded from the database once and kept current as the tags are modified."""
+        index = self.__tag_indexes.get(guild_id)
+        if index is not None:
+            return index
 
-    async def fetch_guild_tags(self, guild_id: int) -> list[Tag]:
-        """Returns a list of all tags defined in the guild."""
+        generation = self.__tag_index_generation
         async with self.session() as session: 
             result = await session.execute(
-                select(TagTable).
-                filter(TagTable.guild_id == guild_id).
-                order_by(TagTable.name.asc())
+                select(TagTable.id, TagTable.name, TagTable.aliases).
+                filter(TagTable.guild_id == guild_id)
             )
-        return [Tag.from_table(self.client, r[0]) for r in result.fetchall()]
+        index = TagNameIndex((row.id, row.name, row.aliases) for row in result)
+        # Do not cache the index if tags were modified while we were loading it
+        if generation == self.__tag_index_generation:
+            self.__tag_indexes[guild_id] = index
+        return index
+
+    async def fetch_guild_tag(self, guild_id: int, tag_name: str) -> Tag | None:
+        """Returns a guild tag for the appropriate name or alias."""
+        index = await self.fetch_guild_tag_index(guild_id)
+        row_id = index.get(tag_name)
+        if row_id is None:
+            return None
+        return await self.fetch_tag(row_id)
 
     async def update_tag(self, row_id: int, content: str, authors: list[int], aliases: list[str], locked: bool) -> None:
         """Updates a tag entry by specified row ID."""
         async with self.session() as session: 
             async with session.begin():
-                _ = await session.execute(
+                result = await session.execute(
                     update(TagTable).
                     filter(TagTable.id == row_id).
                     values(
@@ -127,17 +161,36 @@ class API:
                         authors=authors,
                         aliases=aliases,
                         locked=locked
-                    )
+                    ).
+                    returning(TagTable.guild_id)
                 )
+                guild_id = result.scalar()
             await session.commit()
 
+        self.__tag_index_generation += 1
+        self.__tag_rows.invalidate(row_id)
+        index = self.__tag_indexes.get(guild_id) if guild_id is not None else None
+        if index is not None:
+            index.set_aliases(row_id, aliases)
+
     async def delete_tag(self, row_id: int) -> None:
         """Removes a tag by specified row ID."""
         async with self.session() as session: 
             async with session.begin():
-                _ = await session.execute(delete(TagTable).filter(TagTable.id == row_id))
+                result = await session.execute(
+                    delete(TagTable).
+                    filter(TagTable.id == row_id).
+                    returning(TagTable.guild_id)
+                )
+                guild_id = result.scalar()
             await session.commit()
 
+        self.__tag_index_generation += 1
+        self.__tag_rows.invalidate(row_id)
+        index = self.__tag_indexes.get(guild_id) if guild_id is not None else None
+        if index is not None:
+            index.remove(row_id)
+
     """Guild configuration related"""
 
     async def insert_guild_configuration(
@@ -255,17 +308,21 @@ class API:
     async def insert_expiring_thread(self, thread_id: int, expiration_date: datetime.datetime) -> None:
         async with self.session() as session: 
             async with session.begin():
-                session.add(ExpiringThread(thread_id=thread_id, expiration_date=expiration_date))
+                entry = ExpiringThread(thread_id=thread_id, expiration_date=expiration_date)
+                session.add(entry)
+                await session.flush()
+                job = await self.__add_scheduled_job(session, JobType.expiring_thread, entry.id, expiration_date)
             await session.commit()
+        self.client.scheduler.notify(job)
 
-    async def fetch_expired_threads(self, expiration_date: datetime.datetime) -> list[ExpiringThread]:
-        """Returns a list of active threads which require archiving."""
+    async def fetch_expiring_thread(self, row_id: int) -> ExpiringThread | None:
+        """Returns an expiring thread entry by specified row ID."""
         async with self.session() as session: 
             result = await session.execute(
                 select(ExpiringThread).
-                filter(ExpiringThread.expiration_date <= expiration_date)
+                filter(ExpiringThread.id == row_id)
             )
-        return list(result.scalars())
+        return result.scalar()
 
     async def delete_expiring_thread(self, row_id: int) -> None:
         """Removes an expiring thread entry from the database."""
@@ -285,58 +342,120 @@ class API:
         reason: str | None,
         expire_date: datetime.datetime | None
     ) -> Case:
+        """Inserts a punishment entry and returns it as a case.
+
+        The guild specific case ID is allocated and the entry is inserted in a single statement."""
+        counter = (
+            pg_insert(PunishmentCounterTable).values(guild_id=guild_id).on_conflict_do_update(
+                index_elements=[PunishmentCounterTable.guild_id],
+                set_=dict(counter=PunishmentCounterTable.counter + 1)
+            ).returning(PunishmentCounterTable.counter).
+            cte("counter")
+        )
+        insert_stmt = (
+            insert(PunishmentTable).
+            values(
+                case_id=select(counter.c.counter).scalar_subquery(),
+                type=type,
+                guild_id=guild_id,
+                user_id=user_id,
+                user_name=user_name,
+                moderator_id=moderator_id,
+                moderator_name=moderator_name,
+                reason=reason,
+                expire_date=expire_date
+            ).
+            add_cte(counter).
+            returning(PunishmentTable)
+        )
+
         async with self.session() as session: 
             async with session.begin():
-                insert_stmt = pg_insert(PunishmentCounterTable).values(guild_id=guild_id).on_conflict_do_update(
-                    index_elements=[PunishmentCounterTable.guild_id],
-                    set_=dict(counter=PunishmentCounterTable.counter + 1)
-                ).returning(PunishmentCounterTable.counter)
-
-                res = await session.execute(insert_stmt)
-                counter = res.scalar()
-                if counter is None:
-                    raise RuntimeError((
-                        f"After trying to insert a punishment entry, row was None\n\n"
-                        "Information about punishment:\n"
-                        f"type: {type}\n"
-                        f"guild_id: {guild_id}\n"
-                        f"user_id: {user_id}\n"
-                        f"moderator_id: {moderator_id}\n"
-                        f"reason: {reason}\n"
-                        f"expire_date: {expire_date}"
-                    ))
-
-                entry = PunishmentTable(
-                    case_id=counter,
-                    type=type,
-                    guild_id=guild_id,
-                    user_id=user_id,
-                    user_name=user_name,
-                    moderator_id=moderator_id,
-                    moderator_name=moderator_name,
-                    reason=reason,
-                    expire_date=expire_date
-                )
-                session.add(entry)
+                result = await session.execute(insert_stmt)
+                entry = result.scalar_one()
+                job = None
+                if expire_date is not None and type in EXPIRING_PUNISHMENT_TYPES:
+                    job = await self.__add_scheduled_job(session, JobType.punishment_expiry, entry.id, expire_date)
             await session.commit()
+        if job is not None:
+            self.client.scheduler.notify(job)
+
+        # Names are always saved with new entries, so this does not fetch any users
+        return (await self._build_cases([entry]))[0]
+
+    async def insert_punishment_entries(
+        self,
+        type: str,
+        guild_id: int,
+        users: list[tuple[int, str | None]],
+        moderator_id: int, moderator_name: str,
+        reason: str | None,
+        expire_date: datetime.datetime | None
+    ) -> list[Case]:
+        """Inserts a punishment entry for every specified user ID and name pair and returns them as cases.
 
-        case = await self.__fetch_case_by_internal_id(entry.id) 
-        assert case is not None
-        return case
+        Case IDs for all entries are allocated with a single counter update and the entries
+        are inserted in a single statement."""
+        if not users:
+            return []
 
-    async def __fetch_case_by_internal_id(self, id: int) -> Case | None:
-        """Fetches and returns a deserialized case, if available."""
         async with self.session() as session: 
-            result = await session.execute(
-                select(PunishmentTable).
-                filter(PunishmentTable.id == id)
-            )
-        r = result.fetchone()
-        if r:
+            async with session.begin():
+                result = await session.execute(
+                    pg_insert(PunishmentCounterTable).values(guild_id=guild_id, counter=len(users)).on_conflict_do_update(
+                        index_elements=[PunishmentCounterTable.guild_id],
+                        set_=dict(counter=PunishmentCounterTable.counter + len(users))
+                    ).returning(PunishmentCounterTable.counter)
+                )
+                first_case_id = result.scalar_one() - len(users) + 1
+
+                inserted = await session.execute(
+                    insert(PunishmentTable).
+                    values([
+                        dict(
+                            case_id=first_case_id + i,
+                            type=type,
+                            guild_id=guild_id,
+                            user_id=user_id,
+                            user_name=user_name,
+                            moderator_id=moderator_id,
+                            moderator_name=moderator_name,
+                            reason=reason,
+                            expire_date=expire_date
+                        )
+                        for i, (user_id, user_name) in enumerate(users)
+                    ]).
+                    returning(PunishmentTable)
+                )
+                entries = sorted(inserted.scalars(), key=lambda e: e.case_id)
+                jobs: list[ScheduledJob] = []
+                if expire_date is not None and type in EXPIRING_PUNISHMENT_TYPES:
+                    jobs = await self.__add_scheduled_jobs(
+                        session, JobType.punishment_expiry, [(entry.id, expire_date) for entry in entries]
+                    )
+            await session.commit()
+        for job in jobs:
+            self.client.scheduler.notify(job)
+        return await self._build_cases(entries)
+
+    async def _build_cases(self, rows: list[PunishmentTable]) -> list[Case]:
+        """Returns a list of cases built from the punishment entries.
+
+        Users whose names were not saved with the entries are resolved
+        concurrently, each distinct user only once."""
+        cases: list[Case] = []
+        user_ids: set[int] = set()
+        for row in rows:
             c = Case(self)
-            await c._from_table(r[0])
-            return c
-        return None
+            c._from_table(row)
+            user_ids.update(c._unresolved_user_ids)
+            cases.append(c)
+
+        if user_ids:
+            users = await self.client.get_or_fetch_users(user_ids)
+            for c in cases:
+                c._set_resolved_users(users)
+        return cases
 
     async def _fetch_case(self, guild_id: int, case_id: int) -> Case | None:
         """Fetches and returns a deserialized case if available."""
@@ -351,9 +470,7 @@ class API:
             )
         r = result.fetchone()
         if r:
-            c = Case(self)
-            await c._from_table(r[0])
-            return c
+            return (await self._build_cases([r[0]]))[0]
         return None
 
     async def fetch_guilds_user_was_punished_in(self, user_id: int) -> list[Guild]:
@@ -375,24 +492,36 @@ class API:
                 guilds.append(guild)
         return guilds
 
-    async def _fetch_cases(self, guild_id: int, user_id: int) -> list[Case]:
-        """Fetches and returns a list of deserialized cases."""
-        async with self.session() as session: 
-            result = await session.execute(
-                select(PunishmentTable).
-                filter(
-                    PunishmentTable.guild_id == guild_id,
-                    PunishmentTable.user_id == user_id,
-                    PunishmentTable.visible == True
-                ).
-                order_by(PunishmentTable.issue_date.desc())
+    async def _fetch_cases(
+        self,
+        guild_id: int, user_id: int,
+        *,
+        type: PunishmentType | None = None,
+        active_only: bool = False
+    ) -> list[Case]:
+        """Fetches and returns a list of deserialized cases.
+
+        Cases can be narrowed down to the specified type and to the ones which have not expired."""
+        stmt = (
+            select(PunishmentTable).
+            filter(
+                PunishmentTable.guild_id == guild_id,
+                PunishmentTable.user_id == user_id,
+                PunishmentTable.visible == True
             )
-        case_list: list[Case] = []
-        for r in result.fetchall():
-            c = Case(self)
-            await c._from_table(r[0])
-            case_list.append(c)
-        return case_list
+        )
+        if type is not None:
+            stmt = stmt.filter(PunishmentTable.type == type.value)
+        if active_only:
+            stmt = stmt.filter(
+                PunishmentTable.handled == False,
+                (PunishmentTable.expire_date.is_(None))
+                | (PunishmentTable.expire_date > utcnow())
+            )
+
+        async with self.session() as session: 
+            result = await session.execute(stmt.order_by(PunishmentTable.issue_date.desc()))
+        return await self._build_cases(list(result.scalars()))
     
     async def fetch_cases_by_username(self, guild_id: int, username: str) -> list[Case]:
         """Returns all cases in the guild where original username at punishment time matches the provided username."""
@@ -406,12 +535,7 @@ class API:
                 ).
                 order_by(PunishmentTable.user_name.asc())
             )
-        case_list: list[Case] = []
-        for r in result.fetchall():
-            c = Case(self)
-            await c._from_table(r[0])
-            case_list.append(c)
-        return case_list
+        return await self._build_cases(list(result.scalars()))
 
     async def update_case_by_internal_id(
         self,
@@ -455,43 +579,59 @@ class API:
                 )
             await session.commit()
 
+    async def expire_cases_of_users_by_types(
+        self,
+        types: list[PunishmentType],
+        guild_id: int, user_ids: list[int]
+    ) -> None:
+        """Expires case entries of the specified types for every specified user ID in the guild."""
+        async with self.session() as session: 
+            async with session.begin():
+                _ = await session.execute(
+                    update(PunishmentTable).
+                    filter(
+                        PunishmentTable.type.in_([t.value for t in types]),
+                        PunishmentTable.guild_id == guild_id,
+                        PunishmentTable.user_id.in_(user_ids)
+                    ).
+                    values(
+                        expire_date=utcnow(),
+                        handled=True
+                    )
+                )
+            await session.commit()
+
     async def fetch_moderation_statistics(self, guild_id: int, moderator_id: int) -> dict[str, int]:
         """Fetches and returns a dictionary containing the general moderation statistics."""
-        bans = kicks = jails = warnings = user_total = guild_total = 0
         async with self.session() as session: 
             result = await session.execute(
-                select(PunishmentTable.type).
+                select(PunishmentTable.type, func.count()).
                 filter(
                     PunishmentTable.guild_id == guild_id,
                     PunishmentTable.moderator_id == moderator_id,
                     PunishmentTable.visible == True
-                )
+                ).
+                group_by(PunishmentTable.type)
             )
-
-            # Tally moderator specific data
-            for r in result.fetchall():
-                user_total += 1
-                p_val = r[0]
-                if p_val == 'ban': bans += 1         # noqa: E701
-                if p_val == 'kick': kicks += 1       # noqa: E701
-                if p_val == 'jail': jails += 1       # noqa: E701
-                if p_val == 'warning': warnings += 1 # noqa: E701
+            counts: dict[str, int] = {row[0]: row[1] for row in result.fetchall()}
 
             # Get total cases of the guild
             result = await session.execute(
-                select(func.count(PunishmentTable.type)).
+                select(func.count()).
+                select_from(PunishmentTable).
                 filter(
                     PunishmentTable.guild_id == guild_id,
                     PunishmentTable.visible == True
                 )
             )
-            row = result.fetchone()
-            assert row
-            guild_total = row[0]
+            guild_total = result.scalar_one()
 
         return {
-            "bans": bans, "kicks": kicks, "jails": jails, "warnings": warnings,
-            "user_total": user_total,
+            "bans": counts.get(PunishmentType.ban.value, 0),
+            "kicks": counts.get(PunishmentType.kick.value, 0),
+            "jails": counts.get(PunishmentType.jail.value, 0),
+            "warnings": counts.get(PunishmentType.warning.value, 0),
+            "user_total": sum(counts.values()),
             "guild_total": guild_total
         }
 
@@ -519,60 +659,188 @@ class API:
         """Returns true if user is currently jailed in the guild."""
         return await self.__is_currently_punished(PunishmentType.jail.value, guild_id, user_id)
 
-    async def fetch_active_guild_bans(self, guild_id: int) -> list[Case]:
-        """
-        Returns a list of active guild bans that can expire. Bans
-        without an expiration date will not be included.
-        """
+    async def fetch_punishment_expiry(self, id: int) -> tuple[int, datetime.datetime | None] | None:
+        """Returns the guild ID and expiration date of the punishment entry by specified row ID."""
         async with self.session() as session: 
             result = await session.execute(
-                select(PunishmentTable).
-                filter(
-                    PunishmentTable.guild_id == guild_id,
-
-                    # Expires if expiration date is past current date
-                    # and if expiration date is actually set
-                    PunishmentTable.expire_date <= utcnow(),
-                    PunishmentTable.expire_date.is_not(None),
+                select(PunishmentTable.guild_id, PunishmentTable.expire_date).
+                filter(PunishmentTable.id == id)
+            )
+        row = result.one_or_none()
+        if row is None:
+            return None
+        return row.guild_id, row.expire_date
 
-                    # Explicit statement to know if case was already handled
-                    PunishmentTable.handled == False,
+    async def claim_expired_punishment(self, id: int) -> PunishmentTable | None:
+        """Marks the punishment entry by specified row ID as handled.
 
-                    PunishmentTable.type == PunishmentType.ban.value,
-                    PunishmentTable.visible == True
+        Returns the entry, or None if it was already handled or revoked."""
+        async with self.session() as session: 
+            async with session.begin():
+                result = await session.execute(
+                    update(PunishmentTable).
+                    filter(
+                        PunishmentTable.id == id,
+                        PunishmentTable.handled == False,
+                        PunishmentTable.visible == True
+                    ).
+                    values(handled=True).
+                    returning(PunishmentTable)
                 )
+                row = result.scalar()
+            await session.commit()
+        return row
+
+    """Scheduled job related"""
+
+    async def __add_scheduled_job(
+        self,
+        session: AsyncSession,
+        job_type: JobType,
+        ref_id: int,
+        date_due: datetime.datetime
+    ) -> ScheduledJob:
+        """Schedules a job as part of the provided session transaction.
+
+        If the job is already scheduled, its due date is replaced."""
+        insert_stmt = pg_insert(ScheduledJob).values(job_type=job_type.value, ref_id=ref_id, date_due=date_due)
+        result = await session.execute(
+            insert_stmt.on_conflict_do_update(
+                index_elements=[ScheduledJob.job_type, ScheduledJob.ref_id],
+                set_=dict(date_due=insert_stmt.excluded.date_due, attempts=0)
+            ).returning(ScheduledJob)
+        )
+        return result.scalar_one()
+
+    async def __add_scheduled_jobs(
+        self,
+        session: AsyncSession,
+        job_type: JobType,
+        jobs: list[tuple[int, datetime.datetime]]
+    ) -> list[ScheduledJob]:
+        """Schedules jobs for the specified reference ID and due date pairs as part of the provided session transaction.
+
+        If a job is already scheduled, its due date is replaced."""
+        insert_stmt = pg_insert(ScheduledJob).values([
+            dict(job_type=job_type.value, ref_id=ref_id, date_due=date_due) for ref_id, date_due in jobs
+        ])
+        result = await session.execute(
+            insert_stmt.on_conflict_do_update(
+                index_elements=[ScheduledJob.job_type, ScheduledJob.ref_id],
+                set_=dict(date_due=insert_stmt.excluded.date_due, attempts=0)
+            ).returning(ScheduledJob)
+        )
+        return list(result.scalars())
+
+    async def __delete_scheduled_job(self, session: AsyncSession, job_type: JobType, ref_id: int) -> None:
+        """Removes a job as part of the provided session transaction."""
+        _ = await session.execute(
+            delete(ScheduledJob).
+            filter(ScheduledJob.job_type == job_type.value, ScheduledJob.ref_id == ref_id)
+        )
+
+    async def fetch_next_scheduled_jobs(self, limit: int) -> list[ScheduledJob]:
+        """Returns a list of scheduled jobs with the nearest due dates, sorted by due date ascending."""
+        async with self.session() as session: 
+            result = await session.execute(
+                select(ScheduledJob).
+                order_by(ScheduledJob.date_due.asc(), ScheduledJob.id.asc()).
+                limit(limit)
             )
-        case_list: list[Case] = []
-        for r in result.fetchall():
-            c = Case(self)
-            await c._from_table(r[0])
-            case_list.append(c)
-        return case_list
+        return list(result.scalars())
+
+    async def delete_scheduled_job(self, id: int) -> None:
+        """Removes a scheduled job by specified row ID."""
+        async with self.session() as session: 
+            async with session.begin():
+                _ = await session.execute(delete(ScheduledJob).filter(ScheduledJob.id == id))
+            await session.commit()
+
+    async def delete_scheduled_jobs(self, ids: list[int]) -> None:
+        """Removes scheduled jobs by specified row IDs."""
+        async with self.session() as session: 
+            async with session.begin():
+                _ = await session.execute(delete(ScheduledJob).filter(ScheduledJob.id.in_(ids)))
+            await session.commit()
+
+    async def reschedule_failed_job(self, id: int, date_due: datetime.datetime) -> ScheduledJob | None:
+        """Moves a failed scheduled job by specified row ID to a new due date and counts the attempt.
+
+        Returns the updated job, or None if it no longer exists."""
+        async with self.session() as session: 
+            async with session.begin():
+                result = await session.execute(
+                    update(ScheduledJob).
+                    filter(ScheduledJob.id == id).
+                    values(date_due=date_due, attempts=ScheduledJob.attempts + 1).
+                    returning(ScheduledJob)
+                )
+                job = result.scalar()
+            await session.commit()
+        return job
+
+    async def postpone_scheduled_job(self, id: int, date_due: datetime.datetime) -> ScheduledJob | None:
+        """Moves a scheduled job by specified row ID to a new due date without counting an attempt.
+
+        Returns the updated job, or None if it no longer exists."""
+        async with self.session() as session: 
+            async with session.begin():
+                result = await session.execute(
+                    update(ScheduledJob).
+                    filter(ScheduledJob.id == id).
+                    values(date_due=date_due).
+                    returning(ScheduledJob)
+                )
+                job = result.scalar()
+            await session.commit()
+        return job
 
     """Translation related"""
 
     async def insert_translation_entry(self, original_str: str, detected_lang: str, translated_str: str) -> None:
-        """Inserts a new translation entry to the database."""
+        """Inserts a new translation entry to the database, replacing the translation of the same content."""
+        content_hash = hash_translation_content(original_str)
+        statement = pg_insert(Translation).values(
+            content_hash=content_hash,
+            original_content=original_str,
+            detected_language=detected_lang,
+            translated_string=translated_str
+        )
         async with self.session() as session: 
             async with session.begin():
-                entry = Translation(
-                    original_content=original_str,
-                    detected_language=detected_lang,
-                    translated_string=translated_str
+                _ = await session.execute(
+                    statement.on_conflict_do_update(
+                        index_elements=[Translation.content_hash],
+                        set_=dict(
+                            detected_language=statement.excluded.detected_language,
+                            translated_string=statement.excluded.translated_string
+                        )
+                    )
                 )
-                session.add(entry)
             await session.commit()
+        self.__translations.set(content_hash, (detected_lang, translated_str))
 
-    async def fetch_translations(self, original_str: str) -> list[dict[str, str]]:
-        """Returns a list of translations for specified string."""
+    async def __fetch_translation(self, content_hash: bytes) -> tuple[str, str] | None:
         async with self.session() as session: 
             result = await session.execute(
-                select(Translation).
-                filter(Translation.original_content == original_str)
+                select(Translation.detected_language, Translation.translated_string).
+                filter(Translation.content_hash == content_hash)
             )
-        return [
-            {"detected_source_language": r[0].detected_language, "text": r[0].translated_string} for r in result.fetchall()
-        ]
+        row = result.first()
+        if row is None:
+            return None
+        return row.detected_language, row.translated_string
+
+    async def fetch_translations(self, original_str: str) -> list[dict[str, str]]:
+        """Returns a list of translations for specified string.
+
+        Strings are matched after normalization. Recently used translations are kept in memory."""
+        content_hash = hash_translation_content(original_str)
+        translation = await self.__translations.get_or_load(content_hash, lambda: self.__fetch_translation(content_hash))
+        if translation is None:
+            return []
+        detected_language, text = translation
+        return [{"detected_source_language": detected_language, "text": text}]
 
     """Linked account related"""
 
@@ -627,6 +895,33 @@ class API:
     
     """Leveling system related"""
 
+    def __invalidate_level_rewards(self, guild_id: int) -> None:
+        """Removes the cached level rewards of the specified guild."""
+        _ = self.__level_rewards.pop(guild_id, None)
+        self.__level_reward_generation += 1
+
+    async def fetch_guild_level_reward_table(self, guild_id: int) -> LevelRewardTable[LevelRewards]:
+        """Returns the level rewards of the specified guild.
+
+        Rewards are loaded from the database once and kept in memory until they are modified."""
+        table = self.__level_rewards.get(guild_id)
+        if table is not None:
+            return table
+
+        generation = self.__level_reward_generation
+        async with self.session() as session: 
+            result = await session.execute(
+                select(LevelRewards).
+                filter(
+                    LevelRewards.guild_id == guild_id
+                )
+            )
+        table = LevelRewardTable(result.scalars(), get_level=lambda r: r.level, get_role_id=lambda r: r.role_id)
+        # Do not cache the rewards if they were modified while we were loading them
+        if generation == self.__level_reward_generation:
+            self.__level_rewards[guild_id] = table
+        return table
+
     async def insert_level_reward(self, guild_id: int, role_id: int, level: int) -> int:
         """Creates a level reward entry in the database."""
         async with self.session() as session: 
@@ -638,6 +933,7 @@ class API:
                 )
                 session.add(entry)
             await session.commit()
+        self.__invalidate_level_rewards(guild_id)
         self.client.dispatch(
             'pidroid_level_reward_add',
             await self.fetch_level_reward_by_id(entry.id)
@@ -648,15 +944,19 @@ class API:
         """Updates a level reward entry by specified ID."""
         async with self.session() as session: 
             async with session.begin():
-                _ = await session.execute(
+                result = await session.execute(
                     update(LevelRewards).
                     filter(LevelRewards.id == id).
                     values(
                        role_id=role_id,
                        level=level
-                    )
+                    ).
+                    returning(LevelRewards.guild_id)
                 )
+                guild_id = result.scalar()
             await session.commit()
+        if guild_id is not None:
+            self.__invalidate_level_rewards(guild_id)
 
     async def delete_level_reward(self, id: int) -> None:
         """Removes a level reward by specified row ID."""
@@ -665,21 +965,16 @@ class API:
             async with session.begin():
                 _ = await session.execute(delete(LevelRewards).filter(LevelRewards.id == id))
             await session.commit()
+        if obj is not None:
+            self.__invalidate_level_rewards(obj.guild_id)
         self.client.dispatch("pidroid_level_reward_remove", obj)
 
     async def fetch_all_guild_level_rewards(self, guild_id: int) -> list[LevelRewards]:
         """Returns a list of all LevelReward entries available for the specified guild.
         
         Role IDs are sorted by their appropriate level requirement descending."""
-        async with self.session() as session: 
-            result = await session.execute(
-                select(LevelRewards).
-                filter(
-                    LevelRewards.guild_id == guild_id
-                ).
-                order_by(LevelRewards.level.desc())
-            )
-        return list(result.scalars())
+        table = await self.fetch_guild_level_reward_table(guild_id)
+        return table.rewards
 
     async def fetch_level_reward_by_id(self, id: int) -> LevelRewards | None:
         """Returns a LevelReward entry for the specified ID."""
@@ -692,75 +987,37 @@ class API:
 
     async def fetch_level_reward_by_role(self, guild_id: int, role_id: int) -> LevelRewards | None:
         """Returns a LevelReward entry for the specified guild and role."""
-        async with self.session() as session: 
-            result = await session.execute(
-                select(LevelRewards).
-                filter(
-                    LevelRewards.guild_id == guild_id,
-                    LevelRewards.role_id == role_id
-                )
-            )
-        return result.scalar()
+        table = await self.fetch_guild_level_reward_table(guild_id)
+        return table.get_by_role(role_id)
 
     async def fetch_guild_level_reward_by_level(self, guild_id: int, level: int) -> LevelRewards | None:
         """Returns a LevelReward entry for the specified guild and level."""
-        async with self.session() as session: 
-            result = await session.execute(
-                select(LevelRewards).
-                filter(
-                    LevelRewards.guild_id == guild_id,
-                    LevelRewards.level == level
-                )
-            )
-        return result.scalar()
+        table = await self.fetch_guild_level_reward_table(guild_id)
+        return table.get_by_level(level)
 
     async def fetch_eligible_level_rewards_for_level(self, guild_id: int, level: int) -> list[LevelRewards]:
         """Returns a list of LevelReward entries available for the specified guild and level.
         
         Entries are sorted by required level descending."""
-        async with self.session() as session: 
-            result = await session.execute(
-                select(LevelRewards).
-                filter(
-                    LevelRewards.guild_id == guild_id,
-                    LevelRewards.level <= level
-                ).
-                order_by(LevelRewards.level.desc())
-            )
-        return list(result.scalars())
+        table = await self.fetch_guild_level_reward_table(guild_id)
+        return table.get_eligible(level)
 
     async def fetch_eligible_level_reward_for_level(self, guild_id: int, level: int) -> LevelRewards | None:
         """Returns a LevelReward entry for the specified guild and level.
         
         Entry will be sorted by required level descending."""
-        rewards = await self.fetch_eligible_level_rewards_for_level(guild_id, level)
-        if len(rewards) == 0:
-            return None
-        return rewards[0]
+        table = await self.fetch_guild_level_reward_table(guild_id)
+        return table.get_top_eligible(level)
 
     async def fetch_previous_level_reward(self, guild_id: int, level: int) -> LevelRewards | None:
-        async with self.session() as session: 
-            result = await session.execute(
-                select(LevelRewards).
-                filter(
-                    LevelRewards.guild_id == guild_id,
-                    LevelRewards.level < level
-                ).order_by(LevelRewards.level.desc())
-            )
-        return result.scalar()
+        """Returns the closest LevelReward entry which requires a lower level than the specified one."""
+        table = await self.fetch_guild_level_reward_table(guild_id)
+        return table.get_previous(level)
 
     async def fetch_next_level_reward(self, guild_id: int, level: int) -> LevelRewards | None:
-        async with self.session() as session: 
-            result = await session.execute(
-                select(LevelRewards).
-                filter(
-                    LevelRewards.guild_id == guild_id,
-                    LevelRewards.level > level
-                ).order_by(LevelRewards.level.desc())
-            )
-        return result.scalar()
-
-
+        """Returns the closest LevelReward entry which requires a higher level than the specified one."""
+        table = await self.fetch_guild_level_reward_table(guild_id)
+        return table.get_next(level)
 
     """ User levels related """
 
@@ -796,6 +1053,55 @@ class API:
             )
         return list(result.scalars())
 
+    async def count_guild_level_rankings(self, guild_id: int) -> int:
+        """Returns the amount of ranked members in the guild."""
+        async with self.session() as session:
+            result = await session.execute(
+                select(func.count()).
+                select_from(UserLevels).
+                filter(UserLevels.guild_id == guild_id)
+            )
+        return result.scalar_one()
+
+    async def fetch_guild_level_rankings_page(
+        self,
+        guild_id: int,
+        *,
+        after: tuple[int, int] | None = None,
+        before: tuple[int, int] | None = None,
+        offset: int = 0,
+        limit: int = 10
+    ) -> list[UserLevels]:
+        """Returns a list of guild levels ordered by total XP and row ID.
+
+        If after key is provided, the entries ranked below the specified ``(total_xp, id)`` key are returned.
+        If before key is provided, the entries ranked above the specified key are returned.
+        Otherwise, the entries are returned starting at the specified offset."""
+        key = tuple_(UserLevels.total_xp, UserLevels.id)
+        stmt = select(UserLevels).filter(UserLevels.guild_id == guild_id)
+        reverse = False
+        if after is not None:
+            after_total_xp, after_id = after
+            stmt = stmt.filter(
+                key < tuple_(literal(after_total_xp, BigInteger), literal(after_id, BigInteger))
+            ).order_by(UserLevels.total_xp.desc(), UserLevels.id.desc())
+        elif before is not None:
+            # Walk the index backwards and flip the result to keep descending order
+            before_total_xp, before_id = before
+            stmt = stmt.filter(
+                key > tuple_(literal(before_total_xp, BigInteger), literal(before_id, BigInteger))
+            ).order_by(UserLevels.total_xp.asc(), UserLevels.id.asc())
+            reverse = True
+        else:
+            stmt = stmt.order_by(UserLevels.total_xp.desc(), UserLevels.id.desc()).offset(offset)
+
+        async with self.session() as session:
+            result = await session.execute(stmt.limit(limit))
+        entries = list(result.scalars())
+        if reverse:
+            entries.reverse()
+        return entries
+
     async def fetch_guild_level_infos(self, guild_id: int) -> list[UserLevels]:
         """Returns the bare member level information excluding ranking information."""
         async with self.session() as session: 
@@ -809,6 +1115,19 @@ class API:
             )
         return list(result.scalars())
 
+    async def fetch_guild_member_levels(self, guild_id: int) -> list[tuple[int, int]]:
+        """Returns a list of user ID and level pairs for every member with level information in the guild."""
+        async with self.session() as session: 
+            result = await session.execute(
+                select(
+                    UserLevels.user_id, UserLevels.level
+                ).
+                filter(
+                    UserLevels.guild_id == guild_id
+                )
+            )
+        return [(user_id, level) for user_id, level in result.tuples()]
+
     async def fetch_ranked_user_level_info(self, guild_id: int, user_id: int) -> UserLevels | None:
         """Returns ranked level information for the specified user."""
         async with self.session() as session: 
@@ -869,66 +1188,201 @@ class API:
                 )
             await session.commit()
 
-    async def award_xp(self, message: Message, amount: int):
-        """Awards the specified amount of XP to the specified message."""
+    async def award_member_xp(self, guild_id: int, member_id: int, amount: int) -> tuple[UserLevels, UserLevels]:
+        """Awards the specified amount of XP to the member.
+
+        The award and level calculation is done atomically in a single statement, which
+        also returns the level information from before the award.
+
+        Returns the level information from before and after the award."""
+        insert_stmt = pg_insert(UserLevels).values(
+            guild_id=guild_id,
+            user_id=member_id,
+            total_xp=amount,
+            **level_progress_columns(literal(amount, BigInteger))
+        )
+        new_total_xp = UserLevels.total_xp + insert_stmt.excluded.total_xp
+        previous_total_xp = UserLevels.total_xp - amount
+        upsert_stmt = insert_stmt.on_conflict_do_update(
+            index_elements=[UserLevels.guild_id, UserLevels.user_id],
+            set_=dict(
+                total_xp=new_total_xp,
+                **level_progress_columns(new_total_xp)
+            )
+        ).returning(
+            UserLevels,
+            *[
+                expression.label(f"previous_{name}")
+                for name, expression in level_progress_columns(previous_total_xp).items()
+            ]
+        )
+
+        async with self.session() as session: 
+            async with session.begin():
+                result = await session.execute(upsert_stmt)
+                info, previous_level, previous_current_xp, previous_xp_to_next_level = result.one()
+            await session.commit()
+
+        info_before = UserLevels(
+            guild_id=guild_id,
+            user_id=member_id,
+            total_xp=info.total_xp - amount,
+            current_xp=previous_current_xp,
+            xp_to_next_level=previous_xp_to_next_level,
+            level=previous_level,
+            theme_name=info.theme_name
+        )
+        return info_before, info
+
+    async def award_xp(self, message: Message, amount: int) -> tuple[UserLevels, UserLevels]:
+        """Awards the specified amount of XP to the author of the message.
+
+        Dispatches ``pidroid_level_up`` event if the author levelled up, without querying their level again.
+
+        Returns the level information from before and after the award."""
 
         # We only award XP to messages in guilds from members
         assert message.guild is not None
         assert isinstance(message.author, Member)
-        guild_id = message.guild.id
-        member_id = message.author.id
-        
-        # Acquire the level information before leveling up
-        info = await self.fetch_user_level_info(guild_id, member_id)
-        new_insert = False
-        if info is None:
-            new_insert = True
-            info = await self.insert_member_level_info(guild_id, member_id)
-
-        # Get the current information
-        original_xp = info.current_xp
-        original_level = info.level
-        original_xp_to_next_lvl = info.xp_to_next_level
-
-        # If we get no level up
-        new_xp_to_next_level = original_xp_to_next_lvl
-        new_level = original_level
-        new_xp = original_xp + amount
-
-        # Calculate the new levels
-        while True:
-            if new_xp >= new_xp_to_next_level:
-                new_level = new_level + 1
-                # https://github.com/Mee6/Mee6-documentation/blob/master/docs/levels_xp.md
-                new_xp = new_xp - new_xp_to_next_level
-                new_xp_to_next_level = 5 * (new_level ** 2) + (50 * new_level) + 100
-            else:
-                break
+        info_before, info = await self.award_member_xp(message.guild.id, message.author.id, amount)
+
+        # Total XP being equal to the amount means that the entry was just created
+        if info.total_xp == amount or info.level != info_before.level:
+            self.client.dispatch(
+                'pidroid_level_up',
+                message.author,
+                message,
+                info_before,
+                info
+            )
+        return info_before, info
+
+    async def upsert_member_levels(self, entries: Sequence[PendingXP]) -> None:
+        """Writes accumulated XP awards to the database in a single statement.
+
+        Every entry has to be for a different member. Award amounts are added to the stored total XP and level progression
+        is recalculated from the resulting total."""
+        if not entries:
+            return
+
+        # Entries are sent as one array per column, so the amount of parameters does not grow with the entries
+        rows = func.unnest(
+            literal([entry.guild_id for entry in entries], ARRAY(BigInteger)),
+            literal([entry.user_id for entry in entries], ARRAY(BigInteger)),
+            literal([entry.amount for entry in entries], ARRAY(BigInteger)),
+            literal([entry.state.current_xp for entry in entries], ARRAY(BigInteger)),
+            literal([entry.state.xp_to_next_level for entry in entries], ARRAY(BigInteger)),
+            literal([entry.state.level for entry in entries], ARRAY(BigInteger))
+        ).table_valued("guild_id", "user_id", "total_xp", "current_xp", "xp_to_next_level", "level").render_derived()
+
+        insert_stmt = pg_insert(UserLevels).from_select(
+            ["guild_id", "user_id", "total_xp", "current_xp", "xp_to_next_level", "level"],
+            select(
+                rows.c.guild_id, rows.c.user_id, rows.c.total_xp,
+                rows.c.current_xp, rows.c.xp_to_next_level, rows.c.level
+            )
+        )
+        new_total_xp = UserLevels.total_xp + insert_stmt.excluded.total_xp
+        upsert_stmt = insert_stmt.on_conflict_do_update(
+            index_elements=[UserLevels.guild_id, UserLevels.user_id],
+            set_=dict(
+                total_xp=new_total_xp,
+                **level_progress_columns(new_total_xp)
+            )
+        )
+        async with self.session() as session: 
+            async with session.begin():
+                _ = await session.execute(upsert_stmt)
+            await session.commit()
 
+    async def import_member_levels(
+        self,
+        guild_id: int,
+        user_ids: npt.NDArray[np.int64],
+        total_xp: npt.NDArray[np.int64]
+    ) -> int:
+        """Sets the total XP of the specified members, creating missing entries, in a single statement.
+
+        User IDs must be unique. Level progression is computed for all members at once.
+
+        Returns the amount of written entries."""
+        if len(user_ids) == 0:
+            return 0
+
+        levels, current_xp, xp_to_next_level = get_level_progress_array(total_xp)
+        rows = func.unnest(
+            literal(user_ids.tolist(), ARRAY(BigInteger)),
+            literal(total_xp.tolist(), ARRAY(BigInteger)),
+            literal(current_xp.tolist(), ARRAY(BigInteger)),
+            literal(xp_to_next_level.tolist(), ARRAY(BigInteger)),
+            literal(levels.tolist(), ARRAY(BigInteger))
+        ).table_valued("user_id", "total_xp", "current_xp", "xp_to_next_level", "level").render_derived()
+
+        insert_stmt = pg_insert(UserLevels).from_select(
+            ["guild_id", "user_id", "total_xp", "current_xp", "xp_to_next_level", "level"],
+            select(
+                literal(guild_id, BigInteger),
+                rows.c.user_id, rows.c.total_xp, rows.c.current_xp, rows.c.xp_to_next_level, rows.c.level
+            )
+        )
+        upsert_stmt = insert_stmt.on_conflict_do_update(
+            index_elements=[UserLevels.guild_id, UserLevels.user_id],
+            set_=dict(
+                total_xp=insert_stmt.excluded.total_xp,
+                current_xp=insert_stmt.excluded.current_xp,
+                xp_to_next_level=insert_stmt.excluded.xp_to_next_level,
+                level=insert_stmt.excluded.level
+            )
+        )
+        async with self.session() as session: 
+            async with session.begin():
+                _ = await session.execute(upsert_stmt)
+            await session.commit()
+        return len(user_ids)
+
+    async def recompute_guild_levels(self, guild_id: int, xp_scale: float = 1.0) -> int:
+        """Recomputes level progression of every member in the guild in a single transaction.
+
+        If XP scale is specified, total XP of every member is multiplied by it beforehand.
+
+        Returns the amount of updated entries."""
         async with self.session() as session: 
             async with session.begin():
+                result = await session.execute(
+                    select(UserLevels.id, UserLevels.total_xp).
+                    filter(UserLevels.guild_id == guild_id).
+                    with_for_update()
+                )
+                entries = result.fetchall()
+                if not entries:
+                    return 0
+
+                ids = np.fromiter((e[0] for e in entries), dtype=np.int64, count=len(entries))
+                total_xp = np.fromiter((e[1] for e in entries), dtype=np.int64, count=len(entries))
+                if xp_scale != 1.0:
+                    total_xp = np.floor(total_xp * xp_scale).astype(np.int64)
+                levels, current_xp, xp_to_next_level = get_level_progress_array(total_xp)
+
+                rows = func.unnest(
+                    literal(ids.tolist(), ARRAY(BigInteger)),
+                    literal(total_xp.tolist(), ARRAY(BigInteger)),
+                    literal(current_xp.tolist(), ARRAY(BigInteger)),
+                    literal(xp_to_next_level.tolist(), ARRAY(BigInteger)),
+                    literal(levels.tolist(), ARRAY(BigInteger))
+                ).table_valued("id", "total_xp", "current_xp", "xp_to_next_level", "level").render_derived()
+
                 _ = await session.execute(
                     update(UserLevels).
-                    filter(
-                        UserLevels.guild_id == guild_id,
-                        UserLevels.user_id == member_id
-                    ).values(
-                        current_xp=new_xp,
-                        xp_to_next_level=new_xp_to_next_level,
-                        total_xp=UserLevels.total_xp + amount,
-                        level=new_level
+                    where(UserLevels.id == rows.c.id).
+                    values(
+                        total_xp=rows.c.total_xp,
+                        current_xp=rows.c.current_xp,
+                        xp_to_next_level=rows.c.xp_to_next_level,
+                        level=rows.c.level
                     )
                 )
             await session.commit()
-
-        if new_insert or new_level != original_level:
-            self.client.dispatch(
-                'pidroid_level_up',
-                message.author,
-                message,
-                info,
-                await self.fetch_user_level_info(guild_id, member_id)
-            )
+        return len(entries)
 
     """Role change queue management in postgres database"""
 
@@ -946,35 +1400,228 @@ class API:
                 session.add(entry)
             await session.commit()
 
-    async def fetch_role_changes(self, guild_id: int) -> list[MemberRoleChanges]:
-        """Returns a list of pending role changes in the guild."""
-        async with self.session() as session: 
-            statement = select(
-                func.array_agg(RoleChangeQueue.id).label('ids'),
-                RoleChangeQueue.member_id,
-                func.array_agg(RoleChangeQueue.role_id).filter(RoleChangeQueue.action == 1).label('role_added'),
-                func.array_agg(RoleChangeQueue.role_id).filter(RoleChangeQueue.action == 0).label('role_removed')
-            ).where(
-                RoleChangeQueue.guild_id == guild_id
-            ).group_by(
-                RoleChangeQueue.member_id
+    async def insert_role_changes(self, guild_id: int, changes: Sequence[tuple[RoleAction, int, int]]) -> None:
+        """Inserts many role changes to a queue at once.
+
+        Changes are provided as tuples of action, member ID and role ID."""
+        if not changes:
+            return
+        async with self.session() as session: 
+            async with session.begin():
+                _ = await session.execute(
+                    insert(RoleChangeQueue),
+                    [
+                        dict(
+                            action=action.value,
+                            status=RoleQueueState.enqueued.value,
+                            guild_id=guild_id,
+                            member_id=member_id,
+                            role_id=role_id
+                        )
+                        for action, member_id, role_id in changes
+                    ]
+                )
+            await session.commit()
+
+    async def claim_role_changes(self, guild_ids: list[int], limit: int = 1000) -> list[MemberRoleChanges]:
+        """Claims the due role changes of at most the specified amount of members in the specified guilds and returns them grouped by member.
+
+        Claimed role changes are marked as processing. All role changes of a member are claimed together,
+        so multiple workers can claim role changes at the same time without editing the same member.
+        A member is skipped while any of their role changes is being processed or waits for a retry,
+        so that the role changes of a member are applied in the order they were queued.
+
+        Claimed role changes must be deleted, retried, released or dead-lettered by the claiming worker.
+        Claims which take longer than the claim timeout have to be renewed in the meantime."""
+        if not guild_ids:
+            return []
+
+        other = aliased(RoleChangeQueue)
+        member_is_blocked = exists().where(
+            other.guild_id == RoleChangeQueue.guild_id,
+            other.member_id == RoleChangeQueue.member_id,
+            or_(
+                other.status == RoleQueueState.processing.value,
+                and_(other.status == RoleQueueState.enqueued.value, other.date_available > func.now())
             )
-            result = await session.execute(statement)
+        )
+        is_claimable = and_(
+            RoleChangeQueue.status == RoleQueueState.enqueued.value,
+            RoleChangeQueue.date_available <= func.now(),
+            ~member_is_blocked
+        )
+        candidates = (
+            select(RoleChangeQueue.guild_id, RoleChangeQueue.member_id).
+            where(RoleChangeQueue.guild_id.in_(guild_ids), is_claimable).
+            group_by(RoleChangeQueue.guild_id, RoleChangeQueue.member_id).
+            order_by(func.min(RoleChangeQueue.id)).
+            limit(limit).
+            subquery()
+        )
+        # The lock is held until the end of the transaction, a member locked by another worker is skipped.
+        # It is keyed by the member ID only, so a member is claimed by one worker at a time across guilds.
+        lock_members = (
+            select(candidates.c.guild_id, candidates.c.member_id).
+            where(func.pg_try_advisory_xact_lock(candidates.c.member_id))
+        )
 
-        changes = []
-        for row in result.fetchall():
-            ids, member_id, roles_added, roles_removed = row
-            obj = MemberRoleChanges(self, guild_id, member_id, ids, roles_added, roles_removed)
-            changes.append(obj)
-        return changes
+        async with self.session() as session: 
+            async with session.begin():
+                result = await session.execute(lock_members)
+                members = [tuple(row) for row in result.fetchall()]
+                rows = []
+                if members:
+                    # Checked again as the candidates could have been claimed before their locks were taken
+                    result = await session.execute(
+                        update(RoleChangeQueue).
+                        where(
+                            tuple_(RoleChangeQueue.guild_id, RoleChangeQueue.member_id).in_(members),
+                            is_claimable
+                        ).
+                        values(status=RoleQueueState.processing.value, date_claimed=func.now()).
+                        returning(
+                            RoleChangeQueue.id, RoleChangeQueue.guild_id, RoleChangeQueue.member_id,
+                            RoleChangeQueue.action, RoleChangeQueue.role_id
+                        )
+                    )
+                    rows = sorted(result.fetchall())
+            await session.commit()
+
+        grouped: dict[tuple[int, int], tuple[list[int], list[int], list[int]]] = {}
+        for row_id, guild_id, member_id, action, role_id in rows:
+            ids, roles_added, roles_removed = grouped.setdefault((guild_id, member_id), ([], [], []))
+            ids.append(row_id)
+            if action == RoleAction.add.value:
+                roles_added.append(role_id)
+            else:
+                roles_removed.append(role_id)
+
+        return [
+            MemberRoleChanges(guild_id, member_id, ids, roles_added, roles_removed)
+            for (guild_id, member_id), (ids, roles_added, roles_removed) in grouped.items()
+        ]
     
+    async def renew_role_change_claims(self, ids: list[int]) -> None:
+        """Refreshes the claim time of role changes for specified IDs which are still being processed.
+
+        Prevents the role changes from being reset as stale while the claiming worker is still applying them."""
+        if not ids:
+            return
+        async with self.session() as session: 
+            async with session.begin():
+                _ = await session.execute(
+                    update(RoleChangeQueue).
+                    filter(
+                        RoleChangeQueue.id.in_(ids),
+                        RoleChangeQueue.status == RoleQueueState.processing.value
+                    ).
+                    values(date_claimed=func.now())
+                )
+            await session.commit()
+
     async def delete_role_changes(self, ids: list[int]):
         """Removes role changes for specified IDs from the queue."""
+        if not ids:
+            return
         async with self.session() as session: 
             async with session.begin():
                 _ = await session.execute(delete(RoleChangeQueue).filter(RoleChangeQueue.id.in_(ids)))
             await session.commit()
 
+    async def retry_role_changes(self, ids: list[int], error: str) -> None:
+        """Returns failed role changes for specified IDs to the queue with an exponential backoff.
+
+        Role changes which reached the maximum attempt count are dead-lettered instead."""
+        if not ids:
+            return
+        attempts = RoleChangeQueue.attempts + 1
+        backoff = func.least(
+            literal(ROLE_CHANGE_RETRY_DELAY, Interval) * func.power(2, RoleChangeQueue.attempts),
+            literal(ROLE_CHANGE_MAX_RETRY_DELAY, Interval)
+        )
+        async with self.session() as session: 
+            async with session.begin():
+                _ = await session.execute(
+                    update(RoleChangeQueue).
+                    filter(RoleChangeQueue.id.in_(ids)).
+                    values(
+                        status=case(
+                            (attempts >= MAX_ROLE_CHANGE_ATTEMPTS, RoleQueueState.failed.value),
+                            else_=RoleQueueState.enqueued.value
+                        ),
+                        attempts=attempts,
+                        date_available=func.now() + backoff,
+                        date_claimed=None,
+                        last_error=error
+                    )
+                )
+            await session.commit()
+
+    async def release_role_changes(self, ids: list[int], delay: datetime.timedelta) -> None:
+        """Returns role changes for specified IDs to the queue after the specified delay without counting an attempt."""
+        if not ids:
+            return
+        async with self.session() as session: 
+            async with session.begin():
+                _ = await session.execute(
+                    update(RoleChangeQueue).
+                    filter(RoleChangeQueue.id.in_(ids)).
+                    values(
+                        status=RoleQueueState.enqueued.value,
+                        date_available=func.now() + literal(delay, Interval),
+                        date_claimed=None
+                    )
+                )
+            await session.commit()
+
+    async def dead_letter_role_changes(self, ids: list[int], error: str) -> None:
+        """Marks role changes for specified IDs as failed so that they are no longer attempted."""
+        if not ids:
+            return
+        async with self.session() as session: 
+            async with session.begin():
+                _ = await session.execute(
+                    update(RoleChangeQueue).
+                    filter(RoleChangeQueue.id.in_(ids)).
+                    values(
+                        status=RoleQueueState.failed.value,
+                        attempts=RoleChangeQueue.attempts + 1,
+                        date_claimed=None,
+                        last_error=error
+                    )
+                )
+            await session.commit()
+
+    async def reset_stale_role_changes(self) -> int:
+        """Returns role changes which were claimed longer than the claim timeout ago back to the queue.
+
+        Such role changes belong to workers which stopped before finishing them.
+        The interrupted run is counted as an attempt.
+
+        Returns the amount of reset role changes."""
+        async with self.session() as session: 
+            async with session.begin():
+                result = await session.execute(
+                    update(RoleChangeQueue).
+                    filter(
+                        RoleChangeQueue.status == RoleQueueState.processing.value,
+                        RoleChangeQueue.date_claimed < func.now() - literal(ROLE_CHANGE_CLAIM_TIMEOUT, Interval)
+                    ).
+                    values(
+                        status=case(
+                            (RoleChangeQueue.attempts + 1 >= MAX_ROLE_CHANGE_ATTEMPTS, RoleQueueState.failed.value),
+                            else_=RoleQueueState.enqueued.value
+                        ),
+                        attempts=RoleChangeQueue.attempts + 1,
+                        date_claimed=None,
+                        last_error="Claim timed out"
+                    ).
+                    returning(RoleChangeQueue.id)
+                )
+                reset_count = len(result.fetchall())
+            await session.commit()
+        return reset_count
+
     """Remind me related"""
 
     async def insert_reminder(
@@ -999,7 +1646,10 @@ class API:
                     date_remind=date_remind,
                 )
                 session.add(entry)
+                await session.flush()
+                job = await self.__add_scheduled_job(session, JobType.reminder, entry.id, date_remind)
             await session.commit()
+        self.client.scheduler.notify(job)
         return entry.id
 
     async def fetch_reminder(self, *, row: int) -> Reminder | None:
@@ -1033,6 +1683,7 @@ class API:
         async with self.session() as session: 
             async with session.begin():
                 _ = await session.execute(delete(Reminder).filter(Reminder.id==row))
+                await self.__delete_scheduled_job(session, JobType.reminder, row)
             await session.commit()
 
     """TheoTown backend related"""
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import asyncio
+
+from typing import Awaitable, Callable, Generic, TypeVar
+
+ItemT = TypeVar('ItemT')
+ResultT = TypeVar('ResultT')
+
+class BatchDispatcher(Generic[ItemT, ResultT]):
+    """This class gathers submitted items over a short window and hands them to the handler in batches.
+
+    The handler receives a list of items and has to return a list of results in the same order.
+    A batch is sent once the window passes after its first item, or as soon as it is full.
+    Up to the specified amount of batches are handled at the same time, the following ones wait.
+
+    If the handler raises an exception, it is raised to every submitter of the batch."""
+
+    def __init__(
+        self,
+        handler: Callable[[list[ItemT]], Awaitable[list[ResultT]]],
+        *,
+        window: float,
+        max_batch_size: int,
+        max_concurrent_batches: int = 1,
+        max_batch_weight: int | None = None,
+        weigh: Callable[[ItemT], int] = lambda _: 1
+    ) -> None:
+        super().__init__()
+        self.__handler = handler
+        self.__window = window
+        self.__max_batch_size = max_batch_size
+        self.__max_batch_weight = max_batch_weight
+        self.__weigh = weigh
+        self.__slots = asyncio.Semaphore(max_concurrent_batches)
+        self.__pending: list[tuple[ItemT, asyncio.Future[ResultT]]] = []
+        self.__pending_weight = 0
+        self.__flush_task: asyncio.Task[None] | None = None
+        self.__tasks: set[asyncio.Task[None]] = set()
+
+    @property
+    def pending_count(self) -> int:
+        """Returns the amount of items waiting for their batch to be sent."""
+        return len(self.__pending)
+
+    @property
+    def running_count(self) -> int:
+        """Returns the amount of batches which are sent or waiting for a free slot."""
+        return len(self.__tasks)
+
+    async def submit(self, item: ItemT) -> ResultT:
+        """Adds the item to the next batch and returns its result once the batch is handled."""
+        weight = self.__weigh(item)
+        # Send the gathered items first if the item would not fit with them
+        if self.__max_batch_weight is not None and self.__pending_weight + weight > self.__max_batch_weight:
+            self.__dispatch()
+
+        future: asyncio.Future[ResultT] = asyncio.get_running_loop().create_future()
+        self.__pending.append((item, future))
+        self.__pending_weight += weight
+
+        if len(self.__pending) >= self.__max_batch_size:
+            self.__dispatch()
+        elif self.__flush_task is None:
+            self.__flush_task = asyncio.create_task(self.__flush_after_window())
+        return await future
+
+    async def __flush_after_window(self) -> None:
+        await asyncio.sleep(self.__window)
+        self.__flush_task = None
+        self.__dispatch()
+
+    def __dispatch(self) -> None:
+        """Starts handling the gathered items as a batch."""
+        if self.__flush_task is not None:
+            _ = self.__flush_task.cancel()
+            self.__flush_task = None
+
+        batch, self.__pending = self.__pending, []
+        self.__pending_weight = 0
+        if not batch:
+            return
+        task = asyncio.create_task(self.__run(batch))
+        self.__tasks.add(task)
+        task.add_done_callback(self.__tasks.discard)
+
+    async def __run(self, batch: list[tuple[ItemT, asyncio.Future[ResultT]]]) -> None:
+        try:
+            async with self.__slots:
+                results = await self.__handler([item for item, _ in batch])
+            if len(results) != len(batch):
+                raise ValueError(f"Handler returned {len(results)} results for {len(batch)} items")
+        except asyncio.CancelledError:
+            for _, future in batch:
+                _ = future.cancel()
+            raise
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            # The submitter might have been cancelled in the meantime
+            if not future.done():
+                future.set_result(result)
+
+    def close(self) -> None:
+        """Cancels the gathered items and the batches which are being handled."""
+        if self.__flush_task is not None:
+            _ = self.__flush_task.cancel()
+            self.__flush_task = None
+        for _, future in self.__pending:
+            _ = future.cancel()
+        self.__pending.clear()
+        self.__pending_weight = 0
+        for task in self.__tasks:
+            _ = task.cancel()
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+from collections import OrderedDict
+from typing import Awaitable, Callable, Generic, Hashable, NamedTuple, TypeVar
+
+KeyT = TypeVar('KeyT', bound=Hashable)
+ValueT = TypeVar('ValueT')
+
+class CacheStatistics(NamedTuple):
+    hits: int
+    misses: int
+    size: int
+
+    @property
+    def hit_ratio(self) -> float:
+        """Returns the ratio of lookups which were answered from the cache."""
+        total = self.hits + self.misses
+        if total == 0:
+            return 0.0
+        return self.hits / total
+
+class TTLCache(Generic[KeyT, ValueT]):
+    """This class implements a size bounded cache whose entries expire after some time.
+
+    A None value means that the value does not exist. It is cached too, for its own,
+    usually shorter, time to live, so that missing values are not looked up over and over.
+
+    Concurrent loads of the same key are coalesced into a single call of the loader.
+    A load which is in progress while its key is invalidated does not cache its result."""
+
+    def __init__(
+        self,
+        *,
+        max_size: int,
+        ttl: float,
+        negative_ttl: float | None = None,
+        clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        super().__init__()
+        self.__max_size = max_size
+        self.__ttl = ttl
+        self.__negative_ttl = ttl if negative_ttl is None else negative_ttl
+        self.__clock = clock
+        # Values with their expiry times, kept in least recently used order
+        self.__entries: OrderedDict[KeyT, tuple[float, ValueT | None]] = OrderedDict()
+        self.__loading: dict[KeyT, asyncio.Future[ValueT | None]] = {}
+        self.__hits = 0
+        self.__misses = 0
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    @property
+    def statistics(self) -> CacheStatistics:
+        """Returns the hit and miss counters of the cache."""
+        return CacheStatistics(self.__hits, self.__misses, len(self.__entries))
+
+    def lookup(self, key: KeyT) -> tuple[bool, ValueT | None]:
+        """Returns whether the key is cached and its value.
+
+        The value is None if the key is cached as missing."""
+        entry = self.__entries.get(key)
+        if entry is None:
+            return False, None
+        if entry[0] <= self.__clock():
+            del self.__entries[key]
+            return False, None
+        self.__entries.move_to_end(key)
+        return True, entry[1]
+
+    def set(self, key: KeyT, value: ValueT | None) -> None:
+        """Caches the value, None caches the key as missing."""
+        ttl = self.__negative_ttl if value is None else self.__ttl
+        self.__entries[key] = (self.__clock() + ttl, value)
+        self.__entries.move_to_end(key)
+        while len(self.__entries) > self.__max_size:
+            _ = self.__entries.popitem(last=False)
+
+    def invalidate(self, key: KeyT) -> None:
+        """Removes the key from the cache.
+
+        A load of the key which is in progress could have read the value from before the change,
+        so it is forgotten and the following lookups load the value again."""
+        _ = self.__entries.pop(key, None)
+        _ = self.__loading.pop(key, None)
+
+    def clear(self) -> None:
+        """Removes every entry from the cache."""
+        self.__entries.clear()
+        self.__loading.clear()
+
+    async def get_or_load(self, key: KeyT, loader: Callable[[], Awaitable[ValueT | None]]) -> ValueT | None:
+        """Returns the cached value or loads it with the loader.
+
+        If the loader raises an exception, nothing is cached and the exception
+        is raised to every caller waiting for the key. The same goes for cancellation."""
+        found, value = self.lookup(key)
+        if found:
+            self.__hits += 1
+            return value
+
+        # Another caller is already loading the same key
+        pending = self.__loading.get(key)
+        if pending is not None:
+            self.__hits += 1
+            return await asyncio.shield(pending)
+
+        self.__misses += 1
+        future: asyncio.Future[ValueT | None] = asyncio.get_running_loop().create_future()
+        self.__loading[key] = future
+        try:
+            value = await loader()
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved, in case nobody else was waiting
+            _ = future.exception()
+            raise
+        else:
+            # Only cache the value if the key was not invalidated while it was loading
+            if self.__loading.get(key) is future:
+                self.set(key, value)
+            future.set_result(value)
+            return value
+        finally:
+            if self.__loading.get(key) is future:
+                del self.__loading[key]
+            # The loading caller was cancelled
+            if not future.done():
+                _ = future.cancel()
@@ -1,6 +1,7 @@
 import dill
 import logging
 import os
+import time
 
 from discord.ext import commands
 
@@ -29,3 +30,65 @@ def load_command_cooldowns(command: commands.Command, filename: str) -> None:
         with open(cooldown_file, "rb") as f:
             command._buckets._cache = dill.load(f) # nosec
 
+
+class MemberCooldowns:
+    """This class tracks members which are on a fixed duration cooldown, such as the XP cooldown.
+
+    Every guild maps member IDs to the monotonic time when their cooldown ends.
+    Since the duration is the same for every member, entries are kept in expiry order
+    and expired ones can be swept from the front without scanning the rest."""
+
+    __slots__ = ('__duration', '__guilds')
+
+    def __init__(self, duration: float) -> None:
+        super().__init__()
+        self.__duration = duration
+        self.__guilds: dict[int, dict[int, float]] = {}
+
+    def __len__(self) -> int:
+        return sum(len(members) for members in self.__guilds.values())
+
+    def is_on_cooldown(self, guild_id: int, user_id: int) -> bool:
+        """Returns true if the member is on a cooldown."""
+        members = self.__guilds.get(guild_id)
+        if members is None:
+            return False
+        expires = members.get(user_id)
+        return expires is not None and expires > time.monotonic()
+
+    def try_acquire(self, guild_id: int, user_id: int) -> bool:
+        """Puts the member on a cooldown if they are not on one already.
+
+        Returns true if the member was not on a cooldown."""
+        now = time.monotonic()
+        members = self.__guilds.get(guild_id)
+        if members is None:
+            members = self.__guilds[guild_id] = {}
+
+        expires = members.get(user_id)
+        if expires is not None:
+            if expires > now:
+                return False
+            # Re-inserting the entry at the end keeps the dictionary sorted by expiry time
+            del members[user_id]
+
+        members[user_id] = now + self.__duration
+        return True
+
+    def sweep(self) -> int:
+        """Removes expired cooldowns and returns the amount of removed entries."""
+        now = time.monotonic()
+        removed = 0
+        for guild_id in list(self.__guilds):
+            members = self.__guilds[guild_id]
+            expired: list[int] = []
+            for user_id, expires in members.items():
+                if expires > now:
+                    break
+                expired.append(user_id)
+            for user_id in expired:
+                del members[user_id]
+            removed += len(expired)
+            if not members:
+                del self.__guilds[guild_id]
+        return removed
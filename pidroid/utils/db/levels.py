@@ -1,10 +1,12 @@
 from typing import override
 from discord import Colour
-from sqlalchemy import BigInteger, Text, func, select
+from sqlalchemy import ARRAY, BigInteger, ColumnElement, Index, Text, UniqueConstraint, bindparam, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.expression import Grouping
 from sqlalchemy.orm import Mapped, mapped_column
 
 from pidroid.utils.db.base import Base
+from pidroid.utils.levels import LEVEL_XP_THRESHOLDS_LIST, MAX_LEVEL, LevelProgress, get_level_progress
 
 COLOUR_BINDINGS = {
     "blue": (":blue_square:", "#55acee"),
@@ -17,8 +19,26 @@ COLOUR_BINDINGS = {
     "yellow": (":yellow_square:", "#fdcb58"), 
 }
 
+# The threshold table is sent once per statement and referenced by every level expression
+LEVEL_XP_THRESHOLDS_SQL = Grouping(
+    bindparam("level_xp_thresholds", LEVEL_XP_THRESHOLDS_LIST, type_=ARRAY(BigInteger))
+)
+
+def level_progress_columns(total_xp: ColumnElement[int]) -> dict[str, ColumnElement[int]]:
+    """Returns SQL expressions computing level, current XP and XP to next level from the total XP expression."""
+    # width_bucket performs a binary search over the thresholds, Postgres arrays are 1-indexed
+    bucket = func.least(func.width_bucket(total_xp, LEVEL_XP_THRESHOLDS_SQL), MAX_LEVEL + 1)
+    return dict(
+        level=bucket - 1,
+        current_xp=total_xp - LEVEL_XP_THRESHOLDS_SQL[bucket],
+        xp_to_next_level=LEVEL_XP_THRESHOLDS_SQL[bucket + 1] - LEVEL_XP_THRESHOLDS_SQL[bucket]
+    )
+
 class UserLevels(Base):
     __tablename__ = "UserLevels"
+    __table_args__ = (
+        UniqueConstraint("guild_id", "user_id", name="UserLevels_guild_id_user_id_key"),
+    )
     
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True, doc="xd")
     guild_id: Mapped[int] = mapped_column(BigInteger)
@@ -30,25 +50,24 @@ class UserLevels(Base):
     theme_name: Mapped[str | None] = mapped_column(Text, nullable=True)
 
     async def calculate_rank(self, session: AsyncSession) -> int:
-        instance = await session.merge(self)
+        """Returns the rank of the member in the guild.
 
-        # Query to calculate the rank
-        rank_subquery = (
-            select(
-                UserLevels,
-                func.rank().over(order_by=UserLevels.total_xp.desc()).label("rank")
+        Members with the same total XP share the same rank."""
+        # Served by the (guild_id, total_xp DESC) index instead of ranking the whole guild
+        result = await session.execute(
+            select(func.count()).
+            select_from(UserLevels).
+            filter(
+                UserLevels.guild_id == self.guild_id,
+                UserLevels.total_xp > self.total_xp
             )
-            .filter(UserLevels.guild_id == instance.guild_id)
-            .subquery()
         )
+        return result.scalar_one() + 1
 
-        # Get the rank for the current instance
-        query = (
-            select(rank_subquery)
-            .filter(rank_subquery.c.user_id == instance.user_id)
-        )
-        result = await session.execute(query)
-        return result.scalar()
+    @property
+    def progress(self) -> LevelProgress:
+        """Returns level progression as derived from the total XP."""
+        return get_level_progress(self.total_xp)
 
     def _get_theme_bindings(self) -> tuple[str, str] | None:
         """Returns theme bindings for the current user."""
@@ -86,6 +105,8 @@ class UserLevels(Base):
     def __repr__(self) -> str:
         return f'<UserLevels guild_id={self.guild_id} user_id={self.user_id} current_level={self.level}>'
 
+Index("ix_UserLevels_guild_id_total_xp_id", UserLevels.guild_id, UserLevels.total_xp.desc(), UserLevels.id.desc())
+
 class LevelRewards(Base):
     __tablename__ = "LevelRewards"
     
@@ -100,4 +121,6 @@ class LevelRewards(Base):
 
     @override
     def __repr__(self) -> str:
-        return f'<LevelRewards id={self.id} guild_id={self.guild_id} level={self.level} role_id={self.role_id}>'
\ No newline at end of file
+        return f'<LevelRewards id={self.id} guild_id={self.guild_id} level={self.level} role_id={self.role_id}>'
+
+Index("ix_LevelRewards_guild_id", LevelRewards.guild_id)
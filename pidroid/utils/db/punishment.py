@@ -1,6 +1,6 @@
 import datetime
 
-from sqlalchemy import BigInteger, Boolean, DateTime, Text
+from sqlalchemy import BigInteger, Boolean, DateTime, Index, Text
 from sqlalchemy import func
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -37,4 +37,14 @@ class PunishmentTable(Base):
     handled: Mapped[bool] = mapped_column(Boolean, server_default="false")
     # This hides the case from visibility
     # Usually in the case of removing invalid warnings
-    visible: Mapped[bool] = mapped_column(Boolean, server_default="true")
\ No newline at end of file
+    visible: Mapped[bool] = mapped_column(Boolean, server_default="true")
+
+Index("ix_Punishments_guild_id_user_id_issue_date", PunishmentTable.guild_id, PunishmentTable.user_id, PunishmentTable.issue_date.desc())
+Index("ix_Punishments_guild_id_case_id", PunishmentTable.guild_id, PunishmentTable.case_id)
+Index("ix_Punishments_guild_id_moderator_id", PunishmentTable.guild_id, PunishmentTable.moderator_id)
+Index("ix_Punishments_user_id", PunishmentTable.user_id)
+# Allows searching cases by a part of the user name, requires the pg_trgm extension
+Index(
+    "ix_Punishments_user_name_trgm", PunishmentTable.user_name,
+    postgresql_using="gin", postgresql_ops={"user_name": "gin_trgm_ops"}
+)
@@ -1,6 +1,6 @@
 import datetime
 
-from sqlalchemy import BigInteger, DateTime, Text
+from sqlalchemy import BigInteger, DateTime, Index, Text
 from sqlalchemy import func
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -19,3 +19,5 @@ class Reminder(Base):
     content: Mapped[str] = mapped_column(Text)
     date_remind: Mapped[datetime.datetime] = mapped_column(DateTime(timezone=True))
     date_created: Mapped[datetime.datetime] = mapped_column(DateTime(timezone=True), default=func.now()) # pyright: ignore[reportAny]
+
+Index("ix_Reminders_user_id", Reminder.user_id)
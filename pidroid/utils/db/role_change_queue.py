@@ -3,16 +3,12 @@ from __future__ import annotations
 import datetime
 
 from enum import Enum
-from sqlalchemy import BigInteger, DateTime, Integer
+from sqlalchemy import BigInteger, DateTime, Index, Integer, Text
 from sqlalchemy import func
 from sqlalchemy.orm import Mapped, mapped_column
-from typing import TYPE_CHECKING
 
 from pidroid.utils.db.base import Base
 
-if TYPE_CHECKING:
-    from pidroid.utils.api import API
-
 class RoleAction(Enum):
     remove  = 0
     add     = 1
@@ -21,6 +17,17 @@ class RoleQueueState(Enum):
     enqueued = 0
     processing = 1
     finished = 2
+    failed = 3
+
+# How many times a role change is attempted before it is dead-lettered
+MAX_ROLE_CHANGE_ATTEMPTS = 5
+# Retry delay after the first failed attempt, doubled on every following attempt
+ROLE_CHANGE_RETRY_DELAY = datetime.timedelta(seconds=30)
+ROLE_CHANGE_MAX_RETRY_DELAY = datetime.timedelta(hours=1)
+# Claimed role changes are considered abandoned by their worker after this long
+ROLE_CHANGE_CLAIM_TIMEOUT = datetime.timedelta(minutes=10)
+# How often a worker renews its claims while it is still applying them
+ROLE_CHANGE_CLAIM_RENEW_INTERVAL = datetime.timedelta(minutes=2)
 
 class RoleChangeQueue(Base):
     __tablename__ = "RoleChangeQueue"
@@ -32,19 +39,25 @@ class RoleChangeQueue(Base):
     member_id: Mapped[int] = mapped_column(BigInteger)
     role_id: Mapped[int] = mapped_column(BigInteger)
     date_created: Mapped[datetime.datetime] = mapped_column(DateTime(timezone=True), default=func.now()) # pyright: ignore[reportAny]
+    attempts: Mapped[int] = mapped_column(Integer, server_default="0")
+    date_available: Mapped[datetime.datetime] = mapped_column(DateTime(timezone=True), server_default=func.now()) # pyright: ignore[reportAny]
+    date_claimed: Mapped[datetime.datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+Index("ix_RoleChangeQueue_status_date_available", RoleChangeQueue.status, RoleChangeQueue.date_available)
+# Role changes are claimed per member, which looks up the other role changes of the member
+Index("ix_RoleChangeQueue_guild_id_member_id", RoleChangeQueue.guild_id, RoleChangeQueue.member_id)
 
 class MemberRoleChanges:
 
     def __init__(
         self,
-        api: API,
         guild_id: int,
         member_id: int,
         ids: list[int],
         roles_added: list[int] | None, roles_removed: list[int] | None
     ) -> None:
         super().__init__()
-        self.__api = api
         self.__guild_id = guild_id
         self.__member_id = member_id
         self.__row_ids = ids
@@ -52,11 +65,21 @@ class MemberRoleChanges:
         self.__roles_added: set[int] = set(roles_added or [])
         self.__roles_removed: set[int] = set(roles_removed or [])
 
+    @property
+    def guild_id(self) -> int:
+        """Returns the ID of the guild."""
+        return self.__guild_id
+
     @property
     def member_id(self) -> int:
         """Returns the ID of the member."""
         return self.__member_id
 
+    @property
+    def row_ids(self) -> list[int]:
+        """Returns a list of queue row IDs that make up the member changes."""
+        return self.__row_ids
+
     @property
     def roles_added(self) -> list[int]:
         """Returns a list of role IDs that are queued to be added."""
@@ -65,9 +88,4 @@ class MemberRoleChanges:
     @property
     def roles_removed(self) -> list[int]:
         """Returns a list of role IDs that are queued to be removed."""
-        return [r for r in self.__roles_removed]
-
-    async def pop(self):
-        """Removes the member changes from the queue."""
-        #raise NotImplementedError
-        await self.__api.delete_role_changes(self.__row_ids)
\ No newline at end of file
+        return [r for r in self.__roles_removed]
\ No newline at end of file
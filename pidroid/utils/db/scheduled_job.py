@@ -0,0 +1,29 @@
+import datetime
+
+from enum import Enum
+from sqlalchemy import BigInteger, DateTime, Index, Integer, Text, UniqueConstraint
+from sqlalchemy import func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from pidroid.utils.db.base import Base
+
+class JobType(Enum):
+    reminder = "reminder"
+    expiring_thread = "expiring_thread"
+    punishment_expiry = "punishment_expiry"
+
+class ScheduledJob(Base):
+    __tablename__ = "ScheduledJobs"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    job_type: Mapped[str] = mapped_column(Text) # JobType
+    ref_id: Mapped[int] = mapped_column(BigInteger) # ID of the row that the job handler acts upon
+    date_due: Mapped[datetime.datetime] = mapped_column(DateTime(timezone=True))
+    attempts: Mapped[int] = mapped_column(Integer, server_default="0")
+    date_created: Mapped[datetime.datetime] = mapped_column(DateTime(timezone=True), default=func.now()) # pyright: ignore[reportAny]
+
+    __table_args__ = (
+        UniqueConstraint("job_type", "ref_id", name="ScheduledJobs_job_type_ref_id_key"),
+    )
+
+Index("ix_ScheduledJobs_date_due", ScheduledJob.date_due)
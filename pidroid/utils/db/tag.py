@@ -1,6 +1,6 @@
 import datetime
 
-from sqlalchemy import ARRAY, BigInteger, Boolean, DateTime, Text
+from sqlalchemy import ARRAY, BigInteger, Boolean, DateTime, Index, Text
 from sqlalchemy import func
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -17,3 +17,5 @@ class TagTable(Base):
     aliases: Mapped[list[str]] = mapped_column(ARRAY(Text), server_default="{}")
     locked: Mapped[bool] = mapped_column(Boolean, server_default="false")
     date_created: Mapped[datetime.datetime] = mapped_column(DateTime(timezone=True), default=func.now()) # pyright: ignore[reportAny]
+
+Index("ix_Tags_guild_id_lower_name", TagTable.guild_id, func.lower(TagTable.name))
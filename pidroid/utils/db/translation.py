@@ -1,12 +1,25 @@
-from sqlalchemy import Integer, Text
+import hashlib
+
+from sqlalchemy import Index, Integer, LargeBinary, Text
 from sqlalchemy.orm import Mapped, mapped_column
 
 from pidroid.utils.db.base import Base
 
+def normalize_translation_content(content: str) -> str:
+    """Returns the content lowercased and with whitespace collapsed, so that trivially different messages share a translation."""
+    return " ".join(content.split()).lower()
+
+def hash_translation_content(content: str) -> bytes:
+    """Returns the SHA-256 digest of the normalized content, which translations are looked up by."""
+    return hashlib.sha256(normalize_translation_content(content).encode("utf-8")).digest()
+
 class Translation(Base):
     __tablename__ = "Translations"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    content_hash: Mapped[bytes] = mapped_column(LargeBinary)
     original_content: Mapped[str] = mapped_column(Text)
     detected_language: Mapped[str] = mapped_column(Text)
     translated_string: Mapped[str] = mapped_column(Text)
+
+Index("ix_Translations_content_hash", Translation.content_hash, unique=True)
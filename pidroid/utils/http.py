@@ -98,7 +98,7 @@ async def get(client: Pidroid, url: str, headers: dict | None = None, cookies: d
     assert client.session is not None
     return client.session.get(url, headers=headers, cookies=cookies, timeout=ClientTimeout(timeout))
 
-async def post(client: Pidroid, url: str, data: Union[dict, str], headers: dict | None = None, cookies: dict | None = None, timeout: int = 30):
+async def post(client: Pidroid, url: str, data: Union[dict, str, list[tuple[str, str]]], headers: dict | None = None, cookies: dict | None = None, timeout: int = 30):
     """Sends a POST request to the specified URL."""
     assert client.session is not None
     return client.session.post(url, data=data, headers=headers, cookies=cookies, timeout=ClientTimeout(timeout))
@@ -0,0 +1,221 @@
+"""
+This module contains definitions of the XP curve used by the levelling system.
+
+Cumulative XP thresholds are precomputed once, which allows going from total XP straight to
+level progression with a binary search instead of stepping through every level.
+
+https://github.com/Mee6/Mee6-documentation/blob/master/docs/levels_xp.md
+"""
+
+import array
+import bisect
+import csv
+import json
+import numpy as np
+import numpy.typing as npt
+
+from typing import Callable, Generic, Iterable, NamedTuple, TypeVar
+
+# The highest level that the precomputed tables account for
+MAX_LEVEL = 1000
+
+class LevelProgress(NamedTuple):
+    level: int
+    current_xp: int
+    xp_to_next_level: int
+
+def xp_to_next_level(level: int) -> int:
+    """Returns the amount of XP required to go from the specified level to the next one."""
+    return 5 * (level ** 2) + (50 * level) + 100
+
+def _compute_level_thresholds(max_level: int) -> npt.NDArray[np.int64]:
+    """Returns an array of cumulative XP required to reach every level up to and including max_level + 1."""
+    levels = np.arange(max_level + 1, dtype=np.int64)
+    thresholds = np.zeros(max_level + 2, dtype=np.int64)
+    thresholds[1:] = np.cumsum(5 * levels ** 2 + 50 * levels + 100)
+    return thresholds
+
+# The total XP required to reach a level, indexed by level
+LEVEL_XP_THRESHOLDS = _compute_level_thresholds(MAX_LEVEL)
+# Plain integer copy of the thresholds for scalar lookups and database parameters
+LEVEL_XP_THRESHOLDS_LIST: list[int] = LEVEL_XP_THRESHOLDS.tolist()
+
+def total_xp_for_level(level: int) -> int:
+    """Returns the total XP required to reach the specified level."""
+    return LEVEL_XP_THRESHOLDS_LIST[level]
+
+def get_level_progress(total_xp: int) -> LevelProgress:
+    """Returns the level, XP in the current level and XP required for the next level for the total XP."""
+    level = min(max(bisect.bisect_right(LEVEL_XP_THRESHOLDS_LIST, total_xp) - 1, 0), MAX_LEVEL)
+    level_start = LEVEL_XP_THRESHOLDS_LIST[level]
+    return LevelProgress(
+        level=level,
+        current_xp=total_xp - level_start,
+        xp_to_next_level=LEVEL_XP_THRESHOLDS_LIST[level + 1] - level_start
+    )
+
+def get_level_progress_array(
+    total_xp: npt.ArrayLike
+) -> tuple[npt.NDArray[np.int64], npt.NDArray[np.int64], npt.NDArray[np.int64]]:
+    """Vectorized version of get_level_progress.
+
+    Returns a tuple of level, current XP and XP to next level arrays for the array of total XP."""
+    total = np.asarray(total_xp, dtype=np.int64)
+    levels = np.clip(np.searchsorted(LEVEL_XP_THRESHOLDS, total, side='right') - 1, 0, MAX_LEVEL)
+    level_start = LEVEL_XP_THRESHOLDS[levels]
+    return levels, total - level_start, LEVEL_XP_THRESHOLDS[levels + 1] - level_start
+
+RewardT = TypeVar('RewardT')
+
+class LevelRewardTable(Generic[RewardT]):
+    """This class represents level rewards of a single guild sorted by their required level.
+
+    Rewards can be any objects, their required level and role ID are read with the specified functions.
+    Reward lookups for a level are binary searches over the sorted levels."""
+
+    def __init__(
+        self,
+        rewards: Iterable[RewardT],
+        *,
+        get_level: Callable[[RewardT], int],
+        get_role_id: Callable[[RewardT], int]
+    ) -> None:
+        super().__init__()
+        self.__rewards = sorted(rewards, key=get_level)
+        self.__levels = [get_level(r) for r in self.__rewards]
+        self.__by_role = {get_role_id(r): r for r in self.__rewards}
+
+    def __len__(self) -> int:
+        return len(self.__rewards)
+
+    @property
+    def rewards(self) -> list[RewardT]:
+        """Returns a list of all rewards sorted by their required level descending."""
+        return self.__rewards[::-1]
+
+    @property
+    def role_ids(self) -> set[int]:
+        """Returns a set of role IDs of all rewards."""
+        return set(self.__by_role)
+
+    def get_by_role(self, role_id: int) -> RewardT | None:
+        """Returns the reward for the specified role."""
+        return self.__by_role.get(role_id)
+
+    def get_by_level(self, level: int) -> RewardT | None:
+        """Returns the reward which requires exactly the specified level."""
+        index = bisect.bisect_left(self.__levels, level)
+        if index < len(self.__levels) and self.__levels[index] == level:
+            return self.__rewards[index]
+        return None
+
+    def get_eligible(self, level: int) -> list[RewardT]:
+        """Returns a list of rewards available at the specified level sorted by their required level descending."""
+        index = bisect.bisect_right(self.__levels, level)
+        return self.__rewards[:index][::-1]
+
+    def get_top_eligible(self, level: int) -> RewardT | None:
+        """Returns the reward with the highest required level that is available at the specified level."""
+        index = bisect.bisect_right(self.__levels, level)
+        if index == 0:
+            return None
+        return self.__rewards[index - 1]
+
+    def get_previous(self, level: int) -> RewardT | None:
+        """Returns the closest reward which requires a lower level than the specified one."""
+        index = bisect.bisect_left(self.__levels, level)
+        if index == 0:
+            return None
+        return self.__rewards[index - 1]
+
+    def get_next(self, level: int) -> RewardT | None:
+        """Returns the closest reward which requires a higher level than the specified one."""
+        index = bisect.bisect_right(self.__levels, level)
+        if index == len(self.__rewards):
+            return None
+        return self.__rewards[index]
+
+# Largest user ID and total XP that fit into the database columns
+MAX_IMPORT_USER_ID = 2 ** 63 - 1
+# Largest total XP which is still within MAX_LEVEL, anything above would not be levelled properly
+MAX_IMPORT_TOTAL_XP = LEVEL_XP_THRESHOLDS_LIST[MAX_LEVEL + 1] - 1
+
+def _parse_import_number(value: object, name: str, maximum: int) -> int:
+    """Returns the value as a whole number between 0 and maximum.
+
+    Raises ValueError for anything else, including floats and booleans."""
+    # Booleans are integers and floats would be silently truncated by int()
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise ValueError(f"{name} must be a whole number, not {value!r}")
+    try:
+        number = int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be a whole number, not {value!r}")
+    if not 0 <= number <= maximum:
+        raise ValueError(f"{name} must be between 0 and {maximum:,}, not {number:,}")
+    return number
+
+def _parse_xp_import_row(row: object) -> tuple[int, int]:
+    """Returns user ID and total XP from a single JSON import row."""
+    if isinstance(row, dict):
+        raw_user_id = row.get("user_id", row.get("id"))
+        raw_total_xp = row.get("total_xp", row.get("xp"))
+    elif isinstance(row, (list, tuple)) and len(row) == 2:
+        raw_user_id, raw_total_xp = row
+    else:
+        raise ValueError(f"Unsupported import row: {row!r}")
+
+    if raw_user_id is None or raw_total_xp is None:
+        raise ValueError(f"Import row is missing user ID or total XP: {row!r}")
+    return (
+        _parse_import_number(raw_user_id, "User ID", MAX_IMPORT_USER_ID),
+        _parse_import_number(raw_total_xp, "Total XP", MAX_IMPORT_TOTAL_XP)
+    )
+
+def parse_xp_import(lines: Iterable[str], *, file_format: str) -> tuple[npt.NDArray[np.int64], npt.NDArray[np.int64]]:
+    """Parses a CSV or JSON level import and returns arrays of user IDs and their total XP.
+
+    CSV files must contain user ID and total XP columns, an optional header is skipped.
+    JSON files must contain a list of objects with user_id (or id) and total_xp (or xp) keys,
+    or a list of user ID and total XP pairs.
+
+    Total XP cannot be negative or above MAX_IMPORT_TOTAL_XP, which is the highest level that is tracked.
+    If the same user appears multiple times, the last entry is used.
+
+    Raises ValueError on malformed input."""
+    user_ids: array.array[int] = array.array('q')
+    total_xp: array.array[int] = array.array('q')
+
+    if file_format == "csv":
+        for index, row in enumerate(csv.reader(lines)):
+            if not row:
+                continue
+            if len(row) < 2:
+                raise ValueError(f"Row {index + 1} must contain user ID and total XP")
+            raw_user_id, raw_total_xp = row[0].strip(), row[1].strip()
+            # Skip the header
+            if index == 0 and not raw_user_id.isdigit():
+                continue
+            try:
+                user_ids.append(_parse_import_number(raw_user_id, "User ID", MAX_IMPORT_USER_ID))
+                total_xp.append(_parse_import_number(raw_total_xp, "Total XP", MAX_IMPORT_TOTAL_XP))
+            except ValueError as e:
+                raise ValueError(f"Row {index + 1} is invalid: {e}")
+    elif file_format == "json":
+        rows = json.loads("".join(lines))
+        if not isinstance(rows, list):
+            raise ValueError("JSON import must be a list of entries")
+        for row in rows:
+            user_id, xp = _parse_xp_import_row(row)
+            user_ids.append(user_id)
+            total_xp.append(xp)
+    else:
+        raise ValueError(f"Unsupported import format: {file_format}")
+
+    ids = np.frombuffer(user_ids, dtype=np.int64)
+    totals = np.frombuffer(total_xp, dtype=np.int64)
+
+    # Keep the last occurrence of every user
+    _, last_indices = np.unique(ids[::-1], return_index=True)
+    keep = np.sort(len(ids) - 1 - last_indices)
+    return ids[keep], totals[keep]
@@ -25,10 +25,13 @@ https://github.com/Rapptz/discord-ext-menus/commits/fbb8803779373357e274e1540b36
 """
 from __future__ import annotations
 
+import asyncio
 import discord
+import logging
 
+from collections import OrderedDict
 from discord.utils import format_dt
-from typing import TYPE_CHECKING, override
+from typing import TYPE_CHECKING, Generic, TypeVar, override
 
 from pidroid.models.plugins import Plugin
 from pidroid.models.punishments import Case
@@ -37,6 +40,11 @@ from pidroid.utils.embeds import PidroidEmbed
 if TYPE_CHECKING:
     from pidroid.models.view import PaginatingView
 
+logger = logging.getLogger('Pidroid')
+
+EntryT = TypeVar('EntryT')
+KeyT = TypeVar('KeyT')
+
 class PageSource:
     """An interface representing a menu page's data source for the actual menu page.
 
@@ -198,6 +206,158 @@ class ListPageSource(PageSource):
             base = page_number * self.per_page
             return self.entries[base:base + self.per_page]
 
+class KeysetPageSource(PageSource, Generic[EntryT, KeyT]):
+    """A data source which lazily fetches the pages of an ordered result set.
+
+    Pages are requested relative to the sort key of a neighbouring page, that is,
+    after the last entry of the previous page or before the first entry of the next page.
+    Pages which have no fetched neighbour are requested using an offset.
+
+    Fetched pages are kept in a least recently used cache and the page
+    following the requested one is fetched in the background.
+
+    Subclasses must implement the following methods:
+
+    - :meth:`count_entries`
+    - :meth:`fetch_entries`
+    - :meth:`get_key`
+    - :meth:`format_page`
+
+    Attributes
+    ------------
+    per_page: :class:`int`
+        How many elements are in a page.
+    """
+
+    def __init__(self, *, per_page: int, cache_size: int = 16):
+        self.per_page = per_page
+        self._entry_count = 0
+        self._max_pages = 0
+        self.__cache_size = cache_size
+        self.__pages: OrderedDict[int, list[EntryT]] = OrderedDict()
+        self.__first_keys: dict[int, KeyT] = {}
+        self.__last_keys: dict[int, KeyT] = {}
+        self.__fetching: dict[int, asyncio.Task[list[EntryT]]] = {}
+
+    async def count_entries(self) -> int:
+        """|coro|
+
+        An abstract method that returns the total amount of entries in the result set.
+
+        Subclasses must implement this.
+        """
+        raise NotImplementedError
+
+    async def fetch_entries(
+        self,
+        *,
+        after: KeyT | None,
+        before: KeyT | None,
+        offset: int,
+        limit: int
+    ) -> list[EntryT]:
+        """|coro|
+
+        An abstract method that fetches at most ``limit`` entries in the sort order of the result set.
+
+        If ``after`` is provided, the entries following the specified key must be returned.
+        If ``before`` is provided, the entries preceding the specified key must be returned.
+        Otherwise, the entries starting at ``offset`` must be returned.
+
+        Subclasses must implement this.
+        """
+        raise NotImplementedError
+
+    def get_key(self, entry: EntryT) -> KeyT:
+        """An abstract method that returns the unique sort key of the entry.
+
+        Subclasses must implement this.
+        """
+        raise NotImplementedError
+
+    @override
+    async def prepare(self):
+        self._entry_count = await self.count_entries()
+        pages, left_over = divmod(self._entry_count, self.per_page)
+        if left_over:
+            pages += 1
+        self._max_pages = pages
+
+    @property
+    def entry_count(self) -> int:
+        """Returns the amount of entries counted when the source was prepared."""
+        return self._entry_count
+
+    @override
+    def is_paginating(self):
+        """:class:`bool`: Whether pagination is required."""
+        return self._entry_count > self.per_page
+
+    @override
+    def get_max_pages(self):
+        """:class:`int`: The maximum number of pages required to paginate the result set."""
+        return self._max_pages
+
+    async def __fetch_page(self, page_number: int) -> list[EntryT]:
+        """Fetches the specified page using the nearest known page boundary."""
+        previous_key = self.__last_keys.get(page_number - 1)
+        next_key = self.__first_keys.get(page_number + 1)
+        if previous_key is not None:
+            entries = await self.fetch_entries(after=previous_key, before=None, offset=0, limit=self.per_page)
+        elif next_key is not None:
+            entries = await self.fetch_entries(after=None, before=next_key, offset=0, limit=self.per_page)
+        else:
+            entries = await self.fetch_entries(
+                after=None, before=None, offset=page_number * self.per_page, limit=self.per_page
+            )
+
+        if entries:
+            self.__first_keys[page_number] = self.get_key(entries[0])
+            self.__last_keys[page_number] = self.get_key(entries[-1])
+        self.__pages[page_number] = entries
+        while len(self.__pages) > self.__cache_size:
+            _ = self.__pages.popitem(last=False)
+        return entries
+
+    def __start_fetching(self, page_number: int) -> asyncio.Task[list[EntryT]]:
+        """Returns a task fetching the specified page, creating one if it is not being fetched yet."""
+        task = self.__fetching.get(page_number)
+        if task is None:
+            task = asyncio.create_task(self.__fetch_page(page_number))
+            self.__fetching[page_number] = task
+            task.add_done_callback(lambda t: self.__on_fetch_done(page_number, t))
+        return task
+
+    def __on_fetch_done(self, page_number: int, task: asyncio.Task[list[EntryT]]) -> None:
+        _ = self.__fetching.pop(page_number, None)
+        if not task.cancelled() and task.exception() is not None:
+            # Prefetched pages might never be awaited, the page will be fetched again when requested
+            logger.debug(f"Failed to fetch page {page_number} of {self!r}: {task.exception()}")
+
+    def prefetch(self, page_number: int) -> None:
+        """Starts fetching the specified page in the background if it is not cached."""
+        if 0 <= page_number < self._max_pages and page_number not in self.__pages:
+            _ = self.__start_fetching(page_number)
+
+    def invalidate(self) -> None:
+        """Removes all cached pages and page boundaries."""
+        self.__pages.clear()
+        self.__first_keys.clear()
+        self.__last_keys.clear()
+
+    @override
+    async def get_page(self, page_number: int) -> list[EntryT]:
+        """Returns at most :attr:`per_page` entries of the specified page.
+
+        Cached pages are returned without querying the data source."""
+        entries = self.__pages.get(page_number)
+        if entries is None:
+            entries = await self.__start_fetching(page_number)
+        else:
+            self.__pages.move_to_end(page_number)
+        self.prefetch(page_number + 1)
+        return entries
+
 """
 The following definitions are custom made for the specific use case.
 """
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import asyncio
+import datetime
+import heapq
+import itertools
+import logging
+
+from typing import Awaitable, Callable, Generic, Hashable, TypeVar
+
+from pidroid.utils.time import utcnow
+
+logger = logging.getLogger('Pidroid')
+
+ItemT = TypeVar('ItemT')
+
+def spread_overdue(
+    deadlines: list[datetime.datetime],
+    now: datetime.datetime,
+    interval: datetime.timedelta,
+    *,
+    burst: int = 1
+) -> list[datetime.datetime]:
+    """Returns the deadlines with the overdue ones spread out from now.
+
+    The first burst of overdue deadlines are kept due immediately, every following
+    overdue deadline is placed one interval after the previous one. Deadlines in the
+    future are returned unchanged, but never before the spread out ones."""
+    spread: list[datetime.datetime] = []
+    latest = now
+    overdue = 0
+    for deadline in deadlines:
+        if deadline <= now:
+            latest = now + interval * max(overdue - burst + 1, 0)
+            overdue += 1
+            spread.append(latest)
+        else:
+            spread.append(max(deadline, latest))
+    return spread
+
+class DeadlineScheduler(Generic[ItemT]):
+    """This class calls a callback for items when their deadline is reached.
+
+    Deadlines are kept in a heap and the scheduler sleeps until the nearest one,
+    waking up early only if an earlier deadline is scheduled.
+
+    Every item is identified by a key. Scheduling an item with a key that
+    is already scheduled replaces the previous deadline."""
+
+    def __init__(self, callback: Callable[[ItemT], Awaitable[None]], *, name: str = "scheduler") -> None:
+        super().__init__()
+        self.__callback = callback
+        self.__name = name
+        self.__heap: list[tuple[datetime.datetime, int, Hashable]] = []
+        self.__entries: dict[Hashable, tuple[datetime.datetime, int, ItemT]] = {}
+        self.__counter = itertools.count()
+        self.__wakeup = asyncio.Event()
+        self.__task: asyncio.Task[None] | None = None
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    @property
+    def next_deadline(self) -> datetime.datetime | None:
+        """Returns the nearest scheduled deadline."""
+        self.__discard_cancelled()
+        if self.__heap:
+            return self.__heap[0][0]
+        return None
+
+    @property
+    def last_deadline(self) -> datetime.datetime | None:
+        """Returns the furthest scheduled deadline.
+
+        Unlike the nearest deadline, this requires going through every scheduled item."""
+        if not self.__entries:
+            return None
+        return max(deadline for deadline, _, _ in self.__entries.values())
+
+    def __discard_cancelled(self) -> None:
+        """Removes heap entries which were cancelled or rescheduled from the top of the heap."""
+        while self.__heap:
+            _, sequence, key = self.__heap[0]
+            entry = self.__entries.get(key)
+            if entry is not None and entry[1] == sequence:
+                return
+            _ = heapq.heappop(self.__heap)
+
+    def schedule(self, key: Hashable, deadline: datetime.datetime, item: ItemT) -> None:
+        """Schedules the item to be handled at the deadline."""
+        sequence = next(self.__counter)
+        self.__entries[key] = (deadline, sequence, item)
+        heapq.heappush(self.__heap, (deadline, sequence, key))
+        # Wake the runner up if the new deadline is the nearest one
+        if self.__heap[0][1] == sequence:
+            self.__wakeup.set()
+
+    def cancel(self, key: Hashable) -> bool:
+        """Removes the item from the schedule. Returns true if the item was scheduled."""
+        return self.__entries.pop(key, None) is not None
+
+    def clear(self) -> None:
+        """Removes all items from the schedule."""
+        self.__entries.clear()
+        self.__heap.clear()
+
+    def pop_due(self, now: datetime.datetime | None = None) -> list[ItemT]:
+        """Removes and returns the items whose deadline was reached."""
+        now = now or utcnow()
+        items: list[ItemT] = []
+        while True:
+            self.__discard_cancelled()
+            if not self.__heap or self.__heap[0][0] > now:
+                return items
+            _, _, key = heapq.heappop(self.__heap)
+            _, _, item = self.__entries.pop(key)
+            items.append(item)
+
+    def start(self) -> None:
+        """Starts handling the scheduled items in the background."""
+        if self.__task is None or self.__task.done():
+            self.__task = asyncio.create_task(self.__run(), name=self.__name)
+
+    def stop(self) -> None:
+        """Stops handling the scheduled items. Scheduled items are kept."""
+        if self.__task is not None:
+            _ = self.__task.cancel()
+            self.__task = None
+
+    async def __run(self) -> None:
+        while True:
+            self.__wakeup.clear()
+            for item in self.pop_due():
+                try:
+                    await self.__callback(item)
+                except Exception:
+                    logger.exception(f"An exception was encountered in {self.__name} while handling {item!r}")
+
+            deadline = self.next_deadline
+            timeout = None if deadline is None else max((deadline - utcnow()).total_seconds(), 0)
+            try:
+                _ = await asyncio.wait_for(self.__wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
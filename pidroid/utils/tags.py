@@ -0,0 +1,252 @@
+"""
+This module contains the in-memory index of guild tag names.
+
+Names and aliases are kept in a single sorted list by their lowercase form, which
+allows both exact and prefix lookups with a binary search instead of a database query.
+
+Fuzzy lookups go through an inverted index of name trigrams, which narrows the
+tags down to a few candidates before they are scored more thoroughly.
+"""
+
+import bisect
+import heapq
+
+from collections import defaultdict
+from typing import Iterable, NamedTuple
+
+# Names sort before aliases with the same key, so that a name always wins over an alias
+_NAME = 0
+_ALIAS = 1
+
+# How many of the names sharing the most trigrams with the query are scored
+FUZZY_CANDIDATES = 20
+# Lowest score a fuzzy match needs to be returned
+MIN_MATCH_SCORE = 0.45
+
+class TagMatch(NamedTuple):
+    row_id: int
+    score: float
+
+def trigrams(text: str) -> frozenset[str]:
+    """Returns the trigrams of the words in the text, padded the same way as pg_trgm does."""
+    grams: set[str] = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+def edit_distance(a: str, b: str, max_distance: int) -> int | None:
+    """Returns the edit distance between the strings, counting a swap of adjacent characters as one edit.
+
+    Returns None as soon as the distance is known to be above max_distance."""
+    if abs(len(a) - len(b)) > max_distance:
+        return None
+    before_previous: list[int] = []
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            distance = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b))
+            if i > 1 and j > 1 and char_a == b[j - 2] and a[i - 2] == char_b:
+                distance = min(distance, before_previous[j - 2] + 1)
+            current.append(distance)
+        if min(current) > max_distance:
+            return None
+        before_previous, previous = previous, current
+    if previous[-1] > max_distance:
+        return None
+    return previous[-1]
+
+def score_match(query: str, key: str) -> float:
+    """Returns how well the lowercase key matches the lowercase query, from 0 to 1.
+
+    Prefix matches score above 0.8, prefixes of a later word above 0.6. Other keys are
+    scored by a mix of edit distance, shared trigrams and shared words."""
+    if key == query:
+        return 1.0
+    if key.startswith(query):
+        return 0.8 + 0.2 * len(query) / len(key)
+
+    key_words = key.split()
+    if any(word.startswith(query) for word in key_words[1:]):
+        return 0.6 + 0.2 * len(query) / len(key)
+
+    distance = edit_distance(query, key, max(1, len(query) // 3))
+    edit_similarity = 0.0 if distance is None else 1 - distance / max(len(query), len(key))
+
+    query_grams, key_grams = trigrams(query), trigrams(key)
+    trigram_similarity = 2 * len(query_grams & key_grams) / ((len(query_grams) + len(key_grams)) or 1)
+
+    query_words = set(query.split())
+    word_overlap = len(query_words.intersection(key_words)) / (len(query_words) or 1)
+
+    return 0.5 * edit_similarity + 0.3 * trigram_similarity + 0.2 * word_overlap
+
+class TagNameIndex:
+    """This class indexes the names and aliases of the tags of a single guild."""
+
+    def __init__(self, tags: Iterable[tuple[int, str, list[str]]] = ()) -> None:
+        super().__init__()
+        # Tag names and aliases by row ID
+        self.__tags: dict[int, tuple[str, list[str]]] = {}
+        # Sorted (lowercase key, kind, row ID) entries
+        self.__entries: list[tuple[str, int, int]] = []
+        # How many entries share each key and the keys containing each trigram
+        self.__key_counts: dict[str, int] = {}
+        self.__trigram_keys: defaultdict[str, set[str]] = defaultdict(set)
+        for row_id, name, aliases in tags:
+            self.__tags[row_id] = (name, aliases.copy())
+            for entry in self.__entries_of(row_id, name, aliases):
+                self.__entries.append(entry)
+                self.__index_key(entry[0])
+        self.__entries.sort()
+
+    def __len__(self) -> int:
+        return len(self.__tags)
+
+    def __contains__(self, row_id: int) -> bool:
+        return row_id in self.__tags
+
+    @staticmethod
+    def __entries_of(row_id: int, name: str, aliases: list[str]) -> list[tuple[str, int, int]]:
+        return [(name.lower(), _NAME, row_id)] + [(alias.lower(), _ALIAS, row_id) for alias in aliases]
+
+    def __index_key(self, key: str) -> None:
+        count = self.__key_counts.get(key, 0)
+        self.__key_counts[key] = count + 1
+        if count == 0:
+            for gram in trigrams(key):
+                self.__trigram_keys[gram].add(key)
+
+    def __unindex_key(self, key: str) -> None:
+        count = self.__key_counts.pop(key) - 1
+        if count > 0:
+            self.__key_counts[key] = count
+            return
+        for gram in trigrams(key):
+            keys = self.__trigram_keys[gram]
+            keys.discard(key)
+            if not keys:
+                del self.__trigram_keys[gram]
+
+    @property
+    def names(self) -> list[str]:
+        """Returns the names of all tags in alphabetical order."""
+        return [self.__tags[row_id][0] for _, kind, row_id in self.__entries if kind == _NAME]
+
+    def get_name(self, row_id: int) -> str | None:
+        """Returns the name of the tag at the specified row."""
+        tag = self.__tags.get(row_id)
+        if tag is None:
+            return None
+        return tag[0]
+
+    def get_aliases(self, row_id: int) -> list[str]:
+        """Returns the aliases of the tag at the specified row."""
+        tag = self.__tags.get(row_id)
+        if tag is None:
+            return []
+        return tag[1].copy()
+
+    def get(self, name: str) -> int | None:
+        """Returns the row ID of the tag with the specified name or alias, ignoring case."""
+        key = name.lower()
+        i = bisect.bisect_left(self.__entries, (key,))
+        if i < len(self.__entries) and self.__entries[i][0] == key:
+            return self.__entries[i][2]
+        return None
+
+    def find_prefixed(self, prefix: str) -> list[int]:
+        """Returns the row IDs of the tags whose name or alias starts with the prefix, ignoring case.
+
+        Tags are ordered by the matching name or alias."""
+        prefix = prefix.lower()
+        rows: dict[int, None] = {}
+        for i in range(bisect.bisect_left(self.__entries, (prefix,)), len(self.__entries)):
+            key, _, row_id = self.__entries[i]
+            if not key.startswith(prefix):
+                break
+            rows[row_id] = None
+        return list(rows)
+
+    def add(self, row_id: int, name: str, aliases: list[str]) -> None:
+        """Adds the tag to the index, replacing the tag at the same row."""
+        self.remove(row_id)
+        self.__tags[row_id] = (name, aliases.copy())
+        for entry in self.__entries_of(row_id, name, aliases):
+            bisect.insort(self.__entries, entry)
+            self.__index_key(entry[0])
+
+    def remove(self, row_id: int) -> None:
+        """Removes the tag at the specified row from the index."""
+        tag = self.__tags.pop(row_id, None)
+        if tag is None:
+            return
+        for entry in self.__entries_of(row_id, *tag):
+            i = bisect.bisect_left(self.__entries, entry)
+            if i < len(self.__entries) and self.__entries[i] == entry:
+                del self.__entries[i]
+                self.__unindex_key(entry[0])
+
+    def set_aliases(self, row_id: int, aliases: list[str]) -> None:
+        """Replaces the aliases of the tag at the specified row."""
+        name = self.get_name(row_id)
+        if name is not None and self.__tags[row_id][1] != aliases:
+            self.add(row_id, name, aliases)
+
+    def __rows_of(self, key: str) -> list[tuple[int, int]]:
+        """Returns the kinds and row IDs of the entries with the specified key."""
+        rows: list[tuple[int, int]] = []
+        for i in range(bisect.bisect_left(self.__entries, (key,)), len(self.__entries)):
+            entry_key, kind, row_id = self.__entries[i]
+            if entry_key != key:
+                break
+            rows.append((kind, row_id))
+        return rows
+
+    def search(self, query: str, *, limit: int = 20) -> list[TagMatch]:
+        """Returns the tags whose name or alias best match the query, ignoring case.
+
+        Every prefix match is returned, along with the fuzzy matches among the names
+        sharing the most trigrams with the query, closest in length first. Matches are ordered from the best one,
+        a tag is only returned once, by its best scoring name or alias."""
+        query = " ".join(query.lower().split())
+        if not query:
+            return []
+
+        keys: set[str] = set()
+        for i in range(bisect.bisect_left(self.__entries, (query,)), len(self.__entries)):
+            key = self.__entries[i][0]
+            if not key.startswith(query):
+                break
+            keys.add(key)
+
+        shared: defaultdict[str, int] = defaultdict(int)
+        for gram in trigrams(query):
+            for key in self.__trigram_keys.get(gram, ()):
+                shared[key] += 1
+
+        def rank(key: str) -> tuple[int, int]:
+            # Keys of a similar length to the query come first among the ones sharing as many trigrams
+            return -shared[key], abs(len(key) - len(query))
+
+        candidates = heapq.nsmallest(FUZZY_CANDIDATES, shared, key=lambda key: (rank(key), key))
+        keys.update(candidates)
+        if len(candidates) == FUZZY_CANDIDATES:
+            # Keys ranking the same as the last candidate are scored too, instead of dropping some of them at random
+            last_rank = rank(candidates[-1])
+            keys.update(key for key in shared if rank(key) == last_rank)
+
+        # The best score, kind and key of every matching row
+        best: dict[int, tuple[float, int, str]] = {}
+        for key in keys:
+            score = score_match(query, key)
+            if score < MIN_MATCH_SCORE:
+                continue
+            for kind, row_id in self.__rows_of(key):
+                current = best.get(row_id)
+                if current is None or (-score, kind, key) < (-current[0], current[1], current[2]):
+                    best[row_id] = (score, kind, key)
+
+        ranked = sorted(best.items(), key=lambda item: (-item[1][0], item[1][1], item[1][2]))
+        return [TagMatch(row_id, score) for row_id, (score, _, _) in ranked[:limit]]
@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+
+from pidroid.utils.batching import BatchDispatcher
+
+
+def test_items_submitted_together_are_batched_in_order():
+    batches: list[list[int]] = []
+
+    async def handler(items: list[int]) -> list[int]:
+        batches.append(items)
+        return [item * 10 for item in items]
+
+    async def run():
+        dispatcher: BatchDispatcher[int, int] = BatchDispatcher(handler, window=0.01, max_batch_size=10)
+        return await asyncio.gather(*(dispatcher.submit(i) for i in range(5)))
+
+    assert asyncio.run(run()) == [0, 10, 20, 30, 40]
+    assert batches == [[0, 1, 2, 3, 4]]
+
+def test_batches_are_limited_by_size_and_weight():
+    batches: list[list[str]] = []
+
+    async def handler(items: list[str]) -> list[str]:
+        batches.append(items)
+        return items
+
+    async def run():
+        dispatcher: BatchDispatcher[str, str] = BatchDispatcher(
+            handler, window=0.01, max_batch_size=3, max_batch_weight=6, weigh=len
+        )
+        return await asyncio.gather(*(dispatcher.submit(item) for item in ["a", "b", "c", "d", "eeeee", "f"]))
+
+    assert asyncio.run(run()) == ["a", "b", "c", "d", "eeeee", "f"]
+    assert batches == [["a", "b", "c"], ["d", "eeeee"], ["f"]]
+
+def test_concurrent_batches_are_limited():
+    running = 0
+    most_running = 0
+
+    async def handler(items: list[int]) -> list[int]:
+        nonlocal running, most_running
+        running += 1
+        most_running = max(most_running, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return items
+
+    async def run():
+        dispatcher: BatchDispatcher[int, int] = BatchDispatcher(
+            handler, window=0.01, max_batch_size=1, max_concurrent_batches=2
+        )
+        return await asyncio.gather(*(dispatcher.submit(i) for i in range(6)))
+
+    assert asyncio.run(run()) == list(range(6))
+    assert most_running == 2
+
+def test_handler_failure_is_raised_to_every_submitter():
+
+    async def handler(items: list[int]) -> list[int]:
+        raise RuntimeError("request failed")
+
+    async def short_handler(items: list[int]) -> list[int]:
+        return items[1:]
+
+    async def run(handler):
+        dispatcher: BatchDispatcher[int, int] = BatchDispatcher(handler, window=0.01, max_batch_size=10)
+        return await asyncio.gather(*(dispatcher.submit(i) for i in range(3)), return_exceptions=True)
+
+    results = asyncio.run(run(handler))
+    assert all(isinstance(result, RuntimeError) for result in results)
+    results = asyncio.run(run(short_handler))
+    assert all(isinstance(result, ValueError) for result in results)
+
+def test_close_cancels_pending_items():
+
+    async def handler(items: list[int]) -> list[int]:
+        return items
+
+    async def run():
+        dispatcher: BatchDispatcher[int, int] = BatchDispatcher(handler, window=10, max_batch_size=10)
+        task = asyncio.create_task(dispatcher.submit(1))
+        await asyncio.sleep(0)
+        assert dispatcher.pending_count == 1
+        dispatcher.close()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
@@ -0,0 +1,114 @@
+import asyncio
+
+from pidroid.utils.cache import TTLCache
+
+
+class FakeClock:
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+def test_expiry_and_negative_ttl():
+    clock = FakeClock()
+    cache: TTLCache[int, str] = TTLCache(max_size=10, ttl=10, negative_ttl=60, clock=clock)
+    cache.set(1, "a")
+    cache.set(2, None)
+    assert cache.lookup(1) == (True, "a")
+    assert cache.lookup(2) == (True, None)
+
+    clock.now = 30
+    assert cache.lookup(1) == (False, None)
+    assert cache.lookup(2) == (True, None)
+
+    clock.now = 61
+    assert cache.lookup(2) == (False, None)
+    assert len(cache) == 0
+
+def test_size_bound_evicts_least_recently_used():
+    cache: TTLCache[int, int] = TTLCache(max_size=2, ttl=10)
+    cache.set(1, 1)
+    cache.set(2, 2)
+    assert cache.lookup(1) == (True, 1)
+    cache.set(3, 3)
+    assert cache.lookup(2) == (False, None)
+    assert cache.lookup(1) == (True, 1)
+    assert cache.lookup(3) == (True, 3)
+
+def test_get_or_load_coalesces_and_counts():
+    cache: TTLCache[int, str] = TTLCache(max_size=10, ttl=10)
+    calls = 0
+
+    async def loader() -> str | None:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0)
+        return None
+
+    async def run():
+        results = await asyncio.gather(*(cache.get_or_load(1, loader) for _ in range(5)))
+        assert results == [None] * 5
+        assert await cache.get_or_load(1, loader) is None
+
+    asyncio.run(run())
+    assert calls == 1
+    stats = cache.statistics
+    assert (stats.hits, stats.misses, stats.size) == (5, 1, 1)
+
+def test_get_or_load_does_not_cache_errors():
+    cache: TTLCache[int, str] = TTLCache(max_size=10, ttl=10)
+
+    async def failing() -> str | None:
+        await asyncio.sleep(0)
+        raise ValueError
+
+    async def loader() -> str | None:
+        return "a"
+
+    async def run():
+        results = await asyncio.gather(
+            cache.get_or_load(1, failing), cache.get_or_load(1, failing), return_exceptions=True
+        )
+        assert all(isinstance(r, ValueError) for r in results)
+        assert await cache.get_or_load(1, loader) == "a"
+
+    asyncio.run(run())
+    assert len(cache) == 1
+
+def test_invalidate():
+    cache: TTLCache[int, str] = TTLCache(max_size=10, ttl=10)
+    cache.set(1, "a")
+    cache.invalidate(1)
+    assert cache.lookup(1) == (False, None)
+
+def test_invalidate_during_load_does_not_cache_stale_value():
+    cache: TTLCache[int, str] = TTLCache(max_size=10, ttl=10)
+    value = "old"
+    loading = asyncio.Event()
+    release = asyncio.Event()
+
+    async def slow_loader() -> str | None:
+        # Reads the value before it is changed and returns after the invalidation
+        read = value
+        loading.set()
+        await release.wait()
+        return read
+
+    async def loader() -> str | None:
+        return value
+
+    async def run():
+        nonlocal value
+        task = asyncio.create_task(cache.get_or_load(1, slow_loader))
+        await loading.wait()
+        value = "new"
+        cache.invalidate(1)
+        # A lookup after the invalidation does not wait for the stale load
+        assert await cache.get_or_load(1, loader) == "new"
+        release.set()
+        assert await task == "old"
+        assert cache.lookup(1) == (True, "new")
+
+    asyncio.run(run())
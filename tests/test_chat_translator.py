@@ -0,0 +1,14 @@
+import urllib.parse
+
+from pidroid.services.theotown.chat_translator import form_encoded_size
+
+
+def test_form_encoded_size_matches_request_body():
+    texts = ["hello there", "Привет, как дела?", "你好，世界", "a&b=c d"]
+    body = urllib.parse.urlencode([("auth_key", "key"), ("target_lang", "EN")] + [("text", t) for t in texts])
+    assert len("auth_key=key&target_lang=EN") + sum(form_encoded_size(t) for t in texts) == len(body)
+
+def test_non_ascii_text_is_weighed_by_encoded_size():
+    text = "Привет" * 1000
+    # Every byte of a non-ASCII character is percent-encoded into three
+    assert form_encoded_size(text) == len("&text=") + 3 * len(text.encode("utf-8"))
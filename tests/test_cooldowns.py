@@ -0,0 +1,54 @@
+import pytest
+
+from pidroid.utils import cooldowns
+from pidroid.utils.cooldowns import MemberCooldowns
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> FakeClock:
+    fake = FakeClock()
+    monkeypatch.setattr(cooldowns.time, "monotonic", fake)
+    return fake
+
+def test_try_acquire(clock: FakeClock):
+    store = MemberCooldowns(60)
+    assert not store.is_on_cooldown(1, 10)
+    assert store.try_acquire(1, 10)
+    assert store.is_on_cooldown(1, 10)
+    assert not store.try_acquire(1, 10)
+    # Cooldowns are tracked per guild
+    assert store.try_acquire(2, 10)
+
+    clock.now += 60
+    assert not store.is_on_cooldown(1, 10)
+    assert store.try_acquire(1, 10)
+
+def test_sweep(clock: FakeClock):
+    store = MemberCooldowns(60)
+    assert store.try_acquire(1, 10)
+    clock.now += 30
+    assert store.try_acquire(1, 20)
+    assert store.try_acquire(2, 10)
+    assert len(store) == 3
+
+    clock.now += 30
+    assert store.sweep() == 1
+    assert len(store) == 2
+
+    # Re-acquired cooldowns move to the back of the expiry order
+    assert store.try_acquire(1, 10)
+    clock.now += 30
+    assert store.sweep() == 2
+    assert len(store) == 1
+    assert store.is_on_cooldown(1, 10)
+
+    clock.now += 30
+    assert store.sweep() == 1
+    assert len(store) == 0
@@ -0,0 +1,119 @@
+import numpy as np
+import pytest
+
+from typing import NamedTuple
+
+from pidroid.utils.levels import (
+    MAX_IMPORT_TOTAL_XP, MAX_LEVEL, LEVEL_XP_THRESHOLDS, LevelRewardTable,
+    xp_to_next_level, total_xp_for_level,
+    get_level_progress, get_level_progress_array,
+    parse_xp_import
+)
+
+def _step_levels(total_xp: int) -> tuple[int, int, int]:
+    """Reference implementation which walks the levels one by one."""
+    level, current_xp, to_next = 0, total_xp, xp_to_next_level(0)
+    while current_xp >= to_next:
+        level += 1
+        current_xp -= to_next
+        to_next = xp_to_next_level(level)
+    return level, current_xp, to_next
+
+def test_xp_to_next_level():
+    assert xp_to_next_level(0) == 100
+    assert xp_to_next_level(1) == 155
+    assert xp_to_next_level(10) == 1100
+
+def test_total_xp_for_level():
+    assert total_xp_for_level(0) == 0
+    assert total_xp_for_level(1) == 100
+    assert total_xp_for_level(2) == 255
+    assert len(LEVEL_XP_THRESHOLDS) == MAX_LEVEL + 2
+
+def test_get_level_progress():
+    assert get_level_progress(0) == (0, 0, 100)
+    assert get_level_progress(99) == (0, 99, 100)
+    assert get_level_progress(100) == (1, 0, 155)
+    assert get_level_progress(254) == (1, 154, 155)
+    for total_xp in [*range(0, 3000, 7), 123_456, 9_876_543]:
+        assert get_level_progress(total_xp) == _step_levels(total_xp)
+
+    # Levels are capped at the maximum level of the table
+    assert get_level_progress(total_xp_for_level(MAX_LEVEL + 1) * 2).level == MAX_LEVEL
+
+def test_get_level_progress_array():
+    total_xp = np.array([0, 99, 100, 254, 255, 123_456, 9_876_543])
+    levels, current_xp, to_next = get_level_progress_array(total_xp)
+    for i, value in enumerate(total_xp):
+        assert (levels[i], current_xp[i], to_next[i]) == get_level_progress(int(value))
+
+def test_parse_xp_import():
+    user_ids, total_xp = parse_xp_import(["user_id,total_xp", "1,100", "2,5", "", "1,300"], file_format="csv")
+    assert user_ids.tolist() == [2, 1]
+    assert total_xp.tolist() == [5, 300]
+
+    user_ids, total_xp = parse_xp_import(['[{"id": "5", "xp": 3}, {"user_id": 7, "total_xp": 9}, [6, 7]]'], file_format="json")
+    assert user_ids.tolist() == [5, 7, 6]
+    assert total_xp.tolist() == [3, 9, 7]
+
+    with pytest.raises(ValueError):
+        parse_xp_import(["1,abc"], file_format="csv")
+
+    with pytest.raises(ValueError):
+        parse_xp_import(["1,-5"], file_format="csv")
+
+    with pytest.raises(ValueError):
+        parse_xp_import(['{"id": 1}'], file_format="json")
+
+    with pytest.raises(ValueError):
+        parse_xp_import([], file_format="xml")
+
+def test_parse_xp_import_rejects_out_of_range_and_inexact_values():
+    assert parse_xp_import([f"1,{MAX_IMPORT_TOTAL_XP}"], file_format="csv")[1].tolist() == [MAX_IMPORT_TOTAL_XP]
+    assert get_level_progress(MAX_IMPORT_TOTAL_XP).level == MAX_LEVEL
+
+    invalid_csv = [f"1,{MAX_IMPORT_TOTAL_XP + 1}", f"{2 ** 63},5", "1,1.5", "1,99999999999999999999999"]
+    for line in invalid_csv:
+        with pytest.raises(ValueError):
+            parse_xp_import([line], file_format="csv")
+
+    invalid_json = ['[[1, 1.5]]', '[[1, true]]', '[[1.0, 5]]', f'[[{2 ** 64}, 5]]', '[[1, 10000000000000000000]]']
+    for document in invalid_json:
+        with pytest.raises(ValueError):
+            parse_xp_import([document], file_format="json")
+
+class _Reward(NamedTuple):
+    level: int
+    role_id: int
+
+def _reward_table(rewards: list[_Reward]) -> LevelRewardTable[_Reward]:
+    return LevelRewardTable(rewards, get_level=lambda r: r.level, get_role_id=lambda r: r.role_id)
+
+def test_level_reward_table():
+    table = _reward_table([_Reward(10, 3), _Reward(1, 1), _Reward(5, 2)])
+    assert len(table) == 3
+    assert [r.level for r in table.rewards] == [10, 5, 1]
+    assert table.role_ids == {1, 2, 3}
+    assert table.get_by_role(2) == _Reward(5, 2)
+    assert table.get_by_role(4) is None
+    assert table.get_by_level(5) == _Reward(5, 2)
+    assert table.get_by_level(6) is None
+
+    assert table.get_eligible(0) == []
+    assert [r.level for r in table.get_eligible(5)] == [5, 1]
+    assert [r.level for r in table.get_eligible(100)] == [10, 5, 1]
+    assert table.get_top_eligible(0) is None
+    assert table.get_top_eligible(9) == _Reward(5, 2)
+
+    assert table.get_previous(5) == _Reward(1, 1)
+    assert table.get_previous(1) is None
+    assert table.get_next(5) == _Reward(10, 3)
+    assert table.get_next(4) == _Reward(5, 2)
+    assert table.get_next(10) is None
+
+def test_empty_level_reward_table():
+    table = _reward_table([])
+    assert table.get_eligible(10) == []
+    assert table.get_top_eligible(10) is None
+    assert table.get_previous(10) is None
+    assert table.get_next(10) is None
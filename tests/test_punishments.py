@@ -0,0 +1,69 @@
+import asyncio
+import discord
+
+from typing import Any
+
+from pidroid.models.punishments import MassBan
+
+
+class _Case:
+    def __init__(self, case_id: int) -> None:
+        self.case_id = case_id
+
+class _API:
+    def __init__(self) -> None:
+        self.recorded: list[list[int]] = []
+
+    async def expire_cases_of_users_by_types(self, types: Any, guild_id: int, user_ids: list[int]) -> None:
+        pass
+
+    async def insert_punishment_entries(self, type: str, guild_id: int, users: list[tuple[int, str | None]], *args: Any) -> list[_Case]:
+        first_case_id = sum(len(batch) for batch in self.recorded) + 1
+        self.recorded.append([user_id for user_id, _ in users])
+        return [_Case(first_case_id + i) for i in range(len(users))]
+
+class _Guild:
+    id = 1
+
+    def __init__(self, stop_after: int) -> None:
+        self.banned: list[int] = []
+        self.__stop_after = stop_after
+        self.stopped = asyncio.Event()
+
+    async def ban(self, user: discord.Object, **kwargs: Any) -> None:
+        await asyncio.sleep(0)
+        if len(self.banned) >= self.__stop_after:
+            self.stopped.set()
+            await asyncio.Event().wait()
+        self.banned.append(user.id)
+
+def _mass_ban(api: _API, guild: _Guild, user_count: int) -> MassBan:
+    return MassBan(
+        api, guild, # type: ignore
+        moderator=discord.Object(2), # type: ignore
+        users=[(user_id, None) for user_id in range(100, 100 + user_count)]
+    )
+
+def test_mass_ban_records_cases_at_once():
+    api, guild = _API(), _Guild(stop_after=1000)
+    cases = asyncio.run(_mass_ban(api, guild, 53).issue())
+
+    assert [c.case_id for c in cases] == list(range(1, 54))
+    assert len(api.recorded) == 1
+    assert sorted(user_id for batch in api.recorded for user_id in batch) == sorted(guild.banned)
+
+def test_interrupted_mass_ban_records_finished_bans():
+    api, guild = _API(), _Guild(stop_after=28)
+
+    async def run() -> None:
+        task = asyncio.create_task(_mass_ban(api, guild, 100).issue())
+        await guild.stopped.wait()
+        _ = task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    asyncio.run(run())
+    assert len(guild.banned) == 28
+    assert sorted(user_id for batch in api.recorded for user_id in batch) == sorted(guild.banned)
@@ -0,0 +1,50 @@
+import asyncio
+import os
+
+import pytest
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from pidroid.utils.api import API
+from pidroid.utils.db.base import Base
+from pidroid.utils.db.role_change_queue import RoleAction, RoleChangeQueue
+
+DSN = os.environ.get("PIDROID_TEST_POSTGRES_DSN")
+SCHEMA = "pidroid_role_change_queue"
+
+async def _claim_member_groups() -> None:
+    assert DSN is not None
+    engine = create_async_engine(DSN, connect_args={"server_settings": {"search_path": SCHEMA}})
+    async with engine.begin() as conn:
+        _ = await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        _ = await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        await conn.run_sync(Base.metadata.create_all, tables=[RoleChangeQueue.__table__])
+
+    api = API(None, DSN) # pyright: ignore[reportArgumentType]
+    api.session = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    try:
+        await api.insert_role_changes(1, [
+            (RoleAction.add, 10, 100), (RoleAction.add, 20, 100), (RoleAction.remove, 10, 100)
+        ])
+
+        # Every role change of a member is claimed together, even past the limit
+        claimed = await api.claim_role_changes([1], limit=1)
+        assert [(c.member_id, c.roles_added, c.roles_removed) for c in claimed] == [(10, [100], [100])]
+
+        # Members with role changes in processing are skipped
+        await api.insert_role_change(RoleAction.add, 1, 10, 200)
+        claimed_again = await api.claim_role_changes([1])
+        assert [c.member_id for c in claimed_again] == [20]
+
+        # Later role changes wait while an earlier role change of the member waits for a retry
+        await api.retry_role_changes(claimed[0].row_ids, "error")
+        assert await api.claim_role_changes([1]) == []
+    finally:
+        async with engine.begin() as conn:
+            _ = await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await engine.dispose()
+
+@pytest.mark.skipif(DSN is None, reason="PIDROID_TEST_POSTGRES_DSN is not set")
+def test_role_changes_are_claimed_per_member():
+    asyncio.run(_claim_member_groups())
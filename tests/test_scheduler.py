@@ -0,0 +1,69 @@
+import asyncio
+import datetime
+
+from pidroid.utils.scheduler import DeadlineScheduler, spread_overdue
+from pidroid.utils.time import utcnow
+
+
+async def _noop(item: str) -> None:
+    pass
+
+def test_pop_due_order():
+    now = utcnow()
+    scheduler: DeadlineScheduler[str] = DeadlineScheduler(_noop)
+    scheduler.schedule(3, now + datetime.timedelta(seconds=3), "c")
+    scheduler.schedule(1, now + datetime.timedelta(seconds=1), "a")
+    scheduler.schedule(2, now + datetime.timedelta(seconds=2), "b")
+    assert len(scheduler) == 3
+    assert scheduler.next_deadline == now + datetime.timedelta(seconds=1)
+
+    assert scheduler.pop_due(now) == []
+    assert scheduler.pop_due(now + datetime.timedelta(seconds=2)) == ["a", "b"]
+    assert scheduler.pop_due(now + datetime.timedelta(seconds=10)) == ["c"]
+    assert scheduler.next_deadline is None
+
+def test_cancel_and_reschedule():
+    now = utcnow()
+    scheduler: DeadlineScheduler[str] = DeadlineScheduler(_noop)
+    scheduler.schedule(1, now + datetime.timedelta(seconds=1), "a")
+    scheduler.schedule(2, now + datetime.timedelta(seconds=2), "b")
+    assert scheduler.cancel(1)
+    assert not scheduler.cancel(1)
+    assert scheduler.next_deadline == now + datetime.timedelta(seconds=2)
+
+    # Rescheduling replaces the previous deadline
+    scheduler.schedule(2, now + datetime.timedelta(seconds=5), "b2")
+    assert len(scheduler) == 1
+    assert scheduler.pop_due(now + datetime.timedelta(seconds=3)) == []
+    assert scheduler.pop_due(now + datetime.timedelta(seconds=5)) == ["b2"]
+
+def test_runner_wakes_up_for_earlier_deadline():
+    handled: list[str] = []
+
+    async def callback(item: str) -> None:
+        handled.append(item)
+
+    async def run() -> None:
+        scheduler: DeadlineScheduler[str] = DeadlineScheduler(callback)
+        scheduler.start()
+        scheduler.schedule("late", utcnow() + datetime.timedelta(hours=1), "late")
+        await asyncio.sleep(0)
+        scheduler.schedule("soon", utcnow() + datetime.timedelta(milliseconds=20), "soon")
+        await asyncio.sleep(0.2)
+        scheduler.stop()
+
+    asyncio.run(run())
+    assert handled == ["soon"]
+
+def test_spread_overdue():
+    now = utcnow()
+    second = datetime.timedelta(seconds=1)
+    deadlines = [now - 3 * second, now - 2 * second, now - second, now + 10 * second]
+    assert spread_overdue(deadlines, now, second) == [now, now + second, now + 2 * second, now + 10 * second]
+    assert spread_overdue(deadlines, now, second, burst=2) == [now, now, now + second, now + 10 * second]
+
+def test_spread_overdue_keeps_order():
+    now = utcnow()
+    second = datetime.timedelta(seconds=1)
+    deadlines = [now - 2 * second, now - second, now + datetime.timedelta(milliseconds=500)]
+    assert spread_overdue(deadlines, now, second) == [now, now + second, now + second]
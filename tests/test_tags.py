@@ -0,0 +1,109 @@
+from pidroid.utils.tags import FUZZY_CANDIDATES, TagNameIndex, edit_distance, score_match
+
+
+def create_index() -> TagNameIndex:
+    return TagNameIndex([
+        (1, "Role explanations", ["roles"]),
+        (2, "Rules", []),
+        (3, "Files", ["saves", "Role files"]),
+    ])
+
+def test_exact_lookup_ignores_case_and_includes_aliases():
+    index = create_index()
+    assert index.get("rules") == 2
+    assert index.get("ROLE EXPLANATIONS") == 1
+    assert index.get("Saves") == 3
+    assert index.get("rule") is None
+
+def test_names_win_over_aliases():
+    index = create_index()
+    index.add(4, "Roles", [])
+    assert index.get("roles") == 4
+    index.remove(4)
+    assert index.get("roles") == 1
+
+def test_prefix_lookup():
+    index = create_index()
+    # Role files is an alias of the third tag, which is returned only once
+    assert index.find_prefixed("rol") == [1, 3]
+    assert index.find_prefixed("ru") == [2]
+    assert index.find_prefixed("files") == [3]
+    assert index.find_prefixed("x") == []
+    assert len(index.find_prefixed("")) == 3
+
+def test_names_are_sorted():
+    index = create_index()
+    index.add(4, "apples", [])
+    assert index.names == ["apples", "Files", "Role explanations", "Rules"]
+    assert len(index) == 4
+
+def test_updates_keep_index_current():
+    index = create_index()
+    index.set_aliases(3, ["game files"])
+    assert index.get("saves") is None
+    assert index.get("game files") == 3
+    assert index.get_aliases(3) == ["game files"]
+
+    index.remove(3)
+    assert index.get("files") is None
+    assert index.get("game files") is None
+    assert 3 not in index
+    assert index.find_prefixed("") == [1, 2]
+
+    # Removing or updating a missing tag does nothing
+    index.remove(3)
+    index.set_aliases(3, ["saves"])
+    assert index.get("saves") is None
+
+def test_edit_distance():
+    assert edit_distance("rules", "rules", 1) == 0
+    assert edit_distance("rukes", "rules", 1) == 1
+    assert edit_distance("rules", "rul", 2) == 2
+    assert edit_distance("rules", "rul", 1) is None
+    assert edit_distance("svaes", "saves", 1) == 1
+    assert edit_distance("abcdef", "fedcba", 2) is None
+
+def test_scores_are_ordered():
+    assert score_match("rules", "rules") == 1.0
+    prefix = score_match("role", "role explanations")
+    word_prefix = score_match("expl", "role explanations")
+    typo = score_match("rukes", "rules")
+    assert 1.0 > prefix > 0.8 > word_prefix > 0.6 > typo > 0.45
+    assert score_match("zzz", "rules") < 0.45
+
+def test_search_finds_misspelled_names_and_aliases():
+    index = create_index()
+    assert index.search("rukes")[0].row_id == 2
+    assert index.search("svaes")[0].row_id == 3
+    assert index.search("qwerty") == []
+    assert index.search("  ") == []
+
+def test_search_finds_misspelled_name_among_many_similar_names():
+    # Every name shares the same trigrams with the misspelling as the intended name does
+    index = TagNameIndex([(i, f"ru{i:04d}es", []) for i in range(3000)] + [(3000, "Rules", [])])
+    assert index.search("rukes")[0].row_id == 3000
+
+    # Names which are as close as the intended one are scored as well, rather than cut off at random
+    letters = "0123456789abcdfghijmnopqstvwxyz"
+    assert len(letters) > FUZZY_CANDIDATES
+    index = TagNameIndex([(i, f"ru{c}es", []) for i, c in enumerate(letters)] + [(100, "Rules", [])])
+    assert 100 in [match.row_id for match in index.search("rukes", limit=100)]
+
+def test_search_ranks_and_deduplicates():
+    index = create_index()
+    matches = index.search("role")
+    # The first tag matches by name and alias, but is only returned once
+    assert [match.row_id for match in matches] == [1, 3]
+    assert matches[0].score > matches[1].score
+    assert index.search("explanations")[0].row_id == 1
+
+def test_search_follows_updates():
+    index = create_index()
+    index.add(4, "Ruled paper", [])
+    assert [match.row_id for match in index.search("rule")] == [2, 4]
+    index.remove(2)
+    assert [match.row_id for match in index.search("rule")] == [4]
+    index.set_aliases(3, ["game saves"])
+    assert index.search("sav")[0].row_id == 3
+    index.set_aliases(3, [])
+    assert index.search("game saves") == []
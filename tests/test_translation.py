@@ -0,0 +1,14 @@
+import hashlib
+
+from pidroid.utils.db.translation import hash_translation_content, normalize_translation_content
+
+
+def test_normalization():
+    assert normalize_translation_content("  Hello\n  World ") == "hello world"
+    assert normalize_translation_content("Labas rytas") == "labas rytas"
+
+def test_hash_ignores_case_and_whitespace():
+    assert hash_translation_content("Hello world") == hash_translation_content("  hello   WORLD\n")
+    assert hash_translation_content("Hello world") != hash_translation_content("Hello, world")
+    # The migration backfills the hashes in SQL, which has to produce the same digest
+    assert hash_translation_content("Labas") == hashlib.sha256(b"labas").digest()
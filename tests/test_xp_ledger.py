@@ -0,0 +1,137 @@
+import asyncio
+import os
+
+from typing import Any, Awaitable, Callable
+
+import pytest
+
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from pidroid.models.xp_ledger import EMPTY_LEVEL_STATE, PendingXP, add_xp
+from pidroid.utils.api import API
+from pidroid.utils.db.base import Base
+from pidroid.utils.db.levels import UserLevels
+
+DSN = os.environ.get("PIDROID_TEST_POSTGRES_DSN")
+SCHEMA = "pidroid_xp_ledger"
+
+# asyncpg does not allow more bind parameters than this in a single statement
+ASYNCPG_MAX_PARAMETERS = 32767
+# Enough members to go over the parameter limit with a parameter for every value
+MEMBER_COUNT = 40_000
+
+def _pending_entries(count: int, amount: int = 20) -> list[PendingXP]:
+    state = add_xp(EMPTY_LEVEL_STATE, amount)
+    return [PendingXP(i % 10, i, amount, state) for i in range(count)]
+
+class _Session:
+    """Stands in for a database session, recording the executed statements."""
+
+    def __init__(self, statements: list[Any], result: Any = None) -> None:
+        self.statements = statements
+        self.result = result
+
+    async def __aenter__(self) -> "_Session":
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        return None
+
+    def begin(self) -> "_Session":
+        return self
+
+    async def execute(self, statement: Any) -> Any:
+        self.statements.append(statement)
+        return self.result
+
+    async def commit(self) -> None:
+        return None
+
+def test_member_level_upsert_parameter_count_is_fixed():
+    statements: list[Any] = []
+    api = API(None, "") # pyright: ignore[reportArgumentType]
+    api.session = lambda: _Session(statements) # pyright: ignore[reportAttributeAccessIssue]
+
+    asyncio.run(api.upsert_member_levels(_pending_entries(MEMBER_COUNT)))
+
+    assert len(statements) == 1
+    compiled = statements[0].compile(dialect=postgresql.asyncpg.dialect())
+    assert len(compiled.params) < 100 < ASYNCPG_MAX_PARAMETERS
+
+class _Result:
+    def __init__(self, row: tuple[Any, ...]) -> None:
+        self.row = row
+
+    def one(self) -> tuple[Any, ...]:
+        return self.row
+
+def test_award_member_xp_is_a_single_upsert():
+    before = add_xp(EMPTY_LEVEL_STATE, 90)
+    after = add_xp(before, 20)
+    row = (after.to_user_levels(1, 2), before.level, before.current_xp, before.xp_to_next_level)
+    statements: list[Any] = []
+    api = API(None, "") # pyright: ignore[reportArgumentType]
+    api.session = lambda: _Session(statements, _Result(row)) # pyright: ignore[reportAttributeAccessIssue]
+
+    info_before, info_after = asyncio.run(api.award_member_xp(1, 2, 20))
+
+    assert len(statements) == 1
+    sql = str(statements[0].compile(dialect=postgresql.asyncpg.dialect()))
+    assert "ON CONFLICT" in sql and "RETURNING" in sql
+    assert (info_before.total_xp, info_before.level) == (before.total_xp, before.level)
+    assert info_after.level == after.level
+
+async def _with_user_levels_table(test: Callable[[API], Awaitable[None]]) -> None:
+    assert DSN is not None
+    engine = create_async_engine(DSN, connect_args={"server_settings": {"search_path": SCHEMA}})
+    async with engine.begin() as conn:
+        _ = await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        _ = await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        await conn.run_sync(Base.metadata.create_all, tables=[UserLevels.__table__])
+
+    api = API(None, DSN) # pyright: ignore[reportArgumentType]
+    api.session = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    try:
+        await test(api)
+    finally:
+        async with engine.begin() as conn:
+            _ = await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await engine.dispose()
+
+@pytest.mark.skipif(DSN is None, reason="PIDROID_TEST_POSTGRES_DSN is not set")
+def test_award_member_xp_returns_levels_before_and_after():
+    async def award(api: API) -> None:
+        state = EMPTY_LEVEL_STATE
+        # Cross a few levels, the returned levels have to match the ones computed in Python
+        for amount in (20, 90, 500, 2000):
+            info_before, info_after = await api.award_member_xp(1, 2, amount)
+            expected = add_xp(state, amount)
+            assert (info_before.total_xp, info_before.level, info_before.current_xp) == (state.total_xp, state.level, state.current_xp)
+            assert (info_after.total_xp, info_after.level, info_after.current_xp) == (expected.total_xp, expected.level, expected.current_xp)
+            state = expected
+
+    asyncio.run(_with_user_levels_table(award))
+
+async def _flush_and_count() -> int:
+    counts: list[int] = []
+
+    async def flush(api: API) -> None:
+        # The second flush adds to the rows created by the first one
+        await api.upsert_member_levels(_pending_entries(MEMBER_COUNT))
+        await api.upsert_member_levels(_pending_entries(MEMBER_COUNT))
+        async with api.session() as session:
+            result = await session.execute(
+                select(func.count(), func.sum(UserLevels.total_xp))
+            )
+            count, total_xp = result.one()
+        assert total_xp == MEMBER_COUNT * 40
+        counts.append(count)
+
+    await _with_user_levels_table(flush)
+    return counts[0]
+
+@pytest.mark.skipif(DSN is None, reason="PIDROID_TEST_POSTGRES_DSN is not set")
+def test_member_level_upsert_over_parameter_limit():
+    assert asyncio.run(_flush_and_count()) == MEMBER_COUNT